@@ -0,0 +1,52 @@
+"""
+Closed-form Bernardynki lookups against the original month by month walk.
+
+    python -m benchmarks.bernardynki
+"""
+from __future__ import annotations
+
+import timeit
+
+import pendulum
+
+from bernardynki import Bernardynki
+
+
+def iterative_next_after(dt: pendulum.DateTime) -> pendulum.DateTime:
+    when = Bernardynki.FIRST_WHEN
+    while when.date() < dt.date():
+        when = when.add(months=1, days=1)
+    return when
+
+
+def iterative_offset(dt: pendulum.DateTime, offset: int) -> pendulum.DateTime:
+    when = iterative_next_after(dt)
+    for _ in range(offset):
+        when = when.add(months=1, days=1)
+    return when
+
+
+def _bench(name: str, stmt, number: int) -> float:
+    seconds = min(timeit.repeat(stmt, number=number, repeat=3)) / number
+    print(f'{name:<40}{seconds * 1e6:>12.1f} us')
+    return seconds
+
+
+def main() -> int:
+    cases = [
+        ('next_after 2024', pendulum.datetime(2024, 6, 1), 0),
+        ('next_after 2100', pendulum.datetime(2100, 6, 1), 0),
+        ('next_after 2024 +500', pendulum.datetime(2024, 6, 1), 500),
+        ('next_after 2500 +500', pendulum.datetime(2500, 6, 1), 500),
+    ]
+    Bernardynki.first + 1  # build the cycle table outside of the timings
+    for name, dt, offset in cases:
+        assert (Bernardynki.next_after(dt) + offset).when == iterative_offset(dt, offset)
+        old = _bench(f'{name} (iterative)', lambda: iterative_offset(dt, offset), number=5)
+        new = _bench(f'{name} (closed form)', lambda: Bernardynki.next_after(dt) + offset, number=1000)
+        print(f'{"":<40}{old / new:>11.0f}x')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,54 @@
+"""
+botka_script scanner throughput on growing generated scripts, the time per
+character should stay flat as scripts grow.
+
+    python -m benchmarks.botka_script
+    python -m benchmarks.botka_script --sizes 10000 100000 1000000
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from botka_script.scanner import Scanner
+
+
+STATEMENTS = (
+    '(defun f{i} (x)\n  (print "wynik\n" (+ x {i})))\n',
+    '(if (<= {i} 10) t nil)\n',
+    "(print 'symbol{i} .5 {i}.25 \"a b c\")\n",
+    '(!= (== x {i}) (>= y {i}))\n',
+)
+
+
+def generate_script(size: int, rng: random.Random) -> str:
+    parts = []
+    length = 0
+    while length < size:
+        part = rng.choice(STATEMENTS).format(i=rng.randint(0, 1000))
+        parts.append(part)
+        length += len(part)
+    return ''.join(parts)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f'{"characters":>12}{"tokens":>10}{"ms":>10}{"us/char":>10}')
+    for size in args.sizes:
+        source = generate_script(size, rng)
+        scanner = Scanner(source=source)
+        start = time.perf_counter()
+        scanner.scan_tokens()
+        elapsed = time.perf_counter() - start
+        print(f'{len(source):>12}{len(scanner.tokens):>10}{elapsed * 1000:>10.1f}{elapsed / len(source) * 1e6:>10.3f}')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,195 @@
+"""
+difflanek.find_solution against the single regex it used to build, on the corpus
+in difflanek_guesses.txt (`!difflanek` arguments, one game per line) or on random
+guesses.
+
+    python -m benchmarks.difflanek
+    python -m benchmarks.difflanek --random 50 --pl
+
+The corpus is generated, not recorded: random games from the dictionary with the
+default seed, rebuilt with
+
+    python -m benchmarks.difflanek --generate 150
+
+Uses difflanek/pl_PL.dic when it is there, otherwise the diffle dictionary.
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import os
+import random
+import re
+from collections import Counter
+from typing import Sequence
+
+import diffle
+from benchmarks.diffle import _measure
+from benchmarks.diffle import _summary
+from benchmarks.diffle import random_guess
+from difflanek import difflanek
+from wordmatrix import WordMatrix
+
+
+def regex_find_solution(words: list[str], is_polish_word: bool, dictionary: Sequence[str]) -> list[str]:
+    """
+    `difflanek.find_solution` as it used to be: one regex of lookaheads searched in every word.
+    """
+    isPolishValid = is_polish_word
+
+    polish = 'ąćęłńóśźż'
+    invalid = f'A-Z{polish.upper()}' + ('' if isPolishValid else polish)
+    regex = ''
+
+    for word in words:
+        gray = []
+        yellow = []
+        green = []
+
+        border = word[0]
+        heavyBorder = (border == '[')
+        isGreenzone = (border == '(') or heavyBorder
+        if isGreenzone:
+            word = word[1:]
+
+        template = '(?=^'
+        if isGreenzone and not heavyBorder:
+            template += '[^{grayNoYellows}' + word[0] + '][^{grayNoYellows}]*'
+        yellowzone = ''
+        isYellowzone = not isGreenzone
+
+        for letter in word:
+            if isGreenzone:
+                if letter == ')' or letter == ']':
+                    yellowzone = ''
+                    isGreenzone = False
+                else:
+                    green += letter
+                    template += letter
+            else:
+                if letter == '(':
+                    template += '[^{grayNoYellows}' + yellowzone + ']' + ('*' if isYellowzone else '+')
+                    isGreenzone = True
+                    isYellowzone = False
+                else:
+                    if re.search(f'[a-z{polish}]', letter) and letter not in gray:
+                        gray += letter
+                    if re.search(f'[A-Z{polish.upper()}]', letter):
+                        yellow += letter.lower()
+                        yellowzone += letter.lower()
+                    isYellowzone = True
+
+        border = word[-1]
+        heavyBorder = (border == ']')
+        isGreenzone = (border == ')') or heavyBorder
+        if isGreenzone:
+            if not heavyBorder:
+                template += '[^{grayNoYellows}]*[^{grayNoYellows}' + word[-2] + ']'
+        else:
+            template += '[^{grayNoYellows}' + yellowzone + ']*'
+        template += '$)'
+
+        grayNoYellows = [letter for letter in gray if letter not in yellow]
+        grayNoOthers = [letter for letter in grayNoYellows if letter not in green]
+        if not yellow or ')' in word or ']' in word:
+            regex += template.format(grayNoYellows=invalid + ''.join(grayNoYellows))
+
+        for letter, count in Counter(yellow + green).items():
+            if letter in yellow:
+                knownCount = letter in gray
+                template = '(?=^'
+                for i in range(count):
+                    template += '[^{grayNoOthers}' + (letter if knownCount else '') + ']*' + letter
+                template += '[^{grayNoOthers}' + (letter if knownCount else '') + ']*$)'
+                regex += template.format(grayNoOthers=invalid + ''.join(grayNoOthers))
+
+        if isPolishValid:
+            regex += f'(?=^[^{invalid}]*[{polish}]+[^{invalid}]*$)'
+
+    answers = sorted(filter(lambda word: re.search(regex, word), dictionary), key=len)
+
+    return answers
+
+
+CORPUS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'difflanek_guesses.txt')
+
+
+def load_corpus(path: str = CORPUS_PATH) -> list[tuple[list[str], bool]]:
+    cases = []
+    with open(path) as f:
+        for line in f:
+            params = line.split()
+            if params:
+                cases.append((params[params[0] == 'pl':], params[0] == 'pl'))
+    return cases
+
+
+def random_cases(
+    words: list[str],
+    rng: random.Random,
+    count: int,
+    is_polish_word: bool | None = None,
+) -> list[tuple[list[str], bool]]:
+    """
+    Games of one to three random guesses, requiring a polish letter in some of them
+    unless `is_polish_word` is given.
+    """
+    cases = []
+    for _ in range(count):
+        guesses = [random_guess(words, rng) for _ in range(rng.randint(1, 3))]
+        cases.append((guesses, rng.random() < 0.3 if is_polish_word is None else is_polish_word))
+    return cases
+
+
+def save_corpus(path: str, cases: list[tuple[list[str], bool]]) -> None:
+    with open(path, 'w') as f:
+        for guesses, is_polish_word in cases:
+            f.write(' '.join(['pl', *guesses] if is_polish_word else guesses) + '\n')
+
+
+def load_words() -> list[str]:
+    path = os.path.join(os.path.dirname(os.path.abspath(difflanek.__file__)), difflanek.DICT_FILE)
+    if os.path.exists(path):
+        return list(difflanek._load_dict())
+    return list(diffle.DICT)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--corpus', default=CORPUS_PATH)
+    parser.add_argument('--random', type=int, metavar='CASES', help='random guesses instead of the corpus')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--pl', action='store_true', help='require a polish letter in random cases')
+    parser.add_argument('--generate', type=int, metavar='CASES', help='write a random corpus to --corpus and exit')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    words = load_words()
+    rng = random.Random(args.seed)
+    if args.generate:
+        save_corpus(args.corpus, random_cases(words, rng, args.generate))
+        print(f'{args.generate} cases saved to {args.corpus}')
+        return 0
+    if args.random:
+        cases = random_cases(words, rng, args.random, args.pl)
+    else:
+        cases = load_corpus(args.corpus)
+
+    matrix, build_time = _measure(lambda: WordMatrix(words))
+    _, counts_time = _measure(lambda: matrix.letter_counts)
+    print(f'{len(cases)} cases, matrix build {build_time * 1000:.0f} ms, letter counts {counts_time * 1000:.0f} ms')
+
+    timings: dict[str, list[float]] = {'regex': [], 'find_solution': []}
+    for guesses, is_polish_word in cases:
+        expected, elapsed = _measure(lambda: regex_find_solution(guesses, is_polish_word, words))
+        timings['regex'].append(elapsed)
+        result, elapsed = _measure(lambda: difflanek.find_solution(guesses, is_polish_word, matrix))
+        timings['find_solution'].append(elapsed)
+        assert result == expected, guesses
+    for name, values in timings.items():
+        print(_summary(name, values))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,127 @@
+"""
+diffle.Solver against a plain regex scan and a `WordMatrix` scan of the whole
+dictionary, on random guesses.
+
+    python -m benchmarks.diffle
+"""
+from __future__ import annotations
+
+import argparse
+import logging
+import random
+import re
+import statistics
+import time
+from typing import Callable
+from typing import TypeVar
+
+import diffle
+
+
+LETTERS = 'abcdefghijklmnoprstuwyząęłóśżźćń'
+
+T = TypeVar('T')
+
+
+def random_guess(words: list[str], rng: random.Random) -> str:
+    """
+    Greens, yellows and greys picked from a random dictionary word.
+    """
+    target = rng.choice(words)
+    guess = ''
+    i = 0
+    while i < len(target):
+        roll = rng.random()
+        if roll < 0.3:
+            j = rng.randint(i + 1, len(target))
+            left = '[' if i == 0 and rng.random() < 0.5 else '('
+            right = ']' if j == len(target) and rng.random() < 0.5 else ')'
+            guess += left + target[i:j] + right
+            i = j
+        elif roll < 0.5:
+            guess += target[i].upper()
+            i += 1
+        else:
+            guess += rng.choice(LETTERS)
+            i += 1
+    return guess
+
+
+def regex_scan(words: list[str], guesses: list[str]) -> list[str]:
+    """
+    What `diffle.Solver.get_matches` used to do: one regex over every word per guess.
+    """
+    parser = diffle.Solver([])
+    for guess in guesses:
+        regex = ''.join(chunk.to_regex() for chunk in parser._parse_guessed_word(guess))
+        words = list(filter(lambda word: re.match(regex, word), words))
+    return words
+
+
+def matrix_scan(guesses: list[str]) -> list[str]:
+    """
+    Every guess evaluated over the whole codepoint matrix, without the search index.
+    """
+    parser = diffle.Solver([])
+    matrix = diffle.DICT.word_matrix
+    rows = matrix.all_rows()
+    for guess in guesses:
+        rows = rows[diffle.match_chunks(matrix, parser._parse_guessed_word(guess), rows)]
+    return diffle.DICT.take(rows)
+
+
+def solver(guesses: list[str]) -> list[str]:
+    s = diffle.Solver(diffle.DICT)
+    for guess in guesses:
+        s.guess(guess)
+    return s.get_matches()
+
+
+def _measure(func: Callable[[], T]) -> tuple[T, float]:
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def _summary(name: str, timings: list[float]) -> str:
+    ordered = sorted(timings)
+    return (
+        f'{name:<12} median {statistics.median(ordered) * 1000:>9.2f} ms'
+        f'   p95 {ordered[int(len(ordered) * 0.95)] * 1000:>9.2f} ms'
+        f'   max {ordered[-1] * 1000:>9.2f} ms'
+    )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--cases', type=int, default=100)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    words = list(diffle.DICT)
+    rng = random.Random(args.seed)
+    cases = [[random_guess(words, rng) for _ in range(rng.randint(1, 3))] for _ in range(args.cases)]
+
+    _, build_time = _measure(lambda: diffle.DICT.search_index)
+    print(f'index build {build_time * 1000:.0f} ms')
+    _, build_time = _measure(lambda: diffle.DICT.word_matrix)
+    print(f'matrix build {build_time * 1000:.0f} ms')
+
+    timings: dict[str, list[float]] = {'regex scan': [], 'matrix scan': [], 'solver': []}
+    for guesses in cases:
+        expected, elapsed = _measure(lambda: regex_scan(words, guesses))
+        timings['regex scan'].append(elapsed)
+        result, elapsed = _measure(lambda: matrix_scan(guesses))
+        timings['matrix scan'].append(elapsed)
+        assert result == expected, guesses
+        result, elapsed = _measure(lambda: solver(guesses))
+        timings['solver'].append(elapsed)
+        assert result == expected, guesses
+    for name, values in timings.items():
+        print(_summary(name, values))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
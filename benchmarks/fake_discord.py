@@ -0,0 +1,130 @@
+"""
+Just enough of discord.py's models for `client.Client` to handle events offline.
+"""
+from __future__ import annotations
+
+from typing import Optional
+
+import attr
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeRole:
+    id: int
+    name: str = 'role'
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeUser:
+    id: int
+    name: str = 'user'
+    bot: bool = False
+    roles: list[FakeRole] = attr.Factory(list)
+
+    def mentioned_in(self, message: FakeMessage) -> bool:
+        if message.mention_everyone:
+            return True
+        return any(user.id == self.id for user in message.mentions)
+
+    @property
+    def mention(self) -> str:
+        return f'<@{self.id}>'
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, FakeUser) and other.id == self.id
+
+    def __hash__(self) -> int:
+        return hash(self.id)
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeGuild:
+    id: int
+    me: FakeUser
+    name: str = 'guild'
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeFile:
+    filename: str
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeChannel:
+    id: int
+    guild: FakeGuild
+    name: str = 'channel'
+    messages: dict[int, FakeMessage] = attr.Factory(dict)
+    sent: list[str] = attr.Factory(list)
+    fetch_count: int = 0
+
+    async def send(self, content: Optional[str] = None, file: Optional[FakeFile] = None) -> None:
+        self.sent.append(content or '')
+
+    async def fetch_message(self, id: int) -> FakeMessage:
+        self.fetch_count += 1
+        return self.messages[id]
+
+    def get_partial_message(self, id: int) -> FakeMessage:
+        return self.messages[id]
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeReference:
+    message_id: int
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeEmoji:
+    name: str
+    id: Optional[int] = None
+
+    def is_custom_emoji(self) -> bool:
+        return self.id is not None
+
+    def __str__(self) -> str:
+        return self.name
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeReaction:
+    emoji: str
+    count: int = 0
+    me: bool = False
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeMessage:
+    id: int
+    content: str
+    author: FakeUser
+    channel: FakeChannel
+    mentions: list[FakeUser] = attr.Factory(list)
+    role_mentions: list[FakeRole] = attr.Factory(list)
+    mention_everyone: bool = False
+    reference: Optional[FakeReference] = None
+    reactions: list[FakeReaction] = attr.Factory(list)
+    attachments: list = attr.Factory(list)
+
+    @property
+    def guild(self) -> FakeGuild:
+        return self.channel.guild
+
+    async def add_reaction(self, emoji: FakeEmoji | str) -> None:
+        pass
+
+    async def remove_reaction(self, emoji: FakeEmoji | str, member: FakeUser) -> None:
+        pass
+
+
+@attr.s(auto_attribs=True, kw_only=True, eq=False)
+class FakeRawReactionActionEvent:
+    message_id: int
+    channel_id: int
+    guild_id: int
+    user_id: int
+    emoji: FakeEmoji
+    event_type: str = 'REACTION_ADD'
@@ -0,0 +1,322 @@
+"""
+Offline load test of `client.Client` event handlers.
+
+Replays a recorded (json lines) or synthetic event stream through `on_message`,
+`on_message_edit` and `on_raw_reaction_add` without connecting to discord and
+reports throughput, per-stage latency and database query counts.
+
+    python -m benchmarks.gateway --events 2000
+    python -m benchmarks.gateway --record stream.jsonl --events 500
+    python -m benchmarks.gateway --replay stream.jsonl
+
+Runs against a throwaway sqlite database unless DB_URI is set.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+from collections import defaultdict
+from functools import wraps
+from typing import Any
+from typing import Iterable
+from typing import Iterator
+
+from benchmarks.fake_discord import FakeChannel
+from benchmarks.fake_discord import FakeEmoji
+from benchmarks.fake_discord import FakeGuild
+from benchmarks.fake_discord import FakeMessage
+from benchmarks.fake_discord import FakeRawReactionActionEvent
+from benchmarks.fake_discord import FakeReaction
+from benchmarks.fake_discord import FakeReference
+from benchmarks.fake_discord import FakeRole
+from benchmarks.fake_discord import FakeUser
+
+
+BOT_ID = 1
+BOT_ROLE_ID = 2
+GUILD_ID = 10
+CHANNEL_IDS = (100, 101, 102)
+USER_IDS = tuple(range(1000, 1020))
+EMOJIS = ('👍', '😂', '🥕')
+COMMANDS = ('!ping', '!bing', '!echo uwu', '!shrug xd', '!random 10', '!scream')
+WORDS = (
+    'ala ma kota a kot ma ale bernardynki dzisiaj jutro kawusi smacznej miłego dnia '
+    'marchewka piesek pije mleko nie wiem co to jest ale fajne xd lol kek pogchamp'
+).split()
+
+HANDLER_STAGES = {
+    'message': 'on_message',
+    'edit': 'on_message_edit',
+    'reaction': 'on_raw_reaction_add',
+}
+# stages timed on top of the event handlers, names as imported into `client`
+CLIENT_STAGES = ('markov2', 'markov3', 'carrot', 'generate_markov2')
+
+
+def synthetic_stream(count: int, seed: int = 0) -> Iterator[dict[str, Any]]:
+    """
+    Mostly plain chatter with some commands, mentions, replies, edits and reactions.
+    """
+    rng = random.Random(seed)
+    message_ids: list[int] = []
+    for i in range(count):
+        roll = rng.random()
+        if message_ids and roll < 0.08:
+            yield {
+                'type': 'reaction',
+                'message': rng.choice(message_ids[-50:]),
+                'user': rng.choice(USER_IDS),
+                'emoji': rng.choice(EMOJIS),
+            }
+            continue
+        if message_ids and roll < 0.11:
+            yield {
+                'type': 'edit',
+                'id': rng.choice(message_ids[-20:]),
+                'content': rng.choice(COMMANDS),
+            }
+            continue
+
+        event: dict[str, Any] = {
+            'type': 'message',
+            'id': 10_000 + i,
+            'channel': rng.choice(CHANNEL_IDS),
+            'author': rng.choice(USER_IDS),
+            'content': ' '.join(rng.choices(WORDS, k=rng.randint(1, 15))),
+            'mentions': [],
+            'role_mentions': [],
+            'reference': None,
+        }
+        if roll < 0.16:
+            event['content'] = rng.choice(COMMANDS)
+        elif roll < 0.18:
+            event['content'] = f'<@{BOT_ID}> {event["content"]}'
+            event['mentions'] = [BOT_ID]
+        elif roll < 0.19:
+            event['content'] = f'<@&{BOT_ROLE_ID}> {event["content"]}'
+            event['role_mentions'] = [BOT_ROLE_ID]
+        elif roll < 0.21 and message_ids:
+            event['reference'] = rng.choice(message_ids[-20:])
+        message_ids.append(event['id'])
+        yield event
+
+
+def load_stream(path: str) -> list[dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_stream(path: str, events: Iterable[dict[str, Any]]) -> None:
+    with open(path, 'w') as f:
+        for event in events:
+            f.write(json.dumps(event, ensure_ascii=False) + '\n')
+
+
+class Stats:
+    def __init__(self) -> None:
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.queries: defaultdict[str, int] = defaultdict(int)
+        self.events: defaultdict[str, int] = defaultdict(int)
+        self.total_queries = 0
+        self.wall_time = 0.0
+
+    def timed(self, stage: str, func):
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            queries_before = self.total_queries
+            start = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                self.latencies[stage].append(time.perf_counter() - start)
+                self.queries[stage] += self.total_queries - queries_before
+        return inner
+
+    def report(self) -> str:
+        total_events = sum(self.events.values())
+        lines = [
+            f'events: {total_events} in {self.wall_time:.3f}s '
+            f'({total_events / self.wall_time if self.wall_time else 0:.1f} events/s)',
+            f'db queries: {self.total_queries} ({self.total_queries / max(total_events, 1):.2f}/event)',
+            '',
+            f'{"stage":<28}{"count":>8}{"p50 ms":>10}{"p95 ms":>10}{"max ms":>10}{"queries":>10}',
+        ]
+        for stage, latencies in sorted(self.latencies.items()):
+            ordered = sorted(latencies)
+            p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+            lines.append(
+                f'{stage:<28}{len(ordered):>8}'
+                f'{statistics.median(ordered) * 1000:>10.3f}'
+                f'{p95 * 1000:>10.3f}'
+                f'{ordered[-1] * 1000:>10.3f}'
+                f'{self.queries[stage]:>10}',
+            )
+        return '\n'.join(lines)
+
+
+class Gateway:
+    """
+    Plays the role of discord: owns the fake guild/channels/users, turns stream
+    events into fake models and dispatches them to the client like the gateway would.
+    """
+
+    def __init__(self, client_cls: type, stats: Stats) -> None:
+        self.stats = stats
+        bot_role = FakeRole(id=BOT_ROLE_ID, name='bot')
+        self.bot = FakeUser(id=BOT_ID, name='SBotq', bot=True, roles=[bot_role])
+        self.guild = FakeGuild(id=GUILD_ID, me=self.bot)
+        self.channels = {
+            id: FakeChannel(id=id, guild=self.guild, name=f'channel-{id}')
+            for id in CHANNEL_IDS
+        }
+        self.users = {id: FakeUser(id=id, name=f'user-{id}') for id in USER_IDS}
+        self.users[BOT_ID] = self.bot
+        self.roles = {BOT_ROLE_ID: bot_role}
+        self.messages: dict[int, FakeMessage] = {}
+
+        gateway = self
+
+        class SimulatedClient(client_cls):
+            def get_channel(self, id: int) -> FakeChannel:
+                return gateway.channels[id]
+
+            def get_partial_messageable(self, id: int, **kwargs) -> FakeChannel:
+                return gateway.channels[id]
+
+        self.client = SimulatedClient()
+        self.client._connection.user = self.bot
+
+    async def dispatch(self, event: dict[str, Any]) -> None:
+        handler = getattr(self, f'_{event["type"]}')
+        await self.stats.timed(HANDLER_STAGES[event['type']], handler)(event)
+        self.stats.events[event['type']] += 1
+
+    async def _message(self, event: dict[str, Any]) -> None:
+        channel = self.channels[event['channel']]
+        reference = event.get('reference')
+        message = FakeMessage(
+            id=event['id'],
+            content=event['content'],
+            author=self.users[event['author']],
+            channel=channel,
+            mentions=[self.users[id] for id in event.get('mentions', [])],
+            role_mentions=[self.roles[id] for id in event.get('role_mentions', [])],
+            reference=FakeReference(message_id=reference) if reference is not None else None,
+        )
+        self.messages[message.id] = message
+        channel.messages[message.id] = message
+        self.client._connection._messages.append(message)
+        await self.client.on_message(message)
+
+    async def _edit(self, event: dict[str, Any]) -> None:
+        before = self.messages[event['id']]
+        after = FakeMessage(
+            id=before.id,
+            content=event['content'],
+            author=before.author,
+            channel=before.channel,
+            mentions=before.mentions,
+            role_mentions=before.role_mentions,
+            reference=before.reference,
+            reactions=before.reactions,
+        )
+        self.messages[after.id] = after
+        after.channel.messages[after.id] = after
+        await self.client.on_message_edit(before, after)
+
+    async def _reaction(self, event: dict[str, Any]) -> None:
+        message = self.messages[event['message']]
+        for reaction in message.reactions:
+            if reaction.emoji == event['emoji']:
+                break
+        else:
+            reaction = FakeReaction(emoji=event['emoji'])
+            message.reactions.append(reaction)
+        reaction.count += 1
+        await self.client.on_raw_reaction_add(
+            FakeRawReactionActionEvent(
+                message_id=message.id,
+                channel_id=message.channel.id,
+                guild_id=self.guild.id,
+                user_id=event['user'],
+                emoji=FakeEmoji(name=event['emoji']),
+            ),
+        )
+
+
+def _instrument(stats: Stats) -> None:
+    from sqlalchemy import event
+
+    import client
+    from database import engine
+
+    @event.listens_for(engine, 'before_cursor_execute')
+    def _count_query(*args, **kwargs) -> None:
+        stats.total_queries += 1
+
+    for stage in CLIENT_STAGES:
+        setattr(client, stage, stats.timed(stage, getattr(client, stage)))
+
+    get_builtin_command = client.get_builtin_command
+
+    def timed_get_builtin_command(cmd_name: str):
+        cmd_func = get_builtin_command(cmd_name)
+        if cmd_func is None:
+            return None
+        return stats.timed(f'command:{cmd_name}', cmd_func)
+
+    client.get_builtin_command = timed_get_builtin_command
+
+
+def replay(events: Iterable[dict[str, Any]]) -> Stats:
+    import client
+
+    stats = Stats()
+    _instrument(stats)
+    gateway = Gateway(client.Client, stats)
+
+    async def _inner() -> None:
+        start = time.perf_counter()
+        for event in events:
+            await gateway.dispatch(event)
+        stats.wall_time = time.perf_counter() - start
+
+    asyncio.run(_inner())
+    return stats
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--events', type=int, default=1000, help='number of synthetic events')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--replay', help='json lines stream to replay instead of a synthetic one')
+    parser.add_argument('--record', help='save the synthetic stream here and exit')
+    args = parser.parse_args()
+
+    if args.replay:
+        events = load_stream(args.replay)
+    else:
+        events = list(synthetic_stream(args.events, seed=args.seed))
+    if args.record:
+        save_stream(args.record, events)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ.setdefault('DB_URI', f'sqlite:///{os.path.join(tmp, "gateway.db")}')
+        os.environ.setdefault('TOKEN', 'offline')
+        os.environ.setdefault('MARKOV_CHANNEL_BLACKLIST', str(CHANNEL_IDS[-1]))
+        logging.disable(logging.INFO)
+        stats = replay(events)
+    print(stats.report())
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,273 @@
+"""
+Accuracy and latency of `opencv.get_difflanek` on synthetic difflanek boards.
+
+Boards are drawn with PIL in the palette of `difflanek.opencv`: random guesses
+of dictionary words with random green/yellow/grey feedback and the answer in
+green in the last row, each paired with the expected `get_difflanek` output.
+
+    python -m benchmarks.ocr --boards 20
+    python -m benchmarks.ocr --recogniser glyphs --font DejaVuSans-Bold.ttf
+    python -m benchmarks.ocr --save corpus/ --boards 50
+    python -m benchmarks.ocr --corpus corpus/
+
+`--recogniser glyphs` learns glyph templates from `--train` more boards first.
+`--corpus` reads a saved corpus, real screenshots can be added to its
+expected.json as well (tiles are needed only to learn glyphs from them).
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import random
+import statistics
+import time
+from typing import NamedTuple
+
+import cv2
+import numpy as np
+import pytesseract
+from PIL import Image
+from PIL import ImageDraw
+from PIL import ImageFont
+
+from benchmarks.difflanek import load_words
+from difflanek import glyphs
+from difflanek import opencv
+
+
+# tried in order when no --font is given, PIL's bitmap font if none is installed
+FONTS = ('DejaVuSans-Bold.ttf', 'LiberationSans-Bold.ttf', 'Arial Bold.ttf')
+BITMAP_FONT_HEIGHT = 11
+SCREEN_WIDTH = 1080
+SCREEN_HEIGHT = 2400
+MIN_WORD_LENGTH = 4
+MAX_WORD_LENGTH = 8
+
+
+class Board(NamedTuple):
+    image: np.ndarray
+    # `get_difflanek` output
+    expected: list[str]
+    # text of every tile in reading order, to learn glyphs from
+    tiles: list[str]
+
+
+class Font(NamedTuple):
+    font: ImageFont.ImageFont | ImageFont.FreeTypeFont
+    # bitmap fonts are drawn small and scaled up
+    scale: int
+
+    def can_draw(self, letter: str) -> bool:
+        try:
+            self.font.getmask(letter)
+        except UnicodeEncodeError:
+            return False
+        return True
+
+
+def load_font(path: str | None, size: int) -> Font:
+    for name in [path] if path else FONTS:
+        try:
+            return Font(ImageFont.truetype(name, size), 1)
+        except OSError:
+            if path:
+                raise
+    return Font(ImageFont.load_default(), max(size // BITMAP_FONT_HEIGHT, 1))
+
+
+def _rgb(colour: opencv.Colour) -> tuple[int, int, int]:
+    return colour.rgb.r, colour.rgb.g, colour.rgb.b
+
+
+def _draw_letter(board: Image.Image, font: Font, letter: str, box: tuple[int, int, int, int]) -> None:
+    """
+    `letter` in white, centred in `box`.
+    """
+    mask = font.font.getmask(letter)
+    glyph = Image.frombytes('L', mask.size, bytes(mask))
+    bbox = glyph.getbbox()
+    if bbox is None:
+        return
+    glyph = glyph.crop(bbox)
+    if font.scale > 1:
+        glyph = glyph.resize((glyph.width * font.scale, glyph.height * font.scale), Image.NEAREST)
+    left, top, right, bottom = box
+    position = (left + (right - left - glyph.width) // 2, top + (bottom - top - glyph.height) // 2)
+    board.paste((255, 255, 255), position, glyph)
+
+
+def render_board(rows: list[list[tuple[str, opencv.Colour, bool, bool]]], font: Font) -> np.ndarray:
+    """
+    Rows of tiles: text, tile colour and whether the left and right corners are square.
+    Letters of a tile are in cells as wide as the tile is high, green tiles span several.
+    """
+    longest = max(sum(len(text) for text, *_ in row) for row in rows)
+    cell = min(SCREEN_WIDTH // (longest + 2), 120)
+    gap = cell // 8
+    board = Image.new('RGB', (SCREEN_WIDTH, SCREEN_HEIGHT), _rgb(opencv.BACKGROUND))
+    draw = ImageDraw.Draw(board)
+    top = (SCREEN_HEIGHT - len(rows) * (cell + gap)) // 2
+    for row in rows:
+        width = sum(len(text) for text, *_ in row) * (cell + gap) - gap
+        left = (SCREEN_WIDTH - width) // 2
+        for text, colour, left_closed, right_closed in row:
+            right = left + len(text) * (cell + gap) - gap
+            fill = _rgb(colour)
+            draw.rounded_rectangle((left, top, right - 1, top + cell - 1), radius=cell // 4, fill=fill)
+            if left_closed:
+                draw.rectangle((left, top, left + cell // 2, top + cell - 1), fill=fill)
+            if right_closed:
+                draw.rectangle((right - 1 - cell // 2, top, right - 1, top + cell - 1), fill=fill)
+            for i, letter in enumerate(text):
+                cell_left = left + i * (cell + gap)
+                _draw_letter(board, font, letter, (cell_left, top, cell_left + cell, top + cell))
+            left = right + gap
+        top += cell + gap
+    return cv2.cvtColor(np.asarray(board), cv2.COLOR_RGB2BGR)
+
+
+def random_board(words: list[str], font: Font, rng: random.Random, guesses: int = 5) -> Board:
+    answer = rng.choice(words)
+    rows = []
+    for word in rng.sample(words, guesses):
+        row: list[tuple[str, opencv.Colour, bool, bool]] = []
+        i = 0
+        while i < len(word):
+            colour = rng.choice(opencv.TILE_COLOURS)
+            if colour == opencv.GREEN:
+                # the solved answer has to stay the biggest green tile, see `get_tiles`
+                end = min(i + rng.randint(1, 3), len(word), i + len(answer) - 1)
+                row.append((word[i:end].upper(), colour, rng.random() < 0.3, rng.random() < 0.3))
+                i = end
+            else:
+                row.append((word[i].upper(), colour, True, True))
+                i += 1
+        rows.append(row)
+    rows.append([(answer.upper(), opencv.GREEN, True, True)])
+    expected = [
+        ''.join(
+            opencv.text_to_difflanek(text, colour, left_closed=left_closed, right_closed=right_closed)
+            for text, colour, left_closed, right_closed in row
+        )
+        for row in rows
+    ]
+    return Board(render_board(rows, font), expected, [text for row in rows for text, *_ in row])
+
+
+def save_corpus(path: str, boards: list[Board]) -> None:
+    os.makedirs(path, exist_ok=True)
+    expected = {}
+    for i, board in enumerate(boards):
+        name = f'board-{i:04}.png'
+        cv2.imwrite(os.path.join(path, name), board.image)
+        expected[name] = {'rows': board.expected, 'tiles': board.tiles}
+    with open(os.path.join(path, 'expected.json'), 'w') as f:
+        json.dump(expected, f, ensure_ascii=False, indent=2)
+
+
+def load_corpus(path: str) -> list[Board]:
+    with open(os.path.join(path, 'expected.json')) as f:
+        expected = json.load(f)
+    return [
+        Board(cv2.imread(os.path.join(path, name)), case['rows'], case.get('tiles', []))
+        for name, case in sorted(expected.items())
+    ]
+
+
+def learn_glyphs(boards: list[Board]) -> glyphs.GlyphClassifier:
+    classifier = glyphs.GlyphClassifier()
+    for board in boards:
+        tiles = [tile for row in opencv.get_tiles(opencv.Img(image=board.image)) for tile in row]
+        if len(tiles) != len(board.tiles):
+            continue
+        for tile, text in zip(tiles, board.tiles):
+            classifier.learn(tile.mask.image, text)
+    return classifier
+
+
+class Result(NamedTuple):
+    rows: list[str] | None
+    seconds: float
+    error: str = ''
+
+
+def read_board(board: Board, classifier: glyphs.GlyphClassifier) -> Result:
+    _, png = cv2.imencode('.png', board.image)
+    data = png.tobytes()
+    start = time.perf_counter()
+    try:
+        rows = opencv.get_difflanek(data, classifier=classifier)
+    except (opencv.DifflanekException, pytesseract.TesseractNotFoundError) as e:
+        return Result(None, time.perf_counter() - start, type(e).__name__)
+    return Result(rows, time.perf_counter() - start)
+
+
+def report(boards: list[Board], results: list[Result]) -> str:
+    rows = sum(len(board.expected) for board in boards)
+    correct_rows = sum(
+        expected == actual
+        for board, result in zip(boards, results)
+        if result.rows is not None
+        for expected, actual in zip(board.expected, result.rows)
+    )
+    correct_boards = sum(board.expected == result.rows for board, result in zip(boards, results))
+    errors: dict[str, int] = {}
+    for result in results:
+        if result.error:
+            errors[result.error] = errors.get(result.error, 0) + 1
+    timings = sorted(result.seconds for result in results)
+    lines = [
+        f'boards: {correct_boards}/{len(boards)} read correctly, rows: {correct_rows}/{rows}',
+        f'latency median {statistics.median(timings) * 1000:.1f} ms'
+        f'   p95 {timings[int(len(timings) * 0.95)] * 1000:.1f} ms'
+        f'   max {timings[-1] * 1000:.1f} ms',
+    ]
+    if errors:
+        lines.append('errors: ' + ', '.join(f'{name} x{count}' for name, count in sorted(errors.items())))
+    for board, result in zip(boards, results):
+        if result.rows is not None and result.rows != board.expected:
+            lines.append(f'expected {" ".join(board.expected)}\n     got {" ".join(result.rows)}')
+            break
+    return '\n'.join(lines)
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--boards', type=int, default=10)
+    parser.add_argument('--train', type=int, default=30, help='boards to learn glyphs from')
+    parser.add_argument('--recogniser', choices=('tesseract', 'glyphs'), default='tesseract')
+    parser.add_argument('--font', help='truetype font file, see FONTS otherwise')
+    parser.add_argument('--font-size', type=int, default=60)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--corpus', help='read boards saved with --save instead of random ones')
+    parser.add_argument('--save', help='save random boards as a corpus here and exit')
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    rng = random.Random(args.seed)
+
+    font = load_font(args.font, args.font_size)
+    words = [word for word in load_words() if MIN_WORD_LENGTH <= len(word) <= MAX_WORD_LENGTH and word.isalpha()]
+    drawable = {letter for letter in set(''.join(words)) if font.can_draw(letter.upper())}
+    words = [word for word in words if drawable.issuperset(word)]
+    if args.corpus:
+        boards = load_corpus(args.corpus)
+    else:
+        boards = [random_board(words, font, rng) for _ in range(args.boards)]
+    if args.save:
+        save_corpus(args.save, boards)
+        print(f'{len(boards)} boards saved to {args.save}')
+        return 0
+
+    classifier = glyphs.GlyphClassifier()
+    if args.recogniser == 'glyphs':
+        classifier = learn_glyphs([random_board(words, font, rng) for _ in range(args.train)])
+        print(f'{len(classifier)} glyph templates learned from {args.train} boards')
+    results = [read_board(board, classifier) for board in boards]
+    print(report(boards, results))
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""
+Micro-benchmarks of `difflanek.opencv` on synthetic tiles, a tile colour with an
+anti-aliased letter, sized like tiles of phone screenshots, and on a synthetic
+phone screenshot with a board of such tiles (without OCR).
+
+    python -m benchmarks.opencv
+    python -m benchmarks.opencv --sizes 64 128 256 --tiles 50
+"""
+from __future__ import annotations
+
+import argparse
+import random
+import statistics
+import time
+from collections import Counter
+
+import cv2
+import numpy as np
+
+from difflanek import opencv
+
+
+TILE_COLOURS = (opencv.GREEN, opencv.YELLOW, opencv.GREY)
+
+
+def random_tile(size: int, rng: random.Random) -> opencv.Img:
+    colour = rng.choice(TILE_COLOURS).rgb
+    tile = np.full((size, size, 3), (colour.b, colour.g, colour.r), dtype=np.uint8)
+    cv2.putText(
+        tile,
+        rng.choice(opencv.ALL_UPPERCASE[:26]),
+        (size // 4, size * 3 // 4),
+        cv2.FONT_HERSHEY_SIMPLEX,
+        size / 40,
+        (255, 255, 255),
+        max(size // 20, 1),
+        cv2.LINE_AA,
+    )
+    return opencv.Img(image=tile)
+
+
+def random_screenshot(rng: random.Random, height: int = 2400, width: int = 1080, rows: int = 6) -> np.ndarray:
+    """
+    `rows` guesses of five tiles in the middle of an otherwise empty phone screenshot.
+    """
+    background = opencv.BACKGROUND.rgb
+    screenshot = np.full((height, width, 3), (background.b, background.g, background.r), dtype=np.uint8)
+    size = width // 8
+    for row in range(rows):
+        y = height // 4 + row * size * 6 // 5
+        for column in range(5):
+            x = size + column * size * 6 // 5
+            screenshot[y:y + size, x:x + size] = random_tile(size, rng).image
+    return screenshot
+
+
+def counter_most_common_colour(image: opencv.Img) -> opencv.Colour:
+    """
+    The previous implementation, for reference.
+    """
+    pixels = image.image.reshape(-1, 3)
+    pixels = [tuple(p) for p in pixels]
+    counter = Counter(pixels)
+    most_common_color = counter.most_common(1)[0][0]
+    hex_colour = '#{:02x}{:02x}{:02x}'.format(most_common_color[2], most_common_color[1], most_common_color[0])
+    return opencv.Colour(hex_colour)
+
+
+def _per_tile_us(func, tiles: list[opencv.Img]) -> float:
+    timings = []
+    for tile in tiles:
+        start = time.perf_counter()
+        func(tile)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1_000_000
+
+
+def _median_ms(func, repeat: int = 10) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[64, 128, 192])
+    parser.add_argument('--tiles', type=int, default=30)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    rng = random.Random(args.seed)
+
+    print(f'{"most_common_colour":<24}{"Counter us":>12}{"numpy us":>12}{"speedup":>10}')
+    for size in args.sizes:
+        tiles = [random_tile(size, rng) for _ in range(args.tiles)]
+        for tile in tiles:
+            assert tile.most_common_colour() == counter_most_common_colour(tile)
+        reference = _per_tile_us(counter_most_common_colour, tiles)
+        vectorised = _per_tile_us(opencv.Img.most_common_colour, tiles)
+        print(f'{f"{size}x{size} tile":<24}{reference:>12.0f}{vectorised:>12.0f}{reference / vectorised:>9.1f}x')
+
+    _, png = cv2.imencode('.png', random_screenshot(rng))
+    data = png.tobytes()
+    screenshot = opencv.decode(data).image
+    full_tiles = opencv.get_tiles(opencv.Img(image=screenshot))
+    board_tiles = opencv.get_tiles(opencv.locate_board(opencv.Img(image=screenshot)))
+    assert len(full_tiles) == len(board_tiles)
+    # fresh `Img`s, so that no conversions are reused between runs
+    full = _median_ms(lambda: opencv.get_tiles(opencv.Img(image=screenshot)))
+    located = _median_ms(lambda: opencv.get_tiles(opencv.locate_board(opencv.Img(image=screenshot))))
+    print(f'{"get_tiles":<24}{"full ms":>12}{"board ms":>12}{"speedup":>10}')
+    print(f'{"2400x1080 screenshot":<24}{full:>12.1f}{located:>12.1f}{full / located:>9.1f}x')
+    print(f'decoding the png: {_median_ms(lambda: opencv.decode(data)):.1f} ms')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
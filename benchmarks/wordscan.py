@@ -0,0 +1,74 @@
+"""
+Broad diffle/difflanek queries scanned in one process and in a `wordscan.ParallelScan`
+with different chunk sizes, to pick `wordscan.CHUNK_SIZE` and `wordscan.MIN_PARALLEL_ROWS`.
+
+    python -m benchmarks.wordscan
+    python -m benchmarks.wordscan --processes 4 --chunk-sizes 10000 25000 50000 100000
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import logging
+import os
+import statistics
+
+import diffle
+import wordscan
+from benchmarks.diffle import _measure
+from difflanek import difflanek
+
+# guesses which leave most of the dictionary to check
+DIFFLANEK_GUESSES = (['kOt'], ['Ar'], ['(a)'], ['pl', 'E'])
+DIFFLE_GUESSES = ('(a)', '(k)', '(i)(e)', '(ow)')
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--processes', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk-sizes', type=int, nargs='+', default=[10_000, 25_000, 50_000, 100_000])
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    matrix = diffle.DICT.word_matrix
+    matrix.letter_counts
+    rows = matrix.all_rows()
+    checks = []
+    for guesses in DIFFLANEK_GUESSES:
+        is_polish_word = guesses[0] == 'pl'
+        constraints = difflanek.compile_guesses(guesses[is_polish_word:], is_polish_word)
+        checks.append((f'difflanek {" ".join(guesses)}', constraints.filter))
+    parser = diffle.Solver([])
+    for guess in DIFFLE_GUESSES:
+        chunks = parser._parse_guessed_word(guess)
+        regex = ''.join(chunk.to_regex() for chunk in chunks)
+        checks.append((f'diffle {guess}', functools.partial(diffle.filter_rows, chunks, regex)))
+
+    def median_ms(run) -> float:
+        return statistics.median(_measure(run)[1] for _ in range(args.repeat)) * 1000
+
+    print(f'{len(matrix)} words, {args.processes} processes')
+    header = f'{"query":<24}{"1 process":>12}' + ''.join(f'{f"chunk {size}":>14}' for size in args.chunk_sizes)
+    print(header)
+    scans = {}
+    for size in args.chunk_sizes:
+        scans[size] = wordscan.ParallelScan(matrix, args.processes, chunk_size=size, min_rows=0)
+        # start the workers before timing
+        scans[size].filter(checks[0][1], rows)
+    try:
+        for name, check in checks:
+            expected = check(matrix, rows)
+            line = f'{name:<24}{median_ms(lambda: check(matrix, rows)):>10.1f}ms'
+            for size, scan in scans.items():
+                assert (scan.filter(check, rows) == expected).all(), name
+                line += f'{median_ms(lambda: scan.filter(check, rows)):>12.1f}ms'
+            print(line)
+    finally:
+        for scan in scans.values():
+            scan.close()
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
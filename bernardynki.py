@@ -1,11 +1,61 @@
 from __future__ import annotations
 
+import bisect
+import calendar
 import functools
+from datetime import date
 from datetime import datetime
+from datetime import timedelta
+from typing import NamedTuple
 
 import pendulum
 
 
+# gregorian calendar repeats every 400 years, the +1 month +1 day walk every 1600
+CYCLE_YEARS = 1600
+
+
+def _step(d: date) -> date:
+    """
+    Same as pendulum's `add(months=1, days=1)`: day is clamped to the end of the month.
+    """
+    year, month = divmod(d.year * 12 + d.month, 12)
+    month += 1
+    day = min(d.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day) + timedelta(days=1)
+
+
+def _step_back(d: date) -> date:
+    """
+    Same as pendulum's `subtract(months=1, days=1)`.
+    """
+    year, month = divmod(d.year * 12 + d.month - 2, 12)
+    month += 1
+    day = min(d.day, calendar.monthrange(year, month)[1])
+    return date(year, month, day) - timedelta(days=1)
+
+
+def _add_years(d: date, years: int) -> date:
+    # whole cycles only, so 29th of February stays valid
+    assert years % 400 == 0
+    return d.replace(year=d.year + years)
+
+
+@functools.lru_cache(maxsize=None)
+def _cycle(first: date) -> list[int]:
+    """
+    Ordinals of all bernardynki within one cycle starting at `first`.
+    """
+    end = _add_years(first, CYCLE_YEARS)
+    ordinals = []
+    d = first
+    while d < end:
+        ordinals.append(d.toordinal())
+        d = _step(d)
+    assert d == end
+    return ordinals
+
+
 @functools.total_ordering
 class Bernardynki:
     FIRST_WHEN = pendulum.DateTime(2022, 1, 16, tzinfo=pendulum.UTC)
@@ -16,10 +66,11 @@ class Bernardynki:
 
     @property
     def great(self) -> bool:
-        b = self.FIRST_WHEN
-        while b < self.when:
-            b = b.add(years=1, months=1)
-        return (b.year, b.month) == (self.when.year, self.when.month)
+        """
+        Great ones repeat every year and a month, starting at FIRST_WHEN.
+        """
+        months = (self.when.year - self.FIRST_WHEN.year) * 12 + self.when.month - self.FIRST_WHEN.month
+        return months >= 0 and months % 13 == 0 and self.when <= self.FIRST_WHEN.add(months=months)
 
     @property
     def ordinal(self) -> int:
@@ -31,20 +82,7 @@ class Bernardynki:
 
     def __add__(self, other: object) -> Bernardynki:
         if isinstance(other, int):
-            b = self
-            if other > 0:
-                for _ in range(other):
-                    b = Bernardynki(
-                        when=b.when.add(months=1, days=1),
-                        count=b.count + 1,
-                    )
-            else:
-                for _ in range(-other):
-                    b = Bernardynki(
-                        when=b.when.subtract(months=1, days=1),
-                        count=b.count - 1,
-                    )
-            return b
+            return self.from_count(self.count + other)
         else:
             return NotImplemented
 
@@ -55,20 +93,10 @@ class Bernardynki:
             return NotImplemented
 
     def __iadd__(self, other: object) -> Bernardynki:
-        if isinstance(other, int):
-            for _ in range(other):
-                self = self + 1
-            return self
-        else:
-            return NotImplemented
+        return self.__add__(other)
 
     def __isub__(self, other: object) -> Bernardynki:
-        if isinstance(other, int):
-            for _ in range(other):
-                self = self - 1
-            return self
-        else:
-            return NotImplemented
+        return self.__sub__(other)
 
     def __lt__(self, other: object) -> Bernardynki:
         if isinstance(other, datetime):
@@ -92,9 +120,112 @@ class Bernardynki:
             when=cls.FIRST_WHEN,
         )
 
+    @classmethod
+    def from_count(cls, count: int) -> Bernardynki:
+        return Bernardynki(
+            when=cls._when_of(count),
+            count=count,
+        )
+
     @classmethod
     def next_after(cls, dt: pendulum.DateTime) -> Bernardynki:
-        b = cls.first
-        while b <= dt:
-            b += 1
-        return b
+        """
+        First bernardynki on dt's day or later.
+        """
+        return cls.from_count(cls._count_on_or_after(dt.date()))
+
+    @classmethod
+    def _when_of(cls, count: int) -> pendulum.DateTime:
+        first = cls.FIRST_WHEN.date()
+        if count < 1:
+            d = first
+            for _ in range(1 - count):
+                d = _step_back(d)
+        else:
+            cycle = _cycle(first)
+            cycles, i = divmod(count - 1, len(cycle))
+            d = _add_years(date.fromordinal(cycle[i]), cycles * CYCLE_YEARS)
+        return pendulum.datetime(d.year, d.month, d.day, tz=cls.FIRST_WHEN.tz)
+
+    @classmethod
+    def _count_on_or_after(cls, d: date) -> int:
+        first = cls.FIRST_WHEN.date()
+        if d <= first:
+            return 1
+        cycle = _cycle(first)
+        cycles = (d.year - first.year) // CYCLE_YEARS
+        shifted = _add_years(d, -cycles * CYCLE_YEARS)
+        if shifted < first:
+            cycles -= 1
+            shifted = _add_years(shifted, CYCLE_YEARS)
+        return cycles * len(cycle) + bisect.bisect_left(cycle, shifted.toordinal()) + 1
+
+
+class Occurrence(NamedTuple):
+    when: pendulum.DateTime
+    # `Bernardynki.count`
+    number: int
+    ordinal: int
+    year: int
+    great: bool
+
+    @classmethod
+    def from_bernardynki(cls, b: Bernardynki) -> Occurrence:
+        return cls(
+            when=b.when,
+            number=b.count,
+            ordinal=b.ordinal,
+            year=b.year,
+            great=b.great,
+        )
+
+
+class Schedule:
+    """
+    Sorted list of occurrences from FIRST_WHEN on, extended lazily as far as queries reach.
+    Days are compared the same way `Bernardynki.next_after` does, ignoring the time.
+    """
+
+    def __init__(self) -> None:
+        self._occurrences: list[Occurrence] = []
+        self._ordinals: list[int] = []
+
+    def __len__(self) -> int:
+        return len(self._occurrences)
+
+    def next_after(self, dt: datetime) -> Occurrence:
+        """
+        First occurrence on dt's day or later.
+        """
+        self._extend_until(dt)
+        return self._occurrences[bisect.bisect_left(self._ordinals, dt.toordinal())]
+
+    def prev_before(self, dt: datetime) -> Occurrence | None:
+        """
+        Last occurrence strictly before dt's day.
+        """
+        self._extend_until(dt)
+        i = bisect.bisect_left(self._ordinals, dt.toordinal())
+        return self._occurrences[i - 1] if i > 0 else None
+
+    def between(self, start: datetime, end: datetime) -> list[Occurrence]:
+        """
+        Occurrences from start's day to end's day, both inclusive.
+        """
+        self._extend_until(end)
+        lo = bisect.bisect_left(self._ordinals, start.toordinal())
+        hi = bisect.bisect_right(self._ordinals, end.toordinal())
+        return self._occurrences[lo:hi]
+
+    def days_until(self, dt: pendulum.DateTime) -> int:
+        return (self.next_after(dt).when - dt).in_days()
+
+    def _extend_until(self, dt: datetime) -> None:
+        ordinal = dt.toordinal()
+        while not self._ordinals or self._ordinals[-1] < ordinal:
+            occurrence = Occurrence.from_bernardynki(Bernardynki.from_count(len(self._occurrences) + 1))
+            self._occurrences.append(occurrence)
+            self._ordinals.append(occurrence.when.toordinal())
+
+
+SCHEDULE = Schedule()
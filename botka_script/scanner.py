@@ -1,3 +1,4 @@
+import re
 from typing import List
 
 import attr
@@ -7,14 +8,40 @@ from botka_script.tokens import Token
 from botka_script.tokens import TokenType
 
 
-def find_nth(string: str, substring: str, n: int) -> int | None:
-    start = string.find(substring)
-    if start < 0:
-        return None
-    while start >= 0 and n > 1:
-        start = string.find(substring, start+len(substring))
-        n -= 1
-    return start
+ONE_CHAR_TOKENS = {
+    '(': TokenType.LEFT_PAREN,
+    ')': TokenType.RIGHT_PAREN,
+}
+# tokens which are one character long, or two when followed by `=`
+EQUAL_SUFFIX_TOKENS = {
+    '!': (TokenType.BANG, TokenType.BANG_EQUAL),
+    '=': (TokenType.EQUAL, TokenType.EQUAL_EQUAL),
+    '<': (TokenType.LESS, TokenType.LESS_EQUAL),
+    '>': (TokenType.GREATER, TokenType.GREATER_EQUAL),
+}
+WHITESPACE = frozenset(' \r\t\n')
+KEYWORDS = {
+    token_type.value: token_type
+    for token_type in (
+        TokenType.AND,
+        TokenType.CLASS,
+        TokenType.ELSE,
+        TokenType.FALSE,
+        TokenType.DEFUN,
+        TokenType.FOR,
+        TokenType.IF,
+        TokenType.NIL,
+        TokenType.OR,
+        TokenType.PRINT,
+        TokenType.RETURN,
+        TokenType.SUPER,
+        TokenType.THIS,
+        TokenType.TRUE,
+        TokenType.VAR,
+        TokenType.WHILE,
+    )
+}
+SYMBOL_END = re.compile(r'[() \n]')
 
 
 @attr.s(auto_attribs=True, kw_only=True)
@@ -25,17 +52,21 @@ class Scanner:
     start: int = 0
     line: int = 0
     errors: List[str] = attr.Factory(list)
+    # positions of newlines scanned so far, lines and columns of tokens are
+    # taken from them instead of counting newlines of the whole source per token
+    _newlines: List[int] = attr.ib(init=False, factory=list)
+    _start_line: int = attr.ib(init=False, default=0)
+    _start_newline: int = attr.ib(init=False, default=0)
 
     def scan_tokens(self) -> None:
 
         while not self.is_at_end():
             self.start = self.current
+            self._start_line = len(self._newlines)
+            self._start_newline = self._last_newline()
             self._scan_token()
 
-        _end_line = self.source[:self.current].count('\n')
-        _end_column = find_nth(self.source[:self.current], '\n', n=_end_line)
-        if _end_column is None:
-            _end_column = self.current
+        _end_column = self._newlines[-1] if self._newlines else self.current
         self.tokens.append(
             Token.from_type(
                 type=TokenType.EOF,
@@ -49,51 +80,20 @@ class Scanner:
 
     def _scan_token(self) -> None:
         c = self._advance()
-        one_char_tokens = {
-            '(': TokenType.LEFT_PAREN,
-            ')': TokenType.RIGHT_PAREN,
-        }
-        if c in one_char_tokens:
-            self._add_token(one_char_tokens[c])
+        if c in ONE_CHAR_TOKENS:
+            self._add_token(ONE_CHAR_TOKENS[c])
             return None
 
         if c == '.' and not self._peek().isdigit():
             self._add_token(TokenType.DOT)
             return None
 
-        if c == '!':
-            if self._match('='):
-                self._add_token(TokenType.BANG_EQUAL)
-            else:
-                self._add_token(TokenType.BANG)
-            return None
-
-        if c == '=':
-            if self._match('='):
-                self._add_token(TokenType.EQUAL_EQUAL)
-            else:
-                self._add_token(TokenType.EQUAL)
-            return None
-
-        if c == '<':
-            if self._match('='):
-                self._add_token(TokenType.LESS_EQUAL)
-            else:
-                self._add_token(TokenType.LESS)
-            return None
-
-        if c == '>':
-            if self._match('='):
-                self._add_token(TokenType.GREATER_EQUAL)
-            else:
-                self._add_token(TokenType.GREATER)
+        if c in EQUAL_SUFFIX_TOKENS:
+            single, double = EQUAL_SUFFIX_TOKENS[c]
+            self._add_token(double if self._match('=') else single)
             return None
 
-        if c in [' ', '\r', '\t', '\n']:
-            return None
-
-        if c == '\n':
-            self.line += 1
+        if c in WHITESPACE:
             return None
 
         if c == '"':
@@ -112,27 +112,25 @@ class Scanner:
 
     def _advance(self) -> str:
         c = self.source[self.current]
+        if c == '\n':
+            self._newlines.append(self.current)
         self.current += 1
         return c
 
+    def _last_newline(self) -> int:
+        return self._newlines[-1] if self._newlines else 0
+
     def _add_token(self, token_type: TokenType, literal: object = None) -> None:
         text = self.source[self.start:self.current]
-        _start_newline_count = self.source[:self.start].count('\n')
-        _end_newline_count = self.source[:self.current].count('\n')
-
-        _start_newline_index = find_nth(self.source[:self.start], '\n', n=_start_newline_count) or 0
-
-        _end_newline_index = find_nth(self.source[:self.current], '\n', n=_end_newline_count) or 0
-
-        _start_column = self.start - _start_newline_index
-        _end_column = self.current - _end_newline_index - 1
+        _start_column = self.start - self._start_newline
+        _end_column = self.current - self._last_newline() - 1
         self.tokens.append(
             Token.from_type(
                 type=token_type,
                 lexeme=text,
                 literal=literal,
-                start_line=_start_newline_count,
-                end_line=_end_newline_count,
+                start_line=self._start_line,
+                end_line=len(self._newlines),
                 start_column=_start_column,
                 end_column=_end_column,
             ),
@@ -153,10 +151,15 @@ class Scanner:
         return self.source[self.current]
 
     def _scan_string(self) -> None:
-        while self._peek() != '"' and not self.is_at_end():
-            if self._peek() == '\n':
-                self.line += 1
-            self._advance()
+        end = self.source.find('"', self.current)
+        if end < 0:
+            end = len(self.source)
+        newline = self.source.find('\n', self.current, end)
+        while newline >= 0:
+            self.line += 1
+            self._newlines.append(newline)
+            newline = self.source.find('\n', newline + 1, end)
+        self.current = end
 
         if self.is_at_end():
             self.errors.append('Unterminated string')
@@ -189,36 +192,11 @@ class Scanner:
         return self.source[self.current + 1]
 
     def _scan_symbol(self) -> None:
-        special_characters = '() \n'
-        while True:
-            if self.is_at_end():
-                break
-            char = self._peek()
-            if char not in special_characters:
-                self._advance()
-            else:
-                break
+        end = SYMBOL_END.search(self.source, self.current)
+        self.current = end.start() if end is not None else len(self.source)
 
         value = self.source[self.start:self.current]
-        keywords = {
-            TokenType.AND.value: TokenType.AND,
-            TokenType.CLASS.value: TokenType.CLASS,
-            TokenType.ELSE.value: TokenType.ELSE,
-            TokenType.FALSE.value: TokenType.FALSE,
-            TokenType.DEFUN.value: TokenType.DEFUN,
-            TokenType.FOR.value: TokenType.FOR,
-            TokenType.IF.value: TokenType.IF,
-            TokenType.NIL.value: TokenType.NIL,
-            TokenType.OR.value: TokenType.OR,
-            TokenType.PRINT.value: TokenType.PRINT,
-            TokenType.RETURN.value: TokenType.RETURN,
-            TokenType.SUPER.value: TokenType.SUPER,
-            TokenType.THIS.value: TokenType.THIS,
-            TokenType.TRUE.value: TokenType.TRUE,
-            TokenType.VAR.value: TokenType.VAR,
-            TokenType.WHILE.value: TokenType.WHILE,
-        }
-        token_type = keywords.get(value)
+        token_type = KEYWORDS.get(value)
         if token_type is None:
             if value.startswith("'"):
                 token_type = TokenType.SYMBOL
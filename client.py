@@ -2,7 +2,6 @@ import asyncio
 import re
 
 import discord
-import pendulum
 
 import monkeypatch
 import settings
@@ -19,7 +18,8 @@ from exceptions import CommandNotFound
 from getenv import getenv
 from logger import get_logger
 from message_context import MessageContext
-from utils import next_call_timestamp
+from reactions import ReactionCounter
+from scheduler import Scheduler
 from utils import remove_prefix
 
 
@@ -93,20 +93,23 @@ class MsgCtx:
 
 
 class Client(discord.Client):
-    def __init__(self, prefix: str = settings.PREFIX) -> None:
+    def __init__(self, prefix: str = settings.PREFIX, run_background_jobs: bool = True, **options) -> None:
         intents = discord.Intents.default()
         intents.message_content = True
-        super().__init__(intents=intents)
+        super().__init__(intents=intents, **options)
 
         self.prefix = prefix
+        self.run_background_jobs = run_background_jobs
         self.scheduled_commands = [
             #daily_inspiration,
             next_bernardynki,
         ]
+        self.job_scheduler = Scheduler(self.scheduled_commands)
         self.markov_blacklisted_channel_ids = [
             int(id)
             for id in getenv('MARKOV_CHANNEL_BLACKLIST').split(';')
         ]
+        self.reactions = ReactionCounter(fetch=self._fetch_message)
 
     async def on_ready(self) -> None:
         logger.info('Logged on as %s', self.user)
@@ -116,6 +119,8 @@ class Client(discord.Client):
                 self.get_channel(blacklisted_channel_id),
             )
 
+        if not self.run_background_jobs:
+            return None
         await asyncio.gather(
             *[
                 self.scheduler(),
@@ -128,17 +133,42 @@ class Client(discord.Client):
             await self.on_message(after)
 
     async def on_raw_reaction_add(self, payload: discord.RawReactionActionEvent) -> None:
-        message = await self.get_channel(payload.channel_id).fetch_message(payload.message_id)
-        message_reaction = [
-            r for r in message.reactions
-            if (payload.emoji.is_custom_emoji() and payload.emoji == r.emoji)
-            or (not payload.emoji.is_custom_emoji() and payload.emoji.name == r.emoji)
-        ][0]
-        if message_reaction.me:
+        is_me = payload.user_id == self.user.id
+        message = self._connection._get_message(payload.message_id)
+        if message is not None:
+            self.reactions.seed(message)
+            message_reaction = self.reactions.get(payload.message_id, payload.emoji)
+        else:
+            message_reaction = self.reactions.add(payload.message_id, payload.emoji, me=is_me)
+            if message_reaction is None:
+                if is_me:
+                    return None
+                message_reaction = await self.reactions.resolve(payload.channel_id, payload.message_id, payload.emoji)
+        if message_reaction.me or is_me:
             return None
         logger.debug('somebody reacted: %s reaction_count: %s', payload.emoji, message_reaction.count)
         if message_reaction.count >= 3:
-            await message.add_reaction(payload.emoji)
+            await self.get_partial_messageable(payload.channel_id).get_partial_message(payload.message_id).add_reaction(
+                payload.emoji,
+            )
+            # not before, so that a failed attempt is retried on the next reaction
+            message_reaction.me = True
+
+    async def on_raw_reaction_remove(self, payload: discord.RawReactionActionEvent) -> None:
+        message = self._connection._get_message(payload.message_id)
+        if message is not None:
+            self.reactions.seed(message)
+        else:
+            self.reactions.remove(payload.message_id, payload.emoji, me=payload.user_id == self.user.id)
+
+    async def on_raw_reaction_clear(self, payload: discord.RawReactionClearEvent) -> None:
+        self.reactions.clear(payload.message_id)
+
+    async def on_raw_reaction_clear_emoji(self, payload: discord.RawReactionClearEmojiEvent) -> None:
+        self.reactions.clear(payload.message_id, payload.emoji)
+
+    async def _fetch_message(self, channel_id: int, message_id: int) -> discord.Message:
+        return await self.get_channel(channel_id).fetch_message(message_id)
 
     async def on_message(self, message: discord.Message) -> None:
         logger.debug('[%s > %s] %s: %s', message.guild.name, message.channel.name, message.author, message.content)
@@ -187,27 +217,26 @@ class Client(discord.Client):
             return await message.channel.send(str(e))
 
     async def scheduler(self) -> None:
-        now = pendulum.now(pendulum.UTC)
-        when_should_be_called = {
-            command: next_call_timestamp(now, command.scheduled_at, command.scheduled_every)
-            for command in self.scheduled_commands
-        }
-        while True:
-            try:
-                now = pendulum.now(pendulum.UTC)
-                for command in self.scheduled_commands:
-                    is_the_high_time = when_should_be_called[command] < now
-                    is_condition_fulfilled = command.condition is None or command.condition(now)
-                    # lambda dt: (Bernardynki.next_after(dt).when - dt).in_days()
-                    if is_the_high_time and is_condition_fulfilled:
-                        when_should_be_called[command] = when_should_be_called[command] + command.scheduled_every
-                        await asyncio.create_task(command(context=None, client=self))
-                await asyncio.sleep(0.5)
-            except Exception as e:
-                logger.exception(e)
+        await self.job_scheduler.run(client=self)
 
     def _build_message_context(self, message: discord.Message) -> MsgCtx:
         return MsgCtx(
             client=self,
             message=message,
         )
+
+
+class ShardedClient(Client, discord.AutoShardedClient):
+    """
+    Client running a group of shards, see `sharding.launch`.
+    Only the group with shard 0 runs the scheduler and random markov messages,
+    they post through partial channels, as the target guild may be on another shard.
+    """
+
+    def __init__(self, shard_ids: list[int], shard_count: int, **options) -> None:
+        super().__init__(
+            shard_ids=shard_ids,
+            shard_count=shard_count,
+            run_background_jobs=0 in shard_ids,
+            **options,
+        )
@@ -2,14 +2,18 @@ from __future__ import annotations
 
 import asyncio
 import io
+import multiprocessing
 import random
 import textwrap
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
 from functools import wraps
 from typing import Awaitable
 from typing import Callable
 from typing import Generator
 from typing import Optional
 from typing import Protocol
+from typing import TypeVar
 
 import discord
 import pandas as pd
@@ -23,7 +27,10 @@ from sqlalchemy import select
 from sqlalchemy import update
 
 import diffle
+import ocrcache
+import ocrpool
 from bernardynki import Bernardynki
+from bernardynki import SCHEDULE as BERNARDYNKI_SCHEDULE
 from botka_script.utils import interpret_source
 from carrotson import CONTEXT_SIZE
 from command import Command
@@ -35,6 +42,7 @@ from difflanek import opencv
 from exceptions import CommandNotFound
 from exceptions import DiscordMessageMissingException
 from getenv import getenv
+from ingestion import ingest
 from logger import get_logger
 from message_context import MessageContext
 from models import Carrot
@@ -44,14 +52,22 @@ from models import Markov3
 from models import VariableModel
 from settings import COMMON_PREFIXES
 from settings import DEFAULT_PREFIX
+from settings import DIFFLE_BEST_PROCESSES
+from settings import DIFFLE_BEST_TIME_BUDGET
+from settings import DIFFLE_SESSION_TTL
 from settings import DISCORD_MESSAGE_LIMIT
 from settings import MARKOV_MIN_WORD_COUNT
+from settings import OCR_MAX_QUEUED
+from settings import OCR_PROCESSES
+from settings import OCR_TIMEOUT
 from settings import RANDOM_MARKOV_MESSAGE_CHANCE
 from settings import RANDOM_MARKOV_MESSAGE_COUNT
+from settings import RANDOM_MARKOV_MESSAGE_INTERVAL
+from settings import WORD_SCAN_PROCESSES
 from utils import Buf
 from utils import format_fraction
 from utils import get_markov_weights
-from utils import markovify
+from utils import rolls_until_triggered
 from utils import shuffle_str
 from utils import triggered_chance
 
@@ -62,9 +78,16 @@ class CommandFunc(Protocol):
 
 logger = get_logger(__name__)
 
+T = TypeVar('T')
+
 COMMANDS = {}
 HIDDEN_COMMANDS = {}
 SPECIAL_COMMANDS = {}
+VARIABLE_EVENTS: dict[str, asyncio.Event] = {}
+DIFFLE_SESSIONS = diffle.SolverSessions(diffle.load_dict, ttl=DIFFLE_SESSION_TTL, processes=WORD_SCAN_PROCESSES)
+_diffle_executor: ProcessPoolExecutor | None = None
+OCR_CACHE = ocrcache.OcrCache()
+OCR_POOL = ocrpool.OcrPool(processes=OCR_PROCESSES, max_queued=OCR_MAX_QUEUED, timeout=OCR_TIMEOUT)
 
 
 def parse_pipe(message: str, prefix: str = DEFAULT_PREFIX) -> list[Command]:
@@ -133,6 +156,29 @@ def get_custom_command(cmd_name: str) -> list[Command] | None:
     return parse_pipe(command.command, prefix=DEFAULT_PREFIX)
 
 
+def get_variable(name: str, *, as_: Callable[[str], T], default: T) -> T:
+    with get_db() as db:
+        variable = db.execute(
+            select(VariableModel)
+            .where(VariableModel.name == name),
+        ).scalar_one_or_none()
+    if variable is None:
+        return default
+    try:
+        return as_(variable.value)
+    except ValueError:
+        return default
+
+
+def variable_changed(name: str) -> asyncio.Event:
+    """
+    Event set whenever `!set` changes the variable, for loops which cache its value.
+    """
+    if name not in VARIABLE_EVENTS:
+        VARIABLE_EVENTS[name] = asyncio.Event()
+    return VARIABLE_EVENTS[name]
+
+
 def get_command(cmd_name: str) -> CommandFunc | CommandModel | None:
     cmd = get_builtin_command(cmd_name)
     if cmd is None:
@@ -241,7 +287,7 @@ async def markov2(context: MessageContext, client: discord.Client) -> MessageCon
     if len(parts) < 2:
         return context
 
-    markovify(
+    ingest(
         text=context.message.content,
         channel_id=context.message.channel.id,
         guild_id=context.message.guild.id,
@@ -256,7 +302,7 @@ async def markov3(context: MessageContext, client: discord.Client) -> MessageCon
     if len(parts) < 3:
         return context
 
-    markovify(
+    ingest(
         text=context.message.content,
         channel_id=context.message.channel.id,
         guild_id=context.message.guild.id,
@@ -266,7 +312,7 @@ async def markov3(context: MessageContext, client: discord.Client) -> MessageCon
 
 
 async def carrot(context: MessageContext, client: discord.Client) -> MessageContext:
-    markovify(
+    ingest(
         text=context.message.content,
         channel_id=context.message.channel.id,
         guild_id=context.message.guild.id,
@@ -283,7 +329,7 @@ async def inspire(context: MessageContext, client: discord.Client) -> MessageCon
     with io.BytesIO() as image_binary:
         image.save(image_binary, 'PNG')
         image_binary.seek(0)
-        channel = client.get_channel(getenv('INSPIRATIONAL_MESSAGE_CHANNEL_ID', as_=int))
+        channel = client.get_partial_messageable(getenv('INSPIRATIONAL_MESSAGE_CHANNEL_ID', as_=int))
         await channel.send(
             file=discord.File(fp=image_binary, filename='daily_inspiration.png'),
         )
@@ -293,7 +339,7 @@ async def inspire(context: MessageContext, client: discord.Client) -> MessageCon
 @daily(at='8:00')
 @command(name='daily_inspiration', hidden=True)
 async def daily_inspiration(context: MessageContext, client: discord.Client) -> MessageContext:
-    channel = client.get_channel(getenv('INSPIRATIONAL_MESSAGE_CHANNEL_ID', as_=int))
+    channel = client.get_partial_messageable(getenv('INSPIRATIONAL_MESSAGE_CHANNEL_ID', as_=int))
     await channel.send('Miłego dnia i smacznej kawusi <3')
     await inspire(context=context, client=client)  # type: ignore
     return context
@@ -561,6 +607,7 @@ async def set_variable(context: MessageContext, client: discord.Client) -> Messa
                     ),
                 )
                 db.commit()
+        variable_changed(var_name).set()
         return context.updated(result=f'Variable `{var_name}` set to {var_value}')
 
     except Exception as e:
@@ -568,42 +615,42 @@ async def set_variable(context: MessageContext, client: discord.Client) -> Messa
 
 
 async def generate_markov_at_random_time(context: MessageContext, client: discord.Client) -> None:
+    """
+    Every RANDOM_MARKOV_MESSAGE_INTERVAL seconds there is RANDOM_MARKOV_CHANCE of posting.
+    Instead of rolling the dice each interval the number of rolls until the next post
+    is sampled upfront, and resampled only when `!set RANDOM_MARKOV_CHANCE` changes it.
+    """
+    chance_changed = variable_changed('RANDOM_MARKOV_CHANCE')
     while True:
-        await asyncio.sleep(1 * 60)
-        with get_db() as db:
-            random_markov_chance = db.execute(
-                select(VariableModel)
-                .where(VariableModel.name == 'RANDOM_MARKOV_CHANCE'),
-            ).scalar_one_or_none()
-            if random_markov_chance is None:
-                random_markov_chance = RANDOM_MARKOV_MESSAGE_CHANCE
-            else:
-                try:
-                    random_markov_chance = float(random_markov_chance.value)
-                except ValueError:
-                    random_markov_chance = RANDOM_MARKOV_MESSAGE_CHANCE
-            if triggered_chance(random_markov_chance):
-                random_markov_message_count = db.execute(
-                    select(VariableModel)
-                    .where(VariableModel.name == 'RANDOM_MARKOV_MESSAGE_COUNT'),
-                ).scalar_one_or_none()
-                if random_markov_message_count is None:
-                    random_markov_message_count = RANDOM_MARKOV_MESSAGE_COUNT
-                else:
-                    try:
-                        random_markov_message_count = int(random_markov_message_count.value)
-                    except ValueError:
-                        random_markov_message_count = RANDOM_MARKOV_MESSAGE_CHANCE
-                for _ in range(random_markov_message_count):
-                    markov_message = await generate_markov2(context=MessageContext.empty(), client=client)
-                    if triggered_chance(0.5):
-                        markov_message = await scream(markov_message, client=client)
-                    await client.get_channel(
-                        getenv('RANDOM_MARKOV_MESSAGE_CHANNEL_ID', as_=int),
-                    ).send(markov_message.result)
-
-
-@run_every(days=1, condition=lambda dt: (Bernardynki.next_after(dt).when - dt).in_days() in (7, 3, 1, 0))
+        chance_changed.clear()
+        random_markov_chance = get_variable('RANDOM_MARKOV_CHANCE', as_=float, default=RANDOM_MARKOV_MESSAGE_CHANCE)
+        rolls = rolls_until_triggered(random_markov_chance)
+        logger.debug('next random markov message in %s rolls', rolls)
+        try:
+            await asyncio.wait_for(
+                chance_changed.wait(),
+                timeout=None if rolls is None else rolls * RANDOM_MARKOV_MESSAGE_INTERVAL,
+            )
+        except asyncio.TimeoutError:
+            pass
+        else:
+            continue
+
+        random_markov_message_count = get_variable(
+            'RANDOM_MARKOV_MESSAGE_COUNT',
+            as_=int,
+            default=RANDOM_MARKOV_MESSAGE_COUNT,
+        )
+        for _ in range(random_markov_message_count):
+            markov_message = await generate_markov2(context=MessageContext.empty(), client=client)
+            if triggered_chance(0.5):
+                markov_message = await scream(markov_message, client=client)
+            await client.get_partial_messageable(
+                getenv('RANDOM_MARKOV_MESSAGE_CHANNEL_ID', as_=int),
+            ).send(markov_message.result)
+
+
+@run_every(days=1, condition=lambda dt: BERNARDYNKI_SCHEDULE.days_until(dt) in (7, 3, 1, 0))
 @command(name='next_bernardynki', special=True)
 async def next_bernardynki(context: MessageContext, client: discord.Client) -> MessageContext:
     now = pendulum.now(pendulum.UTC)
@@ -615,9 +662,7 @@ async def next_bernardynki(context: MessageContext, client: discord.Client) -> M
         5: 'piątego',
     }
 
-    next_bernardynki = Bernardynki.first
-    while next_bernardynki < now:
-        next_bernardynki += 1
+    next_bernardynki = Bernardynki.next_after(now)
 
     sign = '+'
     offset = context.command.raw_args.strip()
@@ -643,13 +688,57 @@ async def next_bernardynki(context: MessageContext, client: discord.Client) -> M
         days_fmt = f'za {days} dni'
     msg = f'{next_bernardynki.ordinal}. bernardynki roku {year_in_words} {days_fmt} ({date_fmt})'
     if context is None:
-        await client.get_channel(
+        await client.get_partial_messageable(
             getenv('RANDOM_MARKOV_MESSAGE_CHANNEL_ID', as_=int),
         ).send(msg)
     else:
         return context.updated(result=msg)
 
 
+@command(name='bernardynki_list')
+async def bernardynki_list(context: MessageContext, client: discord.Client) -> MessageContext:
+    now = pendulum.now(pendulum.UTC)
+    year = now.year
+    great_only = False
+    for arg in context.command.args:
+        if arg == 'great':
+            great_only = True
+            continue
+        try:
+            year = int(arg)
+        except ValueError:
+            return context.updated(result=f'Usage: `{client.prefix}bernardynki_list [great] [<year>]`')
+    if not Bernardynki.FIRST_WHEN.year <= year <= now.year + 100:
+        return context.updated(result=f'Rok musi być pomiędzy {Bernardynki.FIRST_WHEN.year} a {now.year + 100}')
+
+    occurrences = BERNARDYNKI_SCHEDULE.between(
+        pendulum.datetime(year, 1, 1, tz=pendulum.UTC),
+        pendulum.datetime(year, 12, 31, tz=pendulum.UTC),
+    )
+    lines = [
+        '{ordinal:>2}. roku {year} {when} {great}'.format(
+            ordinal=occurrence.ordinal,
+            year=occurrence.year,
+            when=occurrence.when.format('dddd DD.MM.YYYY', locale='pl'),
+            great='GREAT' if occurrence.great else '',
+        ).rstrip()
+        for occurrence in occurrences
+        if occurrence.great or not great_only
+    ]
+    if not lines:
+        return context.updated(result=f'brak bernardynek w {year}')
+    return context.updated(result='```\n{}\n```'.format('\n'.join(lines)))
+
+
+@command(name='schedule')
+async def schedule(context: MessageContext, client: discord.Client) -> MessageContext:
+    fire_times = client.job_scheduler.next_fire_times()
+    if not fire_times:
+        return context.updated(result='nothing scheduled')
+    lines = [f'{name}: {when.format("YYYY-MM-DD HH:mm")} UTC' for name, when in fire_times]
+    return context.updated(result='```\n{}\n```'.format('\n'.join(lines)))
+
+
 @command(name='suggest')
 async def suggest(context: MessageContext, client: discord.Client) -> MessageContext:
     await context.message.add_reaction('⬆️')
@@ -701,8 +790,12 @@ async def yywrap(context: MessageContext, client: discord.Client) -> MessageCont
 
 @command(name='dfl')
 async def dfl(context: MessageContext, client: discord.Client) -> MessageContext:
-    _help = """\
+    _help = f"""\
 ```
+{client.prefix}dfl <słowo> [słowo...] - kolejne zgadywania zawężają poprzednie wyniki
+{client.prefix}dfl_best - co wpisać dalej
+{client.prefix}dfl_reset - nowa gra
+
 jak wpisywać słowa:
    szary - x
    żółty - X
@@ -714,9 +807,9 @@ jak wpisywać słowa:
     """
     if len(context.command.args) == 0:
         return context.updated(result=_help)
-    guess = context.command.args[0]
-    solver = diffle.Solver(diffle.DICT)
-    solver.guess(guess)
+    solver = DIFFLE_SESSIONS.get((context.message.author.id, context.message.channel.id))
+    for guess in context.command.args:
+        solver.guess(guess)
     try:
         matches = solver.get_matches()
     except diffle.InvalidSyntaxException as e:
@@ -724,11 +817,67 @@ jak wpisywać słowa:
     df = pd.DataFrame(matches, columns=['match'])
     df.index += 1
     df_str = df.to_string(header=False, max_rows=10)
+    guesses_str = f'({len(solver.guesses)} guesses, {client.prefix}dfl_reset to start over)'
     if len(df.index) == 0:
-        return context.updated(result='0 matches')
+        return context.updated(result=f'0 matches {guesses_str}')
     else:
         match_str = '1 match' if len(df.index) == 1 else f'{len(df.index)} matches'
-        return context.updated(result=f'{match_str}\n```\n{df_str}\n```')
+        return context.updated(result=f'{match_str} {guesses_str}\n```\n{df_str}\n```')
+
+
+def get_diffle_executor() -> ProcessPoolExecutor:
+    global _diffle_executor
+    if _diffle_executor is None:
+        _diffle_executor = ProcessPoolExecutor(
+            max_workers=DIFFLE_BEST_PROCESSES,
+            mp_context=multiprocessing.get_context('spawn'),
+        )
+    return _diffle_executor
+
+
+@command(name='dfl_best')
+async def dfl_best(context: MessageContext, client: discord.Client) -> MessageContext:
+    solver = DIFFLE_SESSIONS.get((context.message.author.id, context.message.channel.id))
+    candidates = solver.get_matches()
+    if len(candidates) == 0:
+        return context.updated(result=f'0 matches, {client.prefix}dfl_reset to start over')
+    if len(candidates) <= 2:
+        return context.updated(result=f'just guess: {", ".join(candidates)}')
+    ranked, complete = await asyncio.get_running_loop().run_in_executor(
+        None,
+        partial(
+            diffle.best_guesses,
+            candidates,
+            budget=DIFFLE_BEST_TIME_BUDGET,
+            executor=get_diffle_executor(),
+            workers=DIFFLE_BEST_PROCESSES,
+        ),
+    )
+    lines = [
+        f'{i}. {guess.word} {guess.entropy:.2f} bits'
+        for i, guess in enumerate(ranked, start=1)
+    ]
+    summary = f'best of {len(candidates)} matches'
+    if not complete:
+        summary += ' (ran out of time, best so far)'
+    return context.updated(result=summary + '\n```\n' + '\n'.join(lines) + '\n```')
+
+
+@command(name='dfl_reset')
+async def dfl_reset(context: MessageContext, client: discord.Client) -> MessageContext:
+    if DIFFLE_SESSIONS.reset((context.message.author.id, context.message.channel.id)):
+        return context.updated(result='dfl reset')
+    return context.updated(result='nothing to reset')
+
+
+@command(name='solver_cache')
+async def solver_cache(context: MessageContext, client: discord.Client) -> MessageContext:
+    difflanek_stats = difflanek.result_stats()
+    return context.updated(result='\n'.join([
+        f'dfl: {diffle.load_dict().results.stats()}',
+        f'difflanek: {difflanek_stats if difflanek_stats is not None else "dictionary not loaded"}',
+    ]))
+
 
 @command(name='difflanek')
 async def _difflanek(context: MessageContext, client: discord.Client) -> MessageContext:
@@ -738,7 +887,8 @@ async def _difflanek(context: MessageContext, client: discord.Client) -> Message
         is_polish_word = params[0] == 'pl'
         words = params[int(is_polish_word):]
 
-        result_all = sorted(filter(lambda x: len(x) >= 3, difflanek.find_solution(words, is_polish_word)))
+        solution = difflanek.find_solution(words, is_polish_word, processes=WORD_SCAN_PROCESSES)
+        result_all = sorted(filter(lambda x: len(x) >= 3, solution))
         n = 50
         if len(result_all) > n:
             result = sorted(set(random.sample(result_all, n)))
@@ -799,16 +949,36 @@ async def _dflocr(context: MessageContext, client: discord.Client) -> MessageCon
         ct = attachment.content_type
         if ct and ct.startswith('image'):
             logger.debug('Found image with type: %s', ct)
+            dfl = OCR_CACHE.by_attachment(attachment.id)
+            if dfl is not None:
+                return context.updated(result=' '.join(dfl))
             image = await attachment.read()
+            image_digest = ocrcache.digest(image)
             try:
-                dfl = opencv.get_difflanek(image)
+                dfl = OCR_CACHE.by_digest(image_digest)
+                if dfl is None:
+                    dfl = await OCR_POOL.run(opencv.get_difflanek, image)
+                    OCR_CACHE.put(image_digest, dfl, attachment_id=attachment.id)
+                else:
+                    OCR_CACHE.link(image_digest, dfl, attachment.id)
+            except opencv.UnreadableImage:
+                return context.updated(result='could not decode the image')
             except opencv.DifflanekException:
                 return context.updated(result='no rectangles found')
+            except ocrpool.PoolSaturated:
+                return context.updated(result='too many images to read right now, try again in a minute')
+            except asyncio.TimeoutError:
+                return context.updated(result=f'could not read the image in {OCR_TIMEOUT}s')
             else:
                 return context.updated(result=' '.join(dfl))
     return context.updated(result='no images found')
 
 
+@command(name='dflocr_stats')
+async def dflocr_stats(context: MessageContext, client: discord.Client) -> MessageContext:
+    return context.updated(result=f'dflocr: {OCR_POOL.stats()}\ncache: {OCR_CACHE.stats()}')
+
+
 @command(name='przeczytaj')
 async def _read_attachment(context: MessageContext, client: discord.Client) -> MessageContext:
     if context.message.reference is None:
@@ -826,7 +996,7 @@ async def _read_attachment(context: MessageContext, client: discord.Client) -> M
         nothing_to_read = False
         text_bytes = await attachment.read()
         text = text_bytes.decode('utf8')
-        markovify(
+        ingest(
             text=text,
             channel_id=context.message.channel.id,
             guild_id=context.message.guild.id,
@@ -2,7 +2,9 @@ import contextlib
 from typing import Generator
 
 from sqlalchemy import create_engine
+from sqlalchemy import event
 from sqlalchemy import MetaData
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
 from sqlalchemy.orm.session import Session
@@ -20,10 +22,24 @@ Base = declarative_base(
         },
     ),
 )
-engine = create_engine(DB_URI, pool_recycle=3600)
+IS_SQLITE = make_url(DB_URI).get_backend_name() == 'sqlite'
+engine = create_engine(DB_URI, pool_recycle=3600, connect_args={'timeout': 30} if IS_SQLITE else {})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 
+def _enable_wal(dbapi_connection, connection_record) -> None:
+    """
+    Shard processes read while the ingestion writer writes, see sharding.launch.
+    """
+    cursor = dbapi_connection.cursor()
+    cursor.execute('PRAGMA journal_mode=WAL')
+    cursor.close()
+
+
+if IS_SQLITE:
+    event.listen(engine, 'connect', _enable_wal)
+
+
 @contextlib.contextmanager
 def get_db() -> Generator[Session, None, None]:
     db = SessionLocal()
@@ -1,11 +1,170 @@
+from __future__ import annotations
+
 import os
 import re
+import threading
 from collections import Counter
+from typing import Generator
+from typing import NamedTuple
+from typing import Sequence
 
 import numpy as np
 
+import wordscan
+from logger import get_logger
+from resultcache import CacheStats
+from resultcache import ResultCache
+from wordmatrix import WordMatrix
+
+
+logger = get_logger(__name__)
+
 DICT_FILE = 'pl_PL.dic'
+DICT_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), DICT_FILE)
 DICT_ENCODING = 'iso-8859-2'
+POLISH = 'ąćęłńóśźż'
+
+
+def _is_in_class(letter: str, char_class: str) -> bool:
+    return re.fullmatch(f'[{char_class}]', letter) is not None
+
+
+def _is_plain(text: str) -> bool:
+    # no regex syntax, neither in a pattern nor inside [^...]
+    return re.escape(text) == text
+
+
+class LetterCount(NamedTuple):
+    """
+    `letter` occurs at least `times` times, exactly `times` times if `exact`.
+    """
+    letter: str
+    times: int
+    exact: bool
+
+    def check(self, matrix: WordMatrix, rows: np.ndarray) -> np.ndarray:
+        occurrences = matrix.count(self.letter, rows)
+        if self.exact:
+            return occurrences == self.times
+        return occurrences >= self.times
+
+
+class ForbiddenLetters(NamedTuple):
+    """
+    Letters of `char_class` (regex [...] syntax) other than `allowed` may not occur anywhere.
+    """
+    char_class: str
+    allowed: str = ''
+
+    def letters(self, matrix: WordMatrix) -> str:
+        return matrix.letters_where(lambda letter: letter not in self.allowed and _is_in_class(letter, self.char_class))
+
+
+class Literal(NamedTuple):
+    text: str
+
+
+class Gap(NamedTuple):
+    """
+    `min` or more letters (exactly one if `max` is 1), none of them in the template's class or in `extra`.
+    """
+    extra: str
+    min: int
+    max: int | None
+
+
+class Template(NamedTuple):
+    """
+    Green letters in order, with the gaps between them, as one `(?=^...$)` regex and as `elements`.
+    `elements` is None when the guess contains regex syntax, then only `regex` can be used.
+    """
+    regex: str
+    char_class: str
+    elements: tuple[Literal | Gap, ...] | None
+
+    @property
+    def min_length(self) -> int:
+        if self.elements is None:
+            return 0
+        return sum(len(e.text) if isinstance(e, Literal) else e.min for e in self.elements)
+
+    def forbidden(self) -> ForbiddenLetters:
+        # every letter is matched either by a gap or by a literal
+        assert self.elements is not None
+        literals = ''.join(e.text for e in self.elements if isinstance(e, Literal))
+        return ForbiddenLetters(self.char_class, literals)
+
+    def match(self, matrix: WordMatrix, rows: np.ndarray) -> np.ndarray:
+        """
+        `re.match(self.regex)` for all rows at once, by tracking which positions
+        of each word can be reached after every element.
+        """
+        assert self.elements is not None
+        width = matrix.width
+        lengths = matrix.lengths[rows]
+        # small integers keep the running maxima below cheap
+        positions = np.arange(width + 1, dtype=np.int8 if width < 127 else np.int32)
+        reachable = np.zeros((len(rows), width + 1), dtype=bool)
+        reachable[:, 0] = True
+        for element in self.elements:
+            if isinstance(element, Literal):
+                size = len(element.text)
+                hits = matrix.occurrences(element.text, rows)
+                following = np.zeros_like(reachable)
+                following[:, size:size + hits.shape[1]] = reachable[:, :hits.shape[1]] & hits
+                reachable = following
+                continue
+
+            # positions past the end of a word are never allowed
+            blocked = matrix.holds(self._gap_letters(matrix, element), rows) | (positions[:-1] >= lengths[:, None])
+            if element.max == 1:
+                following = np.zeros_like(reachable)
+                following[:, 1:] = reachable[:, :-1] & ~blocked
+                reachable = following
+                continue
+            # the gap ending at k can start at any reachable j <= k - min with no blocked letter in [j, k)
+            last_blocked = np.full(reachable.shape, -1, dtype=positions.dtype)
+            blocked_at = np.where(blocked, positions[:-1], positions.dtype.type(-1))
+            last_blocked[:, 1:] = np.maximum.accumulate(blocked_at, axis=1)
+            last_reachable = np.maximum.accumulate(np.where(reachable, positions, positions.dtype.type(-1)), axis=1)
+            following = np.zeros_like(reachable)
+            following[:, element.min:] = last_reachable[:, :width + 1 - element.min] > last_blocked[:, element.min:]
+            reachable = following
+        return reachable[np.arange(len(rows)), lengths]
+
+    def _gap_letters(self, matrix: WordMatrix, gap: Gap) -> str:
+        return matrix.letters_where(lambda letter: letter in gap.extra or _is_in_class(letter, self.char_class))
+
+
+class Constraints(NamedTuple):
+    """
+    Compiled `find_solution` guesses, checked from the cheapest to the most expensive.
+    """
+    min_length: int
+    forbidden: tuple[ForbiddenLetters, ...]
+    required: str
+    letter_counts: tuple[LetterCount, ...]
+    templates: tuple[Template, ...]
+
+    def filter(self, matrix: WordMatrix, rows: np.ndarray) -> np.ndarray:
+        rows = rows[matrix.lengths[rows] >= self.min_length]
+        forbidden = ''.join(constraint.letters(matrix) for constraint in self.forbidden)
+        if forbidden:
+            rows = rows[matrix.count(forbidden, rows) == 0]
+        if self.required:
+            rows = rows[matrix.count(self.required, rows) > 0]
+        for letter_count in self.letter_counts:
+            rows = rows[letter_count.check(matrix, rows)]
+        for template in sorted(self.templates, key=lambda template: template.elements is None):
+            if not len(rows):
+                break
+            if template.elements is not None:
+                rows = rows[template.match(matrix, rows)]
+            else:
+                pattern = re.compile(template.regex)
+                rows = rows[np.array([bool(pattern.match(word)) for word in matrix.take(rows)], dtype=bool)]
+        return rows
+
 
 def get_help() -> str:
     return """\
@@ -21,8 +180,7 @@ jak wpisywać słowa:
 """
 
 
-def _load_dict() -> np.ndarray:
-    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), DICT_FILE)
+def _load_dict(path: str = DICT_PATH) -> np.ndarray:
     with open(path, encoding=DICT_ENCODING) as file:
         length = int(file.readline()) + 9
         dictionary = np.empty(length, dtype=object)
@@ -31,18 +189,96 @@ def _load_dict() -> np.ndarray:
     return dictionary
 
 
-def find_solution(words: list[str], is_polish_word: bool) -> list[str]:
-    dictionary = _load_dict()
+class Dictionary:
+    """
+    The words as a `WordMatrix`, with their ids grouped by length.
+    """
+
+    def __init__(self, words: np.ndarray | Sequence[str]) -> None:
+        self.matrix = WordMatrix(words)
+        self.size = len(self.matrix)
+        # `find_solution` results, per set of guesses
+        self.results = ResultCache()
+        self._by_length = np.argsort(self.matrix.lengths, kind='stable')
+        self._length_offsets = np.searchsorted(
+            self.matrix.lengths[self._by_length],
+            np.arange(self.matrix.width + 2),
+        )
+
+    def bucket(self, length: int) -> np.ndarray:
+        """
+        Ids of words that are `length` characters long, in dictionary order.
+        """
+        if not 0 <= length <= self.matrix.width:
+            return np.empty(0, dtype=np.int64)
+        return self._by_length[self._length_offsets[length]:self._length_offsets[length + 1]]
+
+
+_dictionary: Dictionary | None = None
+_dictionary_lock = threading.Lock()
+
+
+def get_dictionary() -> Dictionary:
+    """
+    Loaded on first use, once per process.
+    """
+    dictionary = _dictionary
+    if dictionary is None:
+        with _dictionary_lock:
+            if _dictionary is None:
+                _set_dictionary(Dictionary(_load_dict(DICT_PATH)))
+            dictionary = _dictionary
+    assert dictionary is not None
+    return dictionary
+
+
+def reload_dictionary(path: str | None = None) -> Dictionary:
+    """
+    Reads the dictionary file again, e.g. after it has been updated.
+    Searches already running finish with the previous one, unless they run in parallel.
+    """
+    dictionary = Dictionary(_load_dict(path or DICT_PATH))
+    with _dictionary_lock:
+        previous = _dictionary
+        _set_dictionary(dictionary)
+    if previous is not None:
+        previous.results.clear()
+        wordscan.release(previous.matrix)
+    return dictionary
+
+
+def result_stats() -> CacheStats | None:
+    """
+    None until the dictionary gets loaded.
+    """
+    dictionary = _dictionary
+    if dictionary is None:
+        return None
+    return dictionary.results.stats()
+
+
+def _set_dictionary(dictionary: Dictionary) -> None:
+    global _dictionary
+    _dictionary = dictionary
+    logger.info('difflanek dictionary loaded, %s words', dictionary.size)
+
+
+def compile_guesses(words: list[str], is_polish_word: bool) -> Constraints:
     isPolishValid = is_polish_word
 
-    polish = 'ąćęłńóśźż'
+    polish = POLISH
     invalid = f'A-Z{polish.upper()}' + ('' if isPolishValid else polish)
-    regex = ''
+    templates = []
+    letter_counts = []
+    forbidden = []
 
     for word in words:
         gray = []
         yellow = []
         green = []
+        # the same template as elements, the gap class is known once the whole guess is parsed
+        elements: list[Literal | Gap] = []
+        plain = True
 
         border = word[0]
         heavyBorder = (border == '[')
@@ -53,6 +289,8 @@ def find_solution(words: list[str], is_polish_word: bool) -> list[str]:
         template = '(?=^'
         if isGreenzone and not heavyBorder:
             template += '[^{grayNoYellows}' + word[0] + '][^{grayNoYellows}]*'
+            elements += [Gap(word[0], 1, 1), Gap('', 0, None)]
+            plain = plain and _is_plain(word[0])
         yellowzone = ''
         isYellowzone = not isGreenzone
 
@@ -64,9 +302,12 @@ def find_solution(words: list[str], is_polish_word: bool) -> list[str]:
                 else:
                     green += letter
                     template += letter
+                    elements.append(Literal(letter))
+                    plain = plain and _is_plain(letter)
             else:
                 if letter == '(':
                     template += '[^{grayNoYellows}' + yellowzone + ']' + ('*' if isYellowzone else '+')
+                    elements.append(Gap(yellowzone, 0 if isYellowzone else 1, None))
                     isGreenzone = True
                     isYellowzone = False
                 else:
@@ -84,31 +325,92 @@ def find_solution(words: list[str], is_polish_word: bool) -> list[str]:
         if isGreenzone:
             if not heavyBorder:
                 template += '[^{grayNoYellows}]*[^{grayNoYellows}' + word[-2] + ']'
+                elements += [Gap('', 0, None), Gap(word[-2], 1, 1)]
+                plain = plain and _is_plain(word[-2])
         else:
             template += '[^{grayNoYellows}' + yellowzone + ']*'
+            elements.append(Gap(yellowzone, 0, None))
         template += '$)'
 
         grayNoYellows = [letter for letter in gray if letter not in yellow]
         grayNoOthers = [letter for letter in grayNoYellows if letter not in green]
         if not yellow or ')' in word or ']' in word:
-            regex += template.format(grayNoYellows= invalid + ''.join(grayNoYellows))
+            char_class = invalid + ''.join(grayNoYellows)
+            templates.append(Template(
+                regex=template.format(grayNoYellows=char_class),
+                char_class=char_class,
+                elements=tuple(_merge_literals(elements)) if plain else None,
+            ))
 
         for letter, count in Counter(yellow + green).items():
             if letter in yellow:
                 knownCount = letter in gray
-                template = '(?=^'
-                for i in range(count):
-                    template += '[^{grayNoOthers}' + (letter if knownCount else '') + ']*' + letter
-                template += '[^{grayNoOthers}' + (letter if knownCount else '') + ']*$)'
-                regex += template.format(grayNoOthers= invalid + ''.join(grayNoOthers))
+                char_class = invalid + ''.join(grayNoOthers)
+                # [^class] between the occurrences, with the letter itself in it when the count is known
+                exact = knownCount or _is_in_class(letter, char_class)
+                letter_counts.append(LetterCount(letter, count, exact))
+                forbidden.append(ForbiddenLetters(char_class, letter))
+
+    if isPolishValid and words:
+        forbidden.append(ForbiddenLetters(invalid))
+    forbidden += [template.forbidden() for template in templates if template.elements is not None]
+    return Constraints(
+        min_length=max((template.min_length for template in templates), default=0),
+        forbidden=tuple(forbidden),
+        required=polish if isPolishValid and words else '',
+        letter_counts=tuple(letter_counts),
+        templates=tuple(templates),
+    )
+
+
+def _merge_literals(elements: list[Literal | Gap]) -> Generator[Literal | Gap, None, None]:
+    text = ''
+    for element in elements:
+        if isinstance(element, Literal):
+            text += element.text
+            continue
+        if text:
+            yield Literal(text)
+            text = ''
+        yield element
+    if text:
+        yield Literal(text)
 
-        if isPolishValid:
-            regex += f'(?=^[^{invalid}]*[{polish}]+[^{invalid}]*$)'
 
-    answers = sorted(filter(lambda word: re.search(regex, word), dictionary), key=len)
+def find_solution(
+    words: list[str],
+    is_polish_word: bool,
+    matrix: WordMatrix | None = None,
+    *,
+    processes: int = 1,
+) -> list[str]:
+    """
+    Words of `matrix` (the dictionary by default) which fit all the guesses,
+    checked in `processes` processes when there are enough of them.
+    Results for the dictionary are cached, for the same guesses in any order.
+    """
+    results = None
+    if matrix is None:
+        dictionary = get_dictionary()
+        matrix = dictionary.matrix
+        results = dictionary.results
+        # every guess is a separate lookahead, their order and repetitions do not matter
+        key = (is_polish_word, frozenset(words))
+        cached = results.get(key)
+        if cached is not None:
+            return list(cached)
 
-    return answers
+    constraints = compile_guesses(words, is_polish_word)
+    scan = wordscan.get_scan(matrix, processes)
+    if scan is None:
+        rows = constraints.filter(matrix, matrix.all_rows())
+    else:
+        rows = scan.filter(constraints.filter, matrix.all_rows())
+    answers = sorted(matrix.take(rows), key=len)
+    if results is not None:
+        results.put(key, answers)
+    return list(answers)
 
 
 def get_total_count() -> int:
-    return len(_load_dict())
+    return get_dictionary().size
@@ -0,0 +1,195 @@
+"""
+Recognises letters of difflanek tiles by comparing them with glyphs of labelled tiles.
+
+The puzzle draws letters in one font on a few colours, so a tile mask splits into
+glyphs on its empty columns and every glyph is matched with the nearest template.
+Glyphs without a close enough template are left to tesseract.
+
+    python -m difflanek.glyphs screenshot.png KOT A ŁO ...
+
+learns the glyphs of a screenshot from its tile texts, in reading order.
+"""
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import threading
+from typing import Sequence
+
+import cv2
+import numpy as np
+
+from logger import get_logger
+
+
+logger = get_logger(__name__)
+
+GLYPHS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'glyphs.npz')
+# glyphs are compared as GLYPH_SIZE x GLYPH_SIZE bitmaps, smaller ones lose diacritics (Ź vs Ż)
+GLYPH_SIZE = 24
+# share of differing pixels above which a glyph is not recognised, a font renders
+# a letter the same way every time, so this only covers scaling noise
+MAX_DISTANCE = 0.01
+# specks of anti-aliasing around tile corners are not glyphs
+MIN_GLYPH_PIXELS = 6
+MAX_CACHED_GLYPHS = 10_000
+
+
+def split_glyphs(mask: np.ndarray) -> list[np.ndarray]:
+    """
+    Glyphs of a tile mask from left to right, split on empty columns and cropped to their ink.
+    """
+    ink = mask > 0
+    edges = np.flatnonzero(np.diff(ink.any(axis=0), prepend=False, append=False)).tolist()
+    glyphs = []
+    for start, end in zip(edges[::2], edges[1::2]):
+        glyph = ink[:, start:end]
+        if np.count_nonzero(glyph) < MIN_GLYPH_PIXELS:
+            continue
+        rows = np.flatnonzero(glyph.any(axis=1))
+        glyphs.append(glyph[rows[0]:rows[-1] + 1])
+    return glyphs
+
+
+def normalise(glyph: np.ndarray) -> np.ndarray:
+    """
+    `glyph` centred in a square, so that its proportions count, scaled to a flat GLYPH_SIZE ** 2 bitmap.
+    """
+    height, width = glyph.shape
+    side = max(height, width)
+    square = np.zeros((side, side), dtype=np.uint8)
+    top = (side - height) // 2
+    left = (side - width) // 2
+    square[top:top + height, left:left + width] = glyph.astype(np.uint8) * 255
+    scaled = cv2.resize(square, (GLYPH_SIZE, GLYPH_SIZE), interpolation=cv2.INTER_AREA)
+    return scaled.reshape(-1) >= 128
+
+
+class GlyphClassifier:
+    """
+    Nearest template by the number of differing pixels, with results cached
+    by glyph bitmap, as tiles repeat the same few dozen glyphs.
+    """
+
+    def __init__(
+        self,
+        templates: np.ndarray | None = None,
+        letters: Sequence[str] = (),
+        max_distance: float = MAX_DISTANCE,
+    ) -> None:
+        if templates is None:
+            templates = np.zeros((0, GLYPH_SIZE ** 2), dtype=bool)
+        self.templates = templates
+        self.letters = list(letters)
+        self.max_distance = max_distance
+        self._cache: dict[bytes, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.letters)
+
+    @classmethod
+    def load(cls, path: str = GLYPHS_PATH) -> GlyphClassifier:
+        """
+        No templates if `path` does not exist, everything is left to tesseract then.
+        """
+        if not os.path.exists(path):
+            return cls()
+        with np.load(path) as data:
+            templates = np.unpackbits(data['templates'], axis=1, count=GLYPH_SIZE ** 2).astype(bool)
+            return cls(templates, data['letters'].tolist())
+
+    def save(self, path: str = GLYPHS_PATH) -> None:
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, templates=np.packbits(self.templates, axis=1), letters=np.array(self.letters))
+
+    def learn(self, mask: np.ndarray, text: str) -> bool:
+        """
+        Adds the glyphs of a tile with known `text`, False if they cannot be told apart.
+        """
+        glyphs = split_glyphs(mask)
+        letters = text.replace(' ', '')
+        if len(glyphs) != len(letters):
+            logger.warning('%d glyphs found for %r, skipping the tile', len(glyphs), text)
+            return False
+        known = {(letter, template.tobytes()) for letter, template in zip(self.letters, self.templates)}
+        new = []
+        for glyph, letter in zip(glyphs, letters):
+            template = normalise(glyph)
+            if (letter, template.tobytes()) not in known:
+                known.add((letter, template.tobytes()))
+                new.append((letter, template))
+        if new:
+            with self._lock:
+                self.templates = np.vstack([self.templates, *(template for _, template in new)])
+                self.letters.extend(letter for letter, _ in new)
+                self._cache.clear()
+        return True
+
+    def match(self, glyph: np.ndarray) -> tuple[str, float]:
+        """
+        The nearest letter and the share of pixels differing from its template.
+        """
+        # screenshots render a letter the same way every time, so the glyph itself is the key
+        key = glyph.shape[1].to_bytes(4, 'little') + np.packbits(glyph).tobytes()
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+        bitmap = normalise(glyph)
+        distances = np.count_nonzero(self.templates != bitmap, axis=1)
+        best = int(distances.argmin())
+        result = (self.letters[best], distances[best] / bitmap.size)
+        with self._lock:
+            if len(self._cache) >= MAX_CACHED_GLYPHS:
+                self._cache.clear()
+            self._cache[key] = result
+        return result
+
+    def classify(self, mask: np.ndarray) -> str | None:
+        """
+        Text of a tile mask, None unless every glyph is close to a template.
+        """
+        if not self.letters:
+            return None
+        glyphs = split_glyphs(mask)
+        if not glyphs:
+            return None
+        text = ''
+        for glyph in glyphs:
+            letter, distance = self.match(glyph)
+            if distance > self.max_distance:
+                return None
+            text += letter
+        return text
+
+
+@functools.cache
+def get_classifier() -> GlyphClassifier:
+    classifier = GlyphClassifier.load()
+    logger.info('%d glyph templates loaded', len(classifier))
+    return classifier
+
+
+def main() -> int:
+    from difflanek import opencv
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('screenshot')
+    parser.add_argument('texts', nargs='+', help='text of every tile, rows top to bottom, tiles left to right')
+    parser.add_argument('--path', default=GLYPHS_PATH)
+    args = parser.parse_args()
+
+    tiles = [tile for row in opencv.get_tiles(opencv.Img(path=args.screenshot)) for tile in row]
+    if len(tiles) != len(args.texts):
+        parser.error(f'{len(tiles)} tiles found, {len(args.texts)} texts given')
+    classifier = GlyphClassifier.load(args.path)
+    before = len(classifier)
+    learned = sum(classifier.learn(tile.mask.image, text.upper()) for tile, text in zip(tiles, args.texts))
+    classifier.save(args.path)
+    print(f'{learned}/{len(tiles)} tiles learned, {len(classifier) - before} new templates, {len(classifier)} in total')
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
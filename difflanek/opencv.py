@@ -1,8 +1,9 @@
 from __future__ import annotations
 
+import bisect
 import colorsys
+import functools
 import string
-from collections import Counter
 from collections import defaultdict
 from typing import NamedTuple
 from typing import Sequence
@@ -11,6 +12,8 @@ import cv2
 import numpy as np
 import pytesseract
 
+from difflanek import glyphs
+
 PL_UPPERCASE = 'ĄĆĘŁÓŃŚŹŻ'
 ALL_UPPERCASE = f'{string.ascii_uppercase}{PL_UPPERCASE}'
 
@@ -18,6 +21,15 @@ Image = cv2.typing.MatLike
 SimpleRGB = tuple[int, int, int]
 ImagePoints = Sequence[cv2.typing.MatLike]
 
+# px of background between images stitched for a single OCR run
+STRIP_GAP = 20
+# contours smaller than that are not tiles
+MIN_TILE_AREA = 300
+# boards are located on a copy with at most that many px along the longer side
+LOCATE_SIZE = 1024
+# px around the located board which are kept
+BOARD_MARGIN = 8
+
 
 class DifflanekException(Exception):
     pass
@@ -27,6 +39,10 @@ class NoGreenRectangleFound(DifflanekException):
     pass
 
 
+class UnreadableImage(DifflanekException):
+    pass
+
+
 class TolerantDefaultDict(defaultdict):
     def __getitem__(self, key):
         if key in self:
@@ -101,6 +117,7 @@ YELLOW = Colour('#B29446')
 GREY = Colour('#414141')
 
 BACKGROUND = Colour('#222222')
+TILE_COLOURS = (GREEN, YELLOW, GREY)
 
 COLOUR_TO_NAME = {
     str(GREEN): 'green',
@@ -156,15 +173,18 @@ class Img:
         else:
             ValueError('unreachable')
 
-    @property
+    # conversions are computed once, `image` must not be modified in place afterwards
+    CONVERSIONS = ('rgb', 'hsv', 'grayscale')
+
+    @functools.cached_property
     def rgb(self) -> Image:
         return cv2.cvtColor(self.image, cv2.COLOR_BGR2RGB)
 
-    @property
+    @functools.cached_property
     def hsv(self) -> Image:
         return cv2.cvtColor(self.image, cv2.COLOR_BGR2HSV)
 
-    @property
+    @functools.cached_property
     def grayscale(self) -> Image:
         return cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
 
@@ -184,9 +204,17 @@ class Img:
 
 
     def get_subimage(self, points: Image) -> Img:
-        x, y, w, h = cv2.boundingRect(points)
-        subimage = self.image[y:y+h, x:x+w]
-        return Img(image=subimage)
+        """
+        A view of the bounding rectangle of `points`, sharing conversions computed so far.
+        """
+        return self.crop(*cv2.boundingRect(points))
+
+    def crop(self, x: int, y: int, w: int, h: int) -> Img:
+        subimage = Img(image=self.image[y:y+h, x:x+w])
+        for conversion in self.CONVERSIONS:
+            if conversion in self.__dict__:
+                subimage.__dict__[conversion] = self.__dict__[conversion][y:y+h, x:x+w]
+        return subimage
 
     def get_mask(self, colour: Colour | list[Colour], negate: bool = False) -> Img:
         def colour_range(colour: Colour | tuple[Colour, Colour]) -> tuple[SimpleRGB, SimpleRGB]:
@@ -195,10 +223,11 @@ class Img:
             else:
                 return colour[0].rgb, colour[1].rgb
         first, *rest = colour if isinstance(colour, list) else [colour]
-        first_mask = cv2.inRange(self.rgb, *colour_range(first))
+        rgb = self.rgb
+        first_mask = cv2.inRange(rgb, *colour_range(first))
         for colour in rest:
-            mask = cv2.inRange(self.rgb, *colour_range(colour))
-            first_mask = cv2.bitwise_or(first_mask, mask)
+            mask = cv2.inRange(rgb, *colour_range(colour))
+            cv2.bitwise_or(first_mask, mask, dst=first_mask)
         if negate:
             first_mask = cv2.bitwise_not(first_mask)
         # preview_image(first_mask)
@@ -225,29 +254,80 @@ class Img:
         13    Raw line. Treat the image as a single text line,
             bypassing hacks that are Tesseract-specific.
         """
-        config = '--psm 7'
-        if restrict_characters:
-            config = f'{config} -c tessedit_char_whitelist="{restrict_characters}"'
         detected_text = pytesseract.image_to_string(
             self.image,
-            config=config,
+            config=tesseract_config(psm=7, restrict_characters=restrict_characters),
             lang='pol',
         )
         return detected_text
 
     def most_common_colour(self) -> Colour:
-        pixels = self.image.reshape(-1, 3)
-        pixels = [tuple(p) for p in pixels]
-        counter = Counter(pixels)
-        most_common_color = counter.most_common(1)[0][0]
-        hex_colour = '#{:02x}{:02x}{:02x}'.format(most_common_color[2], most_common_color[1], most_common_color[0])
-        return Colour(hex_colour)
+        """
+        Ties go to the colour seen first in row-major order, like `Counter.most_common`.
+        """
+        colours, first_seen, counts = np.unique(pack_bgr(self.image), return_index=True, return_counts=True)
+        candidates = np.flatnonzero(counts == counts.max())
+        packed = int(colours[candidates[first_seen[candidates].argmin()]])
+        return Colour(f'#{packed & 0xFF:02x}{packed >> 8 & 0xFF:02x}{packed >> 16:02x}')
 
     def get_pixel_colour(self, y, x) -> Colour:
         pixel = self.rgb[y, x]
         hex_colour = '#{:02x}{:02x}{:02x}'.format(pixel[0], pixel[1], pixel[2])
         return Colour(pixel)
 
+
+def tesseract_config(*, psm: int, restrict_characters: str = '') -> str:
+    config = f'--psm {psm}'
+    if restrict_characters:
+        config = f'{config} -c tessedit_char_whitelist="{restrict_characters}"'
+    return config
+
+
+def detect_texts(images: Sequence[Img], *, restrict_characters: str = '', gap: int = STRIP_GAP) -> list[str]:
+    """
+    Text of every image from a single tesseract run: the images are stacked into
+    one strip, a line each, and the recognised words are mapped back by their position.
+    """
+    if not images:
+        return []
+    offsets = []
+    height = gap
+    for image in images:
+        offsets.append(height)
+        height += image.image.shape[0] + gap
+    width = max(image.image.shape[1] for image in images) + 2 * gap
+    first = images[0].image
+    # padding matches the black background of masks
+    strip = np.zeros((height, width, *first.shape[2:]), dtype=first.dtype)
+    for image, top in zip(images, offsets):
+        h, w = image.image.shape[:2]
+        strip[top:top + h, gap:gap + w] = image.image
+
+    data = pytesseract.image_to_data(
+        strip,
+        config=tesseract_config(psm=6, restrict_characters=restrict_characters),
+        lang='pol',
+        output_type=pytesseract.Output.DICT,
+    )
+    words: list[list[tuple[int, str]]] = [[] for _ in images]
+    for text, left, top, h in zip(data['text'], data['left'], data['top'], data['height']):
+        text = text.strip()
+        if not text:
+            continue
+        # a word belongs to the last image starting above its middle
+        i = max(bisect.bisect_right(offsets, top + h // 2) - 1, 0)
+        words[i].append((left, text))
+    return [' '.join(text for _, text in sorted(image_words)) for image_words in words]
+
+
+def pack_bgr(image: Image) -> np.ndarray:
+    """
+    Every BGR pixel of `image` as a single `b << 16 | g << 8 | r` uint32, in row-major order.
+    """
+    pixels = np.asarray(image).reshape(-1, 3).astype(np.uint32)
+    return pixels[:, 0] << 16 | pixels[:, 1] << 8 | pixels[:, 2]
+
+
 class Contours:
     def __init__(self, contours: ImagePoints) -> None:
         self.contours = contours
@@ -318,22 +398,64 @@ def text_to_difflanek(text: str, colour: str, left_closed: bool, right_closed: b
     return f'{left_bracket}{text.lower()}{right_bracket}'
 
 
-def get_difflanek(image: Img | bytes, *, debug: bool = False) -> list[str]:
-    if isinstance(image, bytes):
-        nparr = np.fromstring(image, np.uint8)
-        img = cv2.imdecode(nparr, cv2.IMREAD_COLOR)
-        image = Img(image=img)
-    ret = []
+def decode(data: bytes) -> Img:
+    """
+    Decoded straight from the downloaded buffer, without copying it first.
+    """
+    image = cv2.imdecode(np.frombuffer(data, np.uint8), cv2.IMREAD_COLOR)
+    if image is None:
+        raise UnreadableImage
+    return Img(image=image)
+
+
+def locate_board(image: Img, min_area: int = MIN_TILE_AREA) -> Img:
+    """
+    The part of `image` with the tiles, found on a copy scaled down to LOCATE_SIZE,
+    so that colour masks and contours of the full screenshot are computed just for it.
+    """
+    height, width = image.image.shape[:2]
+    scale = min(LOCATE_SIZE / max(height, width), 1.0)
+    # nearest neighbour keeps the exact tile colours, which are looked for
+    small = cv2.resize(image.image, None, fx=scale, fy=scale, interpolation=cv2.INTER_NEAREST)
+    mask = np.zeros(small.shape[:2], dtype=np.uint8)
+    for colour in TILE_COLOURS:
+        bgr = colour.rgb[::-1]
+        cv2.bitwise_or(mask, cv2.inRange(small, bgr, bgr), dst=mask)
+    contours, _ = cv2.findContours(mask, cv2.RETR_EXTERNAL, cv2.CHAIN_APPROX_SIMPLE)
+    # tiles may lose some of their area when scaled down
+    boxes = np.array([
+        cv2.boundingRect(contour) for contour in contours
+        if cv2.contourArea(contour) > min_area * scale ** 2 / 4
+    ]).reshape(-1, 4)
+    if not len(boxes):
+        return image
+    left = max(int(boxes[:, 0].min() / scale) - BOARD_MARGIN, 0)
+    top = max(int(boxes[:, 1].min() / scale) - BOARD_MARGIN, 0)
+    right = min(int(np.ceil((boxes[:, 0] + boxes[:, 2]).max() / scale)) + BOARD_MARGIN, width)
+    bottom = min(int(np.ceil((boxes[:, 1] + boxes[:, 3]).max() / scale)) + BOARD_MARGIN, height)
+    return image.crop(left, top, right - left, bottom - top)
+
+
+class Tile(NamedTuple):
+    mask: Img
+    colour: Colour
+    left_closed: bool
+    right_closed: bool
+
+
+def get_tiles(image: Img, *, debug: bool = False) -> list[list[Tile]]:
+    """
+    Tiles of every guess, top to bottom and left to right, with masks of their letters.
+    """
     rectangle = get_biggest_rectangle(image)
     if rectangle is None:
         raise NoGreenRectangleFound
-    biggest_rectangle = image.get_subimage(points=rectangle)
 
     green_contours = image.find_contours(colour=GREEN)
     yellow_contours = image.find_contours(colour=YELLOW)
     grey_contours = image.find_contours(colour=GREY)
 
-    def filter_contour_by_min_area(contours, min_area: int = 300):
+    def filter_contour_by_min_area(contours, min_area: int = MIN_TILE_AREA):
         return [
             contour for contour in contours.contours
             if cv2.contourArea(contour) > min_area
@@ -366,7 +488,9 @@ def get_difflanek(image: Img | bytes, *, debug: bool = False) -> list[str]:
         for y, contours in group.items():
             groups[y].extend(contours)
 
-    i = image.image
+    if debug:
+        # drawn on a copy, `image` conversions are cached
+        i = image.image.copy()
 
     colours_ignore = [
         (Colour('#000000'), GREEN),
@@ -395,37 +519,67 @@ def get_difflanek(image: Img | bytes, *, debug: bool = False) -> list[str]:
 
     groups = sorted(groups.items(), key=lambda x: x[0])
     # groups = groups[0:][:1]
-    ret = []
+    rows = []
     for y, group in groups:
-        difflanek = ''
+        tiles = []
         for chunk in sorted(group, key=lambda x: cv2.boundingRect(x)[BoundingRect.X]):
-            d = cv2.boundingRect(chunk)
             chunk_image = image.get_subimage(chunk)
             # preview_image(chunk_image.rgb)
+            mask = chunk_image.get_mask(colour=colours_get, negate=False)
 
-            _i = image.get_subimage(chunk)
-            text = image.get_subimage(chunk).get_mask(colour=colours_get, negate=False).detect_text(restrict_characters=ALL_UPPERCASE).strip()
-
-            mc = image.get_subimage(chunk).most_common_colour()
+            mc = chunk_image.most_common_colour()
             # mc = COLOUR_TO_NAME.get(str(mc))
 
-            # top_left = Colour.from_rgb(image.rgb[d[BoundingRect.X], d[BoundingRect.Y]])
-            # top_right = Colour.from_rgb(image.rgb[d[BoundingRect.X] + d[BoundingRect.WIDTH], d[BoundingRect.Y]])
-
             top_left = Colour.from_rgb(chunk_image.rgb[0, 0])
             top_right = Colour.from_rgb(chunk_image.rgb[0, -1])
             # print(BACKGROUND, top_left, top_right)
-            _difflanek_tmp = text_to_difflanek(text, mc, left_closed=top_left != BACKGROUND, right_closed=top_right != BACKGROUND)
-            difflanek += _difflanek_tmp
+            tiles.append(Tile(mask, mc, left_closed=top_left != BACKGROUND, right_closed=top_right != BACKGROUND))
+        rows.append(tiles)
 
-            # print(f'> {d} > {mc} > ', text)
-        # print(f'> {difflanek} > ')
-        ret.append(difflanek)
-
-        draw_contours(i, group)
+        if debug:
+            draw_contours(i, group)
 
     if debug:
         cv2.imshow('Contours with same row height', i)
         cv2.waitKey(0)
         cv2.destroyAllWindows()
+    return rows
+
+
+def recognise(masks: Sequence[Img], classifier: glyphs.GlyphClassifier | None = None) -> list[str]:
+    """
+    Text of every tile mask, from glyph templates where they are close enough
+    and from a single tesseract run for the rest.
+    """
+    if classifier is None:
+        classifier = glyphs.get_classifier()
+    texts: list[str | None] = [classifier.classify(mask.image) for mask in masks]
+    unknown = [i for i, text in enumerate(texts) if text is None]
+    if unknown:
+        detected = detect_texts([masks[i] for i in unknown], restrict_characters=ALL_UPPERCASE)
+        for i, text in zip(unknown, detected):
+            texts[i] = text
+    recognised = [text for text in texts if text is not None]
+    # tesseract returns a text for every mask
+    assert len(recognised) == len(texts)
+    return recognised
+
+
+def get_difflanek(
+    image: Img | bytes,
+    *,
+    debug: bool = False,
+    classifier: glyphs.GlyphClassifier | None = None,
+) -> list[str]:
+    if isinstance(image, bytes):
+        image = decode(image)
+    rows = get_tiles(locate_board(image), debug=debug)
+    texts = iter(recognise([tile.mask for row in rows for tile in row], classifier))
+    ret = []
+    for row in rows:
+        difflanek = ''
+        for tile in row:
+            difflanek += text_to_difflanek(next(texts), tile.colour, left_closed=tile.left_closed, right_closed=tile.right_closed)
+        # print(f'> {difflanek} > ')
+        ret.append(difflanek)
     return ret
@@ -1,31 +1,207 @@
 from __future__ import annotations
 
+import functools
+import itertools
+import mmap
+import os
+import random
 import re
+import tempfile
+import time
+from array import array
+from collections import OrderedDict
+from concurrent.futures import Executor
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import wait
 from enum import Enum
+from typing import Callable
 from typing import Generator
+from typing import Hashable
+from typing import Iterator
 from typing import NamedTuple
+from typing import Sequence
 
+import numpy as np
+
+import wordscan
 from logger import get_logger
+from resultcache import ResultCache
+from wordmatrix import WordMatrix
+from wordmatrix import flatten_words
 
 
 logger = get_logger(__name__)
 
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+DICT_PATH = os.path.join(ASSETS_DIR, 'pl.dic')
+COMPILED_DICT_PATH = os.path.join(ASSETS_DIR, 'pl.dic.bin')
+COMPILED_DICT_MAGIC = b'DFL1'
+MIN_WORD_LENGTH = 2
+MAX_WORD_LENGTH = 17
+# `best_guesses` scores at most this many guesses against at most this many possible answers
+MAX_SCORED_GUESSES = 500
+MAX_SCORED_ANSWERS = 2000
+SCORING_BATCH_SIZE = 25
+
 
 class InvalidSyntaxException(Exception):
     pass
 
 
-def get_dict() -> list[str]:
+def get_dict(path: str = DICT_PATH) -> list[str]:
     def _inner() -> Generator[str, None, None]:
-        with open('assets/pl.dic') as f:
+        with open(path) as f:
             for line in f:
                 line = line.strip().lower()
-                if len(line) < 2 or len(line) > 17:
+                if len(line) < MIN_WORD_LENGTH or len(line) > MAX_WORD_LENGTH:
                     continue
                 yield line
     return sorted(set(_inner()), key=lambda word: (len(word), word))
 
 
+def compile_dict(source: str = DICT_PATH, target: str = COMPILED_DICT_PATH) -> None:
+    """
+    Writes `get_dict(source)` as a binary file that `PackedDictionary` maps into memory.
+
+    Layout (native byte order, uint32 arrays):
+        magic
+        buckets    MAX_WORD_LENGTH + 2 word indexes, words of length n are buckets[n]:buckets[n + 1]
+        count      number of words
+        offsets    count + 1 byte offsets into the blob
+        blob       utf8 words, each followed by a newline
+    """
+    words = get_dict(source)
+    buckets = array('I', [0] * (MAX_WORD_LENGTH + 2))
+    offsets = array('I', [0])
+    blob = bytearray()
+    for i, word in enumerate(words):
+        buckets[len(word) + 1] = i + 1
+        blob += word.encode('utf8') + b'\n'
+        offsets.append(len(blob))
+    for length in range(1, len(buckets)):
+        buckets[length] = max(buckets[length], buckets[length - 1])
+
+    # own temporary file per writer, processes may compile on first use at the same time
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(os.path.abspath(target)), delete=False) as f:
+        try:
+            f.write(COMPILED_DICT_MAGIC)
+            f.write(buckets.tobytes())
+            f.write(array('I', [len(words)]).tobytes())
+            f.write(offsets.tobytes())
+            f.write(blob)
+        except BaseException:
+            os.unlink(f.name)
+            raise
+    os.replace(f.name, target)
+    logger.info('compiled %s words from %s into %s', len(words), source, target)
+
+
+class PackedDictionary(Sequence[str]):
+    """
+    Read-only view of a dictionary compiled by `compile_dict`, words are decoded on access.
+    """
+
+    def __init__(self, path: str = COMPILED_DICT_PATH) -> None:
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mmap[:len(COMPILED_DICT_MAGIC)] != COMPILED_DICT_MAGIC:
+            raise ValueError(f'{path} is not a compiled dictionary')
+        view = memoryview(self._mmap)
+        start = len(COMPILED_DICT_MAGIC)
+        end = start + (MAX_WORD_LENGTH + 2) * 4
+        self._buckets = view[start:end].cast('I')
+        start, end = end, end + 4
+        count = view[start:end].cast('I')[0]
+        start, end = end, end + (count + 1) * 4
+        self._offsets = view[start:end].cast('I')
+        self._blob = view[end:]
+        self._count = count
+        # `Solver` results, per set of guesses
+        self.results = ResultCache()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._count))]
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(index)
+        return str(self._blob[self._offsets[index]:self._offsets[index + 1] - 1], 'utf8')
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._decode(0, self._count))
+
+    def bucket(self, length: int) -> range:
+        """
+        Indexes of words that are `length` characters long.
+        """
+        if not MIN_WORD_LENGTH <= length <= MAX_WORD_LENGTH:
+            return range(0)
+        return range(self._buckets[length], self._buckets[length + 1])
+
+    def take(self, indexes: np.ndarray | Sequence[int]) -> list[str]:
+        if len(indexes) > self._count // 8:
+            # decoding everything in one go beats decoding that many words one by one
+            words = self._decode(0, self._count)
+            return [words[i] for i in indexes]
+        return [self[i] for i in indexes]
+
+    @functools.cached_property
+    def search_index(self) -> SearchIndex:
+        return SearchIndex(self)
+
+    @functools.cached_property
+    def word_matrix(self) -> WordMatrix:
+        return WordMatrix(self)
+
+    def words_of_length(self, length: int) -> list[str]:
+        indexes = self.bucket(length)
+        return self._decode(indexes.start, indexes.stop)
+
+    def _decode(self, start: int, stop: int) -> list[str]:
+        if start >= stop:
+            return []
+        chunk = self._blob[self._offsets[start]:self._offsets[stop] - 1]
+        return str(chunk, 'utf8').split('\n')
+
+
+@functools.lru_cache(maxsize=None)
+def load_dict() -> PackedDictionary:
+    """
+    Compiles the dictionary first if it is missing or older than its source.
+    """
+    if (
+        not os.path.exists(COMPILED_DICT_PATH)
+        or os.path.getmtime(COMPILED_DICT_PATH) < os.path.getmtime(DICT_PATH)
+    ):
+        compile_dict()
+    return PackedDictionary(COMPILED_DICT_PATH)
+
+
+def reload_dict() -> PackedDictionary:
+    """
+    Maps the dictionary again, recompiled if its source changed, and drops
+    whatever was cached for the previous one. Existing solvers keep the previous one.
+    """
+    if load_dict.cache_info().currsize:
+        previous = load_dict()
+        previous.results.clear()
+        if 'word_matrix' in previous.__dict__:
+            wordscan.release(previous.word_matrix)
+    load_dict.cache_clear()
+    return load_dict()
+
+
+def __getattr__(name: str) -> PackedDictionary:
+    # `DICT` used to be built on import, now the compiled dictionary is mapped on first use
+    if name == 'DICT':
+        return load_dict()
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+
 class ChunkType(Enum):
     GREY = 'GREY'
     YELLOW = 'YELLOW'
@@ -86,29 +262,211 @@ class Chunk(NamedTuple):
         }.get(self.type, '{body}')
 
 
+class SearchIndex:
+    """
+    Prefilter for `Solver`. Every green chunk has to appear in a matching word, so words
+    that are too short, lack one of the chunk letters (bitmask test) or one of its bigrams
+    (inverted index) are dropped before the chunk regex runs on whatever is left.
+    """
+
+    def __init__(self, words: Sequence[str]) -> None:
+        codepoints, is_separator, starts, ends, word_ids = flatten_words(words)
+
+        alphabet = np.unique(codepoints[~is_separator])
+        letter_ids = np.searchsorted(alphabet, codepoints)
+        self._alphabet = {chr(codepoint): i for i, codepoint in enumerate(alphabet)}
+        self._alphabet_size = len(alphabet)
+
+        self.lengths = ends - starts
+        # letters past the 64th share bits, which only makes the test less selective
+        bits = np.left_shift(np.uint64(1), (letter_ids % 64).astype(np.uint64))
+        bits[is_separator] = 0
+        self.masks = np.bitwise_or.reduceat(bits, starts) if len(words) else np.empty(0, dtype=np.uint64)
+
+        is_bigram = ~is_separator[:-1] & ~is_separator[1:]
+        bigrams = (letter_ids[:-1] * self._alphabet_size + letter_ids[1:])[is_bigram].astype(np.int64)
+        pairs = np.unique(bigrams * max(len(words), 1) + word_ids[:-1][is_bigram])
+        self._postings = pairs % max(len(words), 1)
+        self._posting_offsets = np.searchsorted(
+            pairs // max(len(words), 1),
+            np.arange(self._alphabet_size ** 2 + 1),
+        )
+        self._size = len(words)
+
+    def candidates(self, chunks: list[Chunk], within: np.ndarray | None = None) -> np.ndarray:
+        """
+        Sorted ids of words that may match `chunks`, a superset of the real matches.
+        """
+        postings = []
+        required_mask = 0
+        min_length = 0
+        for chunk in chunks:
+            if not chunk.word.isalpha():
+                # regex syntax typed by the user, leave it all to the regex
+                continue
+            if not all(letter in self._alphabet for letter in chunk.word):
+                return np.empty(0, dtype=np.int64)
+            letter_ids = [self._alphabet[letter] for letter in chunk.word]
+            min_length += len(letter_ids)
+            for letter_id in letter_ids:
+                required_mask |= 1 << (letter_id % 64)
+            for first, second in zip(letter_ids, letter_ids[1:]):
+                bigram = first * self._alphabet_size + second
+                postings.append(self._postings[self._posting_offsets[bigram]:self._posting_offsets[bigram + 1]])
+
+        if within is not None:
+            postings.append(within)
+        if postings:
+            postings.sort(key=len)
+            candidates = functools.reduce(
+                lambda a, b: np.intersect1d(a, b, assume_unique=True),
+                postings[1:],
+                postings[0],
+            )
+        else:
+            candidates = np.arange(self._size)
+        candidates = candidates[self.lengths[candidates] >= min_length]
+        mask = np.uint64(required_mask)
+        return candidates[(self.masks[candidates] & mask) == mask]
+
+
+def match_chunks(matrix: WordMatrix, chunks: list[Chunk], rows: np.ndarray) -> np.ndarray:
+    """
+    `re.match` of the regex built from `chunks`, for the `rows` of `matrix` at once.
+    Green chunks must be plain letters. Every chunk is matched at its first occurrence
+    after the previous one, except for anchored ones which are checked in place.
+    """
+    lengths = matrix.lengths[rows]
+    matches = np.ones(len(rows), dtype=bool)
+    # where the next chunk may start
+    position = np.zeros(len(rows), dtype=np.int64)
+    for chunk in chunks:
+        size = len(chunk.word)
+        if chunk.type == ChunkType.EMPTY:
+            continue
+        if chunk.type in (ChunkType.LEFT_GREEN, ChunkType.BOTH_GREEN):
+            matches &= (position == 0) & matrix.at(chunk.word, rows, 0)
+            if chunk.type == ChunkType.BOTH_GREEN:
+                matches &= lengths == size
+            position = np.full(len(rows), size)
+        elif chunk.type == ChunkType.RIGHT_GREEN:
+            matches &= (lengths - size >= position) & matrix.at(chunk.word, rows, lengths - size)
+            position = lengths.copy()
+        else:
+            found = matrix.find(chunk.word, rows, position)
+            matches &= found >= 0
+            position = found + size
+        if chunk.type in (ChunkType.RIGHT_GREEN, ChunkType.BOTH_GREEN):
+            # nothing can follow the end of the word
+            position = np.where(matches, lengths, -1)
+    return matches
+
+
+def filter_rows(chunks: list[Chunk], regex: str, matrix: WordMatrix, rows: np.ndarray) -> np.ndarray:
+    """
+    `rows` of `matrix` which match one parsed guess.
+    """
+    if all(chunk.word.isalpha() for chunk in chunks if chunk.type in ChunkType.green):
+        return rows[match_chunks(matrix, chunks, rows)]
+    # regex syntax typed by the user
+    pattern = re.compile(regex)
+    return rows[np.array([bool(pattern.match(word)) for word in matrix.take(rows)], dtype=bool)]
+
+
 class Solver:
-    def __init__(self, dictionary: list[str]) -> None:
+    def __init__(self, dictionary: Sequence[str], processes: int = 1) -> None:
         self._dictionary = dictionary
         self._guesses = []
+        # ids of words matching the first `_applied` guesses, None before any guess
+        self._candidates: np.ndarray | None = None
+        self._applied = 0
+        if isinstance(dictionary, PackedDictionary):
+            self._index = dictionary.search_index
+            self._matrix = dictionary.word_matrix
+            self._results: ResultCache | None = dictionary.results
+        else:
+            self._index = SearchIndex(dictionary)
+            self._matrix = WordMatrix(dictionary)
+            self._results = None
+        self._scan = wordscan.get_scan(self._matrix, processes)
+
+    @property
+    def guesses(self) -> list[str]:
+        return list(self._guesses)
 
     def guess(self, guess: str) -> None:
         self._guesses.append(guess)
 
     def get_matches(self, polish: bool = True) -> list[str]:
-        local_dict = self._dictionary
-        for guess in self._guesses:
-            if not self._validate_parens(guess):
-                raise InvalidSyntaxException('Unmatched parens')
-            chunks = self._parse_guessed_word(guess)
-            regex = ''.join(chunk.to_regex() for chunk in chunks)
+        """
+        Only guesses added since the previous call are applied, to what the earlier ones left.
+        An invalid guess is dropped together with the ones after it.
+        Results are cached per dictionary, for the same guesses in any order.
+        """
+        key = self._cache_key(polish)
+        if key is not None and self._results is not None:
+            cached = self._results.get(key)
+            if cached is not None:
+                self._candidates, matches = cached
+                self._applied = len(self._guesses)
+                return list(matches)
+
+        for guess in self._guesses[self._applied:]:
+            try:
+                chunks, regex = self._compile_guess(guess)
+            except InvalidSyntaxException:
+                del self._guesses[self._applied:]
+                raise
 
             logger.debug('vvv diffle vvv')
             logger.debug(guess)
             logger.debug(chunks)
             logger.debug(regex)
             logger.debug('^^^ diffle ^^^')
-            local_dict = list(filter(lambda dict_word: re.match(regex, dict_word), local_dict))
-        return local_dict
+            candidates = self._index.candidates(chunks, within=self._candidates)
+            if self._scan is None:
+                self._candidates = filter_rows(chunks, regex, self._matrix, candidates)
+            else:
+                self._candidates = self._scan.filter(functools.partial(filter_rows, chunks, regex), candidates)
+            self._applied += 1
+        if self._candidates is None:
+            return list(self._dictionary)
+        matches = self._take(self._candidates)
+        if key is not None and self._results is not None:
+            self._results.put(key, (self._candidates, matches))
+        return list(matches)
+
+    def _cache_key(self, polish: bool) -> tuple | None:
+        """
+        What the guesses mean to `get_matches`: the set of their parsed chunks.
+        """
+        if self._results is None or not self._guesses:
+            return None
+        try:
+            parsed = frozenset(tuple(self._compile_guess(guess)[0]) for guess in self._guesses)
+        except InvalidSyntaxException:
+            # rejected when applied
+            return None
+        return (polish, parsed)
+
+    def _compile_guess(self, guess: str) -> tuple[list[Chunk], str]:
+        """
+        Chunks of `guess` and their regex, InvalidSyntaxException if either cannot be built.
+        """
+        if not self._validate_parens(guess):
+            raise InvalidSyntaxException('Unmatched parens')
+        try:
+            chunks = self._parse_guessed_word(guess)
+            regex = ''.join(chunk.to_regex() for chunk in chunks)
+            re.compile(regex)
+        except Exception as e:
+            raise InvalidSyntaxException(f'Invalid guess {guess}') from e
+        return chunks, regex
+
+    def _take(self, indexes: np.ndarray) -> list[str]:
+        if isinstance(self._dictionary, PackedDictionary):
+            return self._dictionary.take(indexes)
+        return [self._dictionary[i] for i in indexes]
 
     def _parse_guessed_word(self, guessed_word: str) -> list[Chunk]:
         chunks = []
@@ -164,4 +522,172 @@ class Solver:
         return True
 
 
-DICT = get_dict()
+class ScoredGuess(NamedTuple):
+    word: str
+    entropy: float
+    possible_answer: bool
+
+
+def encode_words(words: Sequence[str]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Words as a zero padded (len(words), MAX_WORD_LENGTH) matrix of codepoints and their lengths.
+    """
+    codepoints = np.zeros((len(words), MAX_WORD_LENGTH), dtype=np.uint32)
+    lengths = np.zeros(len(words), dtype=np.int64)
+    for i, word in enumerate(words):
+        codepoints[i, :len(word)] = [ord(char) for char in word]
+        lengths[i] = len(word)
+    return codepoints, lengths
+
+
+def feedback_keys(guess: str, answers: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """
+    What `guess` would reveal about every encoded answer, as one integer per answer.
+
+    Only what `Solver` makes use of is encoded: which letters of the guess are green,
+    where a new green chunk starts and whether the first/last chunk is anchored
+    at the beginning/end of the word. Guess letters are matched left to right,
+    each with the nearest occurrence after the previous match.
+    """
+    columns = np.arange(answers.shape[1])
+    keys = np.zeros(len(answers), dtype=np.int64)
+    previous = np.full(len(answers), -1)
+    # answer position of the previous guess letter, -2 when it was not green
+    chained = np.full(len(answers), -2)
+    first = np.full(len(answers), -1)
+    last = np.full(len(answers), -1)
+    for letter in guess:
+        hits = (answers == ord(letter)) & (columns > previous[:, None])
+        found = hits.any(axis=1)
+        position = np.where(found, hits.argmax(axis=1), -1)
+        # 0 - not green, 1 - starts a green chunk, 2 - continues one
+        keys = keys * 3 + np.where(found, np.where(position == chained + 1, 2, 1), 0)
+        previous = np.where(found, position, previous)
+        chained = np.where(found, position, -2)
+        first = np.where((first < 0) & found, position, first)
+        last = np.where(found, position, last)
+    left_anchored = first == 0
+    right_anchored = (last >= 0) & (last == lengths - 1)
+    return keys * 4 + left_anchored * 2 + right_anchored
+
+
+def guess_entropy(guess: str, answers: np.ndarray, lengths: np.ndarray) -> float:
+    """
+    Expected information in bits, assuming every answer is equally likely.
+    """
+    _, counts = np.unique(feedback_keys(guess, answers, lengths), return_counts=True)
+    probabilities = counts / len(answers)
+    return float(-(probabilities * np.log2(probabilities)).sum())
+
+
+def _score_batch(guesses: Sequence[str], answers: Sequence[str]) -> list[tuple[str, float]]:
+    codepoints, lengths = encode_words(answers)
+    return [(guess, guess_entropy(guess, codepoints, lengths)) for guess in guesses]
+
+
+def best_guesses(
+    candidates: Sequence[str],
+    *,
+    guesses: Sequence[str] | None = None,
+    budget: float = 5.0,
+    top: int = 5,
+    executor: Executor | None = None,
+    workers: int = 1,
+    rng: random.Random | None = None,
+) -> tuple[list[ScoredGuess], bool]:
+    """
+    Guesses which split `candidates` into the most evenly sized groups of feedback.
+
+    Guesses come from `candidates` unless given, both sides are sampled down to
+    MAX_SCORED_GUESSES/MAX_SCORED_ANSWERS. Batches of guesses are scored in `executor`
+    (in this process if None) until `budget` seconds run out, the second value tells
+    whether every guess got scored. Ties go to guesses that may be the answer themselves.
+
+    At most `workers` batches are submitted at a time, so that running out of time
+    leaves no more than that many running for nothing.
+    """
+    rng = rng or random.Random()
+    if not candidates:
+        return [], True
+    answers = _sample(candidates, MAX_SCORED_ANSWERS, rng)
+    pool = _sample(candidates if guesses is None else guesses, MAX_SCORED_GUESSES, rng)
+    batches = [pool[i:i + SCORING_BATCH_SIZE] for i in range(0, len(pool), SCORING_BATCH_SIZE)]
+    deadline = time.monotonic() + budget
+    scored: list[tuple[str, float]] = []
+    complete = True
+    if executor is None:
+        for batch in batches:
+            if time.monotonic() >= deadline:
+                complete = False
+                break
+            scored += _score_batch(batch, answers)
+    else:
+        remaining = iter(batches)
+        running = {executor.submit(_score_batch, batch, answers) for batch in itertools.islice(remaining, workers)}
+        while running:
+            done, running = wait(running, timeout=max(deadline - time.monotonic(), 0), return_when=FIRST_COMPLETED)
+            for future in done:
+                scored += future.result()
+            if time.monotonic() >= deadline:
+                break
+            running |= {
+                executor.submit(_score_batch, batch, answers)
+                for batch in itertools.islice(remaining, len(done))
+            }
+        for future in running:
+            future.cancel()
+        complete = len(scored) == len(pool)
+    logger.debug('scored %s/%s guesses against %s answers', len(scored), len(pool), len(answers))
+
+    possible = set(candidates)
+    ranked = sorted(
+        (ScoredGuess(word, entropy, word in possible) for word, entropy in scored),
+        key=lambda scored_guess: (-round(scored_guess.entropy, 9), not scored_guess.possible_answer, scored_guess.word),
+    )
+    return ranked[:top], complete
+
+
+def _sample(words: Sequence[str], limit: int, rng: random.Random) -> list[str]:
+    if len(words) <= limit:
+        return list(words)
+    return rng.sample(list(words), limit)
+
+
+class SolverSessions:
+    """
+    Solvers kept between commands, e.g. one per user and channel, so that every
+    guess only filters what the previous ones left. Idle sessions expire after `ttl` seconds.
+    """
+
+    def __init__(self, dictionary: Callable[[], Sequence[str]], ttl: float, processes: int = 1) -> None:
+        self._dictionary = dictionary
+        self._ttl = ttl
+        self._processes = processes
+        self._sessions: OrderedDict[Hashable, tuple[float, Solver]] = OrderedDict()
+
+    def __len__(self) -> int:
+        self._evict(time.monotonic())
+        return len(self._sessions)
+
+    def get(self, key: Hashable) -> Solver:
+        now = time.monotonic()
+        self._evict(now)
+        _, solver = self._sessions.pop(key, (now, None))
+        if solver is None:
+            solver = Solver(self._dictionary(), processes=self._processes)
+        self._sessions[key] = (now, solver)
+        return solver
+
+    def reset(self, key: Hashable) -> bool:
+        return self._sessions.pop(key, None) is not None
+
+    def _evict(self, now: float) -> None:
+        while self._sessions:
+            key, (last_used, _) = next(iter(self._sessions.items()))
+            if now - last_used < self._ttl:
+                break
+            del self._sessions[key]
+
+
+if __name__ == '__main__':
+    compile_dict()
@@ -22,6 +22,8 @@ def getenv(name: str, *, as_: Type[bool], default: bool) -> bool: ...
 def getenv(name: str, *, as_: Type[str] = str, default: str) -> str: ...
 @overload
 def getenv(name: str, *, as_: Callable[[str], T]) -> T: ...
+@overload
+def getenv(name: str, *, as_: Callable[[str], T], default: T) -> T: ...
 
 
 def getenv(
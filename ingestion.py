@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+import multiprocessing
+
+from logger import get_logger
+from utils import markovify
+
+
+logger = get_logger(__name__)
+
+_queue: multiprocessing.Queue | None = None
+
+
+def set_queue(queue: multiprocessing.Queue | None) -> None:
+    """
+    Hands all subsequent `ingest` calls in this process over to the writer
+    process reading from `queue`.
+    """
+    global _queue
+    _queue = queue
+
+
+def ingest(
+    *,
+    text: str,
+    channel_id: int,
+    guild_id: int,
+    markov2: bool = False,
+    markov3: bool = False,
+    carrot: bool = False,
+) -> None:
+    kwargs = dict(
+        text=text,
+        channel_id=channel_id,
+        guild_id=guild_id,
+        markov2=markov2,
+        markov3=markov3,
+        carrot=carrot,
+    )
+    if _queue is None:
+        markovify(**kwargs)
+    else:
+        _queue.put(kwargs)
+
+
+def writer(queue: multiprocessing.Queue) -> None:
+    """
+    The only process writing markov data when running several shard processes,
+    so that they do not fight over the sqlite write lock. `None` stops it.
+    """
+    logger.info('ingestion writer started')
+    while True:
+        try:
+            kwargs = queue.get()
+        except KeyboardInterrupt:
+            # shard processes are still flushing, wait for the sentinel
+            continue
+        if kwargs is None:
+            logger.info('ingestion writer stopped')
+            return None
+        try:
+            markovify(**kwargs)
+        except Exception as e:
+            logger.exception(e)
@@ -1,8 +1,11 @@
 import settings
+import sharding
 from client import Client
 
 
 def main() -> int:
+    if settings.SHARD_COUNT:
+        return sharding.launch()
     client = Client()
     client.run(settings.TOKEN)
     return 0
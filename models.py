@@ -1,6 +1,7 @@
 from typing import Optional
 
 from sqlalchemy import Column
+from sqlalchemy import Index
 from sqlalchemy import Integer
 from sqlalchemy import String
 
@@ -59,4 +60,22 @@ class VariableModel(Base):
     value: str = Column(String)
 
 
+class OcrResultModel(Base):
+    __tablename__ = 'ocr_results'
+    __table_args__ = (Index('ix_ocr_results_digest_version', 'digest', 'version', unique=True),)
+
+    id: int = Column(Integer, primary_key=True, unique=True)
+    digest: str = Column(String)
+    version: int = Column(Integer)
+    result: str = Column(String)
+
+
+class OcrAttachmentModel(Base):
+    __tablename__ = 'ocr_attachments'
+
+    id: int = Column(Integer, primary_key=True, unique=True)
+    attachment_id: int = Column(Integer, unique=True)
+    digest: str = Column(String)
+
+
 Base.metadata.create_all(engine)
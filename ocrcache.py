@@ -0,0 +1,131 @@
+"""
+`dflocr` results by discord attachment id and by a hash of the image, so that
+a screenshot read once is neither downloaded nor read again.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Callable
+from typing import ContextManager
+
+from sqlalchemy import delete
+from sqlalchemy import select
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm.session import Session
+from sqlalchemy.sql import Select
+
+from database import get_db
+from logger import get_logger
+from models import OcrAttachmentModel
+from models import OcrResultModel
+from resultcache import CacheStats
+from resultcache import ResultCache
+
+
+logger = get_logger(__name__)
+
+# bump when recognition changes, results of previous versions are not used
+OCR_VERSION = 1
+MAX_ENTRIES = 512
+# rows kept in the database per table, older ones are deleted
+MAX_STORED = 10_000
+
+
+def digest(image: bytes) -> str:
+    return hashlib.blake2b(image, digest_size=16).hexdigest()
+
+
+def _encode(result: list[str]) -> str:
+    return '\n'.join(result)
+
+
+def _decode(result: str) -> list[str]:
+    return result.split('\n') if result else []
+
+
+class OcrCache:
+    """
+    Recent results in memory, up to `max_stored` of them in the database:
+    one row per image digest and one per attachment id pointing at it.
+    """
+
+    def __init__(
+        self,
+        session: Callable[[], ContextManager[Session]] = get_db,
+        max_entries: int = MAX_ENTRIES,
+        version: int = OCR_VERSION,
+        max_stored: int = MAX_STORED,
+    ) -> None:
+        self._session = session
+        self._memory = ResultCache(max_entries=max_entries)
+        self._version = version
+        self._max_stored = max_stored
+
+    def by_attachment(self, attachment_id: int) -> list[str] | None:
+        return self._get(
+            ('attachment', attachment_id),
+            select(OcrResultModel)
+            .join(OcrAttachmentModel, OcrAttachmentModel.digest == OcrResultModel.digest)
+            .where(OcrAttachmentModel.attachment_id == attachment_id),
+        )
+
+    def by_digest(self, image_digest: str) -> list[str] | None:
+        return self._get(
+            ('digest', image_digest),
+            select(OcrResultModel).where(OcrResultModel.digest == image_digest),
+        )
+
+    def _get(self, key: tuple[str, int | str], query: Select) -> list[str] | None:
+        result = self._memory.get(key)
+        if result is not None:
+            return list(result)
+        with self._session() as db:
+            row = db.execute(query.where(OcrResultModel.version == self._version).limit(1)).scalar_one_or_none()
+        if row is None:
+            return None
+        result = _decode(row.result)
+        self._memory.put(key, tuple(result))
+        return result
+
+    def put(self, image_digest: str, result: list[str], attachment_id: int | None = None) -> None:
+        """
+        A new result, the row of an image already stored is left as it is.
+        """
+        self._memory.put(('digest', image_digest), tuple(result))
+        self._store(OcrResultModel(digest=image_digest, version=self._version, result=_encode(result)))
+        if attachment_id is not None:
+            self.link(image_digest, result, attachment_id)
+
+    def link(self, image_digest: str, result: list[str], attachment_id: int) -> None:
+        """
+        `attachment_id` as another upload of an image already stored with `put`.
+        """
+        self._memory.put(('attachment', attachment_id), tuple(result))
+        self._store(OcrAttachmentModel(attachment_id=attachment_id, digest=image_digest))
+
+    def _store(self, row: OcrResultModel | OcrAttachmentModel) -> None:
+        model = type(row)
+        try:
+            with self._session() as db:
+                try:
+                    db.add(row)
+                    db.commit()
+                except IntegrityError:
+                    # stored before, possibly by another shard
+                    db.rollback()
+                    return None
+                oldest_kept = db.execute(
+                    select(model.id).order_by(model.id.desc()).offset(self._max_stored - 1).limit(1),
+                ).scalar_one_or_none()
+                if oldest_kept is not None:
+                    db.execute(delete(model).where(model.id < oldest_kept))
+                    db.commit()
+        except Exception as e:
+            # still cached in memory
+            logger.exception(e)
+
+    def stats(self) -> CacheStats:
+        """
+        Of the memory tier, misses there go to the database.
+        """
+        return self._memory.stats()
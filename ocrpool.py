@@ -0,0 +1,150 @@
+"""
+Blocking image processing (OpenCV, tesseract) run in worker processes, so that
+the bot keeps handling events meanwhile.
+"""
+from __future__ import annotations
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import NamedTuple
+
+from logger import get_logger
+
+
+logger = get_logger(__name__)
+
+# latencies of the last LATENCY_WINDOW jobs are kept for the stats
+LATENCY_WINDOW = 200
+
+
+class PoolSaturated(Exception):
+    pass
+
+
+class PoolStats(NamedTuple):
+    in_flight: int
+    completed: int
+    failed: int
+    timed_out: int
+    rejected: int
+    latency_p50: float
+    latency_p95: float
+    wait_p50: float
+
+    def __str__(self) -> str:
+        return (
+            f'{self.in_flight} in flight, {self.completed} done, {self.failed} failed, '
+            f'{self.timed_out} timed out, {self.rejected} rejected, '
+            f'latency p50 {self.latency_p50:.2f}s p95 {self.latency_p95:.2f}s, queue wait p50 {self.wait_p50:.2f}s'
+        )
+
+
+def _timed(func: Callable[..., Any], *args: Any) -> tuple[float, Any]:
+    return time.time(), func(*args)
+
+
+def _percentile(values: deque[float], share: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * share), len(ordered) - 1)]
+
+
+class OcrPool:
+    """
+    At most `processes` jobs run at a time and `max_queued` more wait for a worker,
+    anything beyond that is rejected with `PoolSaturated` instead of piling up.
+
+    A job which exceeds `timeout`, or whose caller is cancelled, is dropped from the
+    queue if it has not started yet. A started one cannot be interrupted, it finishes
+    in the background and keeps counting as in flight until then.
+    """
+
+    def __init__(self, processes: int, max_queued: int, timeout: float) -> None:
+        self.processes = processes
+        self.max_queued = max_queued
+        self.timeout = timeout
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._completed = 0
+        self._failed = 0
+        self._timed_out = 0
+        self._rejected = 0
+        self._latencies: deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._waits: deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context('spawn'),
+            )
+        return self._executor
+
+    async def run(self, func: Callable[..., Any], *args: Any) -> Any:
+        """
+        `func(*args)` in a worker, `func` and `args` have to be picklable.
+        Raises `PoolSaturated`, `asyncio.TimeoutError` or whatever `func` raised.
+        """
+        with self._lock:
+            if self._in_flight >= self.processes + self.max_queued:
+                self._rejected += 1
+                raise PoolSaturated
+            self._in_flight += 1
+        submitted = time.time()
+        start = time.perf_counter()
+        try:
+            future = self._get_executor().submit(_timed, func, *args)
+        except BaseException:
+            self._done(None)
+            raise
+        future.add_done_callback(self._done)
+        try:
+            started, result = await asyncio.wait_for(asyncio.wrap_future(future), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            with self._lock:
+                self._timed_out += 1
+            logger.warning('%s timed out after %ss', getattr(func, '__name__', func), self.timeout)
+            raise
+        except Exception:
+            with self._lock:
+                self._failed += 1
+            raise
+        finally:
+            # no-op for a job already running
+            future.cancel()
+        with self._lock:
+            self._completed += 1
+            self._latencies.append(time.perf_counter() - start)
+            self._waits.append(max(started - submitted, 0))
+        return result
+
+    def _done(self, future: Future | None) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def stats(self) -> PoolStats:
+        with self._lock:
+            return PoolStats(
+                in_flight=self._in_flight,
+                completed=self._completed,
+                failed=self._failed,
+                timed_out=self._timed_out,
+                rejected=self._rejected,
+                latency_p50=_percentile(self._latencies, 0.5),
+                latency_p95=_percentile(self._latencies, 0.95),
+                wait_p50=_percentile(self._waits, 0.5),
+            )
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,146 @@
+from __future__ import annotations
+
+import asyncio
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Awaitable
+from typing import Callable
+from typing import Union
+
+import discord
+
+from logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+EmojiKey = Union[int, str]
+MessageFetcher = Callable[[int, int], Awaitable[discord.Message]]
+
+MAX_TRACKED_MESSAGES = 10_000
+MAX_CONCURRENT_FETCHES = 2
+
+
+def emoji_key(emoji: discord.PartialEmoji | discord.Emoji | str) -> EmojiKey:
+    """
+    Custom emojis are identified by id, unicode ones by the character itself,
+    so that `payload.emoji` and `message.reactions[i].emoji` map to the same key.
+    """
+    if isinstance(emoji, str):
+        return emoji
+    if emoji.id is not None:
+        return emoji.id
+    return emoji.name
+
+
+@dataclass
+class ReactionState:
+    count: int = 0
+    me: bool = False
+
+
+class ReactionCounter:
+    """
+    In-memory reaction counts per (message, emoji), fed by raw gateway events.
+
+    A message we know nothing about has to be fetched once to learn its current
+    reactions, after that raw add/remove events keep the counts up to date.
+    Fetches are coalesced per message and limited to `max_concurrent_fetches`
+    at a time, tracked messages are evicted in LRU order.
+    """
+
+    def __init__(
+        self,
+        fetch: MessageFetcher,
+        *,
+        max_messages: int = MAX_TRACKED_MESSAGES,
+        max_concurrent_fetches: int = MAX_CONCURRENT_FETCHES,
+    ) -> None:
+        self._fetch = fetch
+        self._max_messages = max_messages
+        self._fetch_semaphore = asyncio.Semaphore(max_concurrent_fetches)
+        self._messages: OrderedDict[int, dict[EmojiKey, ReactionState]] = OrderedDict()
+        self._pending: dict[int, asyncio.Future[None]] = {}
+        self.fetch_count = 0
+
+    def __contains__(self, message_id: int) -> bool:
+        return message_id in self._messages
+
+    def __len__(self) -> int:
+        return len(self._messages)
+
+    def seed(self, message: discord.Message) -> None:
+        self._store(
+            message.id,
+            {
+                emoji_key(reaction.emoji): ReactionState(count=reaction.count, me=reaction.me)
+                for reaction in message.reactions
+            },
+        )
+
+    def get(self, message_id: int, emoji: discord.PartialEmoji | str) -> ReactionState | None:
+        reactions = self._messages.get(message_id)
+        if reactions is None:
+            return None
+        self._messages.move_to_end(message_id)
+        return reactions.setdefault(emoji_key(emoji), ReactionState())
+
+    def add(self, message_id: int, emoji: discord.PartialEmoji | str, *, me: bool = False) -> ReactionState | None:
+        state = self.get(message_id, emoji)
+        if state is None:
+            return None
+        state.count += 1
+        state.me = state.me or me
+        return state
+
+    def remove(self, message_id: int, emoji: discord.PartialEmoji | str, *, me: bool = False) -> ReactionState | None:
+        state = self.get(message_id, emoji)
+        if state is None:
+            return None
+        state.count = max(state.count - 1, 0)
+        if me:
+            state.me = False
+        return state
+
+    def clear(self, message_id: int, emoji: discord.PartialEmoji | str | None = None) -> None:
+        if emoji is None:
+            self._messages.pop(message_id, None)
+            return None
+        reactions = self._messages.get(message_id)
+        if reactions is not None:
+            reactions.pop(emoji_key(emoji), None)
+
+    async def resolve(
+        self,
+        channel_id: int,
+        message_id: int,
+        emoji: discord.PartialEmoji | str,
+    ) -> ReactionState:
+        """
+        Fallback for messages which are not tracked yet. The fetched message already
+        includes the reaction that triggered the lookup, so the count is not incremented.
+        """
+        if message_id not in self._messages:
+            pending = self._pending.get(message_id)
+            if pending is None:
+                pending = asyncio.ensure_future(self._fetch_and_seed(channel_id, message_id))
+                self._pending[message_id] = pending
+                pending.add_done_callback(lambda _: self._pending.pop(message_id, None))
+            await asyncio.shield(pending)
+        state = self.get(message_id, emoji)
+        assert state is not None
+        return state
+
+    async def _fetch_and_seed(self, channel_id: int, message_id: int) -> None:
+        async with self._fetch_semaphore:
+            logger.debug('fetching message %s to learn its reactions', message_id)
+            self.fetch_count += 1
+            message = await self._fetch(channel_id, message_id)
+        self.seed(message)
+
+    def _store(self, message_id: int, reactions: dict[EmojiKey, ReactionState]) -> None:
+        self._messages[message_id] = reactions
+        self._messages.move_to_end(message_id)
+        while len(self._messages) > self._max_messages:
+            self._messages.popitem(last=False)
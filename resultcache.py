@@ -0,0 +1,88 @@
+from __future__ import annotations
+
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any
+from typing import Hashable
+from typing import NamedTuple
+
+import numpy as np
+
+
+MAX_ENTRIES = 256
+MAX_BYTES = 64 * 2 ** 20
+
+
+class CacheStats(NamedTuple):
+    hits: int
+    misses: int
+    entries: int
+    bytes: int
+
+    def __str__(self) -> str:
+        lookups = self.hits + self.misses
+        ratio = 100 * self.hits / lookups if lookups else 0
+        return f'{self.hits}/{lookups} hits ({ratio:.0f}%), {self.entries} entries, {self.bytes / 2 ** 20:.1f} MiB'
+
+
+def size_of(value: Any) -> int:
+    """
+    Rough memory footprint of solver results: arrays, strings and (nested) lists or tuples of them.
+    """
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(size_of(item) for item in value)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """
+    LRU of solver results, bounded both by the number of entries and their total size.
+    A single result bigger than `max_bytes` is not cached at all.
+    """
+
+    def __init__(self, max_entries: int = MAX_ENTRIES, max_bytes: int = MAX_BYTES) -> None:
+        self._max_entries = max_entries
+        self._max_bytes = max_bytes
+        self._entries: OrderedDict[Hashable, tuple[Any, int]] = OrderedDict()
+        self._bytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._hits += 1
+            self._entries.move_to_end(key)
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = size_of(value)
+        if size > self._max_bytes:
+            return None
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self._max_entries or self._bytes > self._max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(hits=self._hits, misses=self._misses, entries=len(self._entries), bytes=self._bytes)
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+from typing import Any
+from typing import Iterable
+
+import pendulum
+
+from logger import get_logger
+from utils import next_call_timestamp
+
+
+logger = get_logger(__name__)
+
+
+class Scheduler:
+    """
+    Runs functions decorated with `run_every`/`daily` at their due time.
+
+    Due timestamps are kept in a heap, so the loop sleeps exactly until the
+    nearest one and rescheduling a job costs O(log n). `condition` is checked
+    only when the job is due; if it does not hold, that occurrence is skipped.
+    """
+
+    def __init__(self, commands: Iterable[Any] = (), now: pendulum.DateTime | None = None) -> None:
+        self._heap: list[tuple[pendulum.DateTime, int, Any]] = []
+        self._counter = itertools.count()
+        self._wakeup: asyncio.Event | None = None
+        for command in commands:
+            self.add(command, now=now)
+
+    def __len__(self) -> int:
+        return len(self._heap)
+
+    def add(self, command: Any, now: pendulum.DateTime | None = None) -> pendulum.DateTime:
+        if now is None:
+            now = pendulum.now(pendulum.UTC)
+        when = next_call_timestamp(now, command.scheduled_at, command.scheduled_every)
+        self._push(when, command)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return when
+
+    def next_fire_times(self) -> list[tuple[str, pendulum.DateTime]]:
+        return [
+            (command.__name__, when)
+            for when, _, command in sorted(self._heap)
+        ]
+
+    def next_deadline(self) -> pendulum.DateTime | None:
+        if not self._heap:
+            return None
+        return self._heap[0][0]
+
+    def pop_due(self, now: pendulum.DateTime) -> list[Any]:
+        """
+        Removes every job which is due at `now` and puts it back at its next
+        occurrence. Occurrences missed while the bot was busy are not replayed.
+        """
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            when, _, command = heapq.heappop(self._heap)
+            while when <= now:
+                when = when + command.scheduled_every
+            self._push(when, command)
+            due.append(command)
+        return due
+
+    async def run(self, client: Any) -> None:
+        self._wakeup = asyncio.Event()
+        while True:
+            try:
+                now = pendulum.now(pendulum.UTC)
+                for command in self.pop_due(now):
+                    if command.condition is not None and not command.condition(now):
+                        logger.debug('%s: condition not fulfilled, skipping', command.__name__)
+                        continue
+                    await asyncio.create_task(command(context=None, client=client))
+                await self._sleep_until(self.next_deadline())
+            except Exception as e:
+                logger.exception(e)
+
+    async def _sleep_until(self, deadline: pendulum.DateTime | None) -> None:
+        assert self._wakeup is not None
+        timeout = None
+        if deadline is not None:
+            timeout = max((deadline - pendulum.now(pendulum.UTC)).total_seconds(), 0)
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+        except asyncio.TimeoutError:
+            pass
+
+    def _push(self, when: pendulum.DateTime, command: Any) -> None:
+        heapq.heappush(self._heap, (when, next(self._counter), command))
@@ -10,14 +10,31 @@ PREFIX = getenv('PREFIX', default='!')
 COMMON_PREFIXES = ('!', '$', ';')
 BETA_PREFIX = ';'
 
-DB_URI = 'sqlite:///sbotq.db'
+DB_URI = getenv('DB_URI', default='sqlite:///sbotq.db')
+DIFFLE_BEST_PROCESSES = 2
+DIFFLE_BEST_TIME_BUDGET = 5
+DIFFLE_SESSION_TTL = 60 * 60
 DISCORD_MESSAGE_LIMIT = 2000
 MARKOV_MIN_WORD_COUNT = 3
+# dflocr jobs running at once, waiting for a worker on top of them and seconds given to each
+OCR_PROCESSES = getenv('OCR_PROCESSES', as_=int, default=1)
+OCR_MAX_QUEUED = 4
+OCR_TIMEOUT = 60
 RANDOM_MARKOV_MESSAGE_CHANCE = 0.0007
 RANDOM_MARKOV_MESSAGE_COUNT = 4
+RANDOM_MARKOV_MESSAGE_INTERVAL = 60
 TOKEN = getenv('TOKEN')
+# processes scanning the diffle/difflanek dictionaries, 1 scans in the bot process
+WORD_SCAN_PROCESSES = getenv('WORD_SCAN_PROCESSES', as_=int, default=1)
+
+# 0 runs a single unsharded client, otherwise see sharding.launch
+SHARD_COUNT = getenv('SHARD_COUNT', as_=int, default=0)
+SHARD_IDS = [int(id) for id in getenv('SHARD_IDS', default=';').split(';') if id]
+SHARD_PROCESSES = getenv('SHARD_PROCESSES', as_=int, default=1)
+SHARD_STARTUP_DELAY = 5
 
 
 logger.info('============================== SETTINGS ==============================')
 logger.info(f'PREFIX={PREFIX!r}')
+logger.info(f'SHARD_COUNT={SHARD_COUNT!r} SHARD_IDS={SHARD_IDS!r} SHARD_PROCESSES={SHARD_PROCESSES!r}')
 logger.info('======================================================================')
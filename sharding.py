@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import multiprocessing
+import time
+
+import ingestion
+import settings
+from client import ShardedClient
+from logger import get_logger
+
+
+logger = get_logger(__name__)
+
+
+def shard_groups(shard_ids: list[int], processes: int) -> list[list[int]]:
+    """
+    Splits shard ids into at most `processes` contiguous, evenly sized groups.
+    """
+    processes = max(1, min(processes, len(shard_ids)))
+    return [
+        shard_ids[i * len(shard_ids) // processes:(i + 1) * len(shard_ids) // processes]
+        for i in range(processes)
+    ]
+
+
+def run_shard_group(
+    shard_ids: list[int],
+    shard_count: int,
+    queue: multiprocessing.Queue | None = None,
+) -> None:
+    ingestion.set_queue(queue)
+    logger.info('starting shards %s/%s', shard_ids, shard_count)
+    client = ShardedClient(shard_ids=shard_ids, shard_count=shard_count)
+    client.run(settings.TOKEN)
+
+
+def launch() -> int:
+    """
+    Runs SHARD_IDS (all shards by default) split across SHARD_PROCESSES processes.
+
+    With more than one process markov ingestion goes through a queue to a single
+    writer process, shard processes only read from the database.
+    """
+    shard_ids = settings.SHARD_IDS or list(range(settings.SHARD_COUNT))
+    groups = shard_groups(shard_ids, settings.SHARD_PROCESSES)
+    if len(groups) == 1:
+        run_shard_group(groups[0], settings.SHARD_COUNT)
+        return 0
+
+    ctx = multiprocessing.get_context('spawn')
+    queue = ctx.Queue()
+    writer = ctx.Process(target=ingestion.writer, args=(queue,), name='ingestion-writer')
+    writer.start()
+    processes = []
+    try:
+        for i, group in enumerate(groups):
+            if i > 0:
+                # identifying too many shards at once gets rate limited by discord
+                time.sleep(settings.SHARD_STARTUP_DELAY)
+            process = ctx.Process(
+                target=run_shard_group,
+                args=(group, settings.SHARD_COUNT, queue),
+                name=f'shards-{group[0]}-{group[-1]}',
+            )
+            process.start()
+            processes.append(process)
+        for process in processes:
+            process.join()
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+        queue.put(None)
+        writer.join()
+    return 0
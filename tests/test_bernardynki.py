@@ -1,6 +1,8 @@
 import pendulum
+import pytest
 
 from bernardynki import Bernardynki
+from bernardynki import Schedule
 
 
 def test_first():
@@ -34,3 +36,101 @@ def test_next_after():
     assert b.when.date() == pendulum.DateTime(2024, 3, 13).date()
     assert b.count == 26
     assert b.great
+
+
+REFERENCE_COUNT = 20_000
+
+
+@pytest.fixture(scope='module')
+def reference_dates():
+    """
+    The original month by month walk from FIRST_WHEN, long enough to cross a cycle.
+    """
+    when = Bernardynki.FIRST_WHEN
+    dates = []
+    for _ in range(REFERENCE_COUNT):
+        dates.append(when.date())
+        when = when.add(months=1, days=1)
+    return dates
+
+
+def _reference_great(when):
+    b = Bernardynki.FIRST_WHEN
+    while b < when:
+        b = b.add(years=1, months=1)
+    return (b.year, b.month) == (when.year, when.month)
+
+
+def test_from_count_matches_iterative_walk(reference_dates):
+    for count, expected in enumerate(reference_dates, start=1):
+        assert Bernardynki.from_count(count).when.date() == expected
+
+
+def test_next_after_matches_iterative_walk(reference_dates):
+    day = pendulum.DateTime(2021, 12, 1)
+    count = 1
+    while day.year < 2035:
+        while reference_dates[count - 1] < day.date():
+            count += 1
+        b = Bernardynki.next_after(day)
+        assert (b.count, b.when.date()) == (count, reference_dates[count - 1])
+        day = day.add(days=1)
+
+
+def test_next_after_far_future(reference_dates):
+    for count in (18_570, 18_571, 18_572, 19_999):
+        day = pendulum.DateTime(*reference_dates[count - 1].timetuple()[:3])
+        assert Bernardynki.next_after(day).count == count
+        assert Bernardynki.next_after(day.add(days=1)).count == count + 1
+
+
+def test_great_matches_iterative_walk():
+    for count in range(1, 1000):
+        b = Bernardynki.from_count(count)
+        assert b.great == _reference_great(b.when)
+
+
+def test_add_and_subtract():
+    b = Bernardynki.first
+    b += 500
+    assert b.count == 501
+    assert (b - 500).when == Bernardynki.first.when
+    b -= 1
+    assert b.when == Bernardynki.from_count(500).when
+
+
+def test_before_first():
+    b = Bernardynki.first - 2
+    assert b.count == -1
+    assert b.when == Bernardynki.FIRST_WHEN.subtract(months=1, days=1).subtract(months=1, days=1)
+
+
+def test_schedule_matches_bernardynki():
+    schedule = Schedule()
+    day = pendulum.datetime(2022, 1, 1, tz=pendulum.UTC)
+    while day.year < 2026:
+        b = Bernardynki.next_after(day)
+        occurrence = schedule.next_after(day)
+        assert (occurrence.when, occurrence.number, occurrence.great) == (b.when, b.count, b.great)
+        day = day.add(days=1)
+
+
+def test_schedule_prev_before():
+    schedule = Schedule()
+    assert schedule.prev_before(pendulum.datetime(2022, 1, 16, tz=pendulum.UTC)) is None
+    assert schedule.prev_before(pendulum.datetime(2024, 3, 13, tz=pendulum.UTC)).number == 25
+    assert schedule.prev_before(pendulum.datetime(2024, 3, 14, tz=pendulum.UTC)).number == 26
+
+
+def test_schedule_between():
+    schedule = Schedule()
+    occurrences = schedule.between(
+        pendulum.datetime(2024, 1, 1, tz=pendulum.UTC),
+        pendulum.datetime(2024, 12, 31, tz=pendulum.UTC),
+    )
+    assert [o.when.year for o in occurrences] == [2024] * len(occurrences)
+    assert [o.number for o in occurrences] == list(range(occurrences[0].number, occurrences[-1].number + 1))
+    assert schedule.prev_before(occurrences[0].when).when.year == 2023
+    assert schedule.next_after(occurrences[-1].when.add(days=1)).when.year == 2025
+
+    assert [o.number for o in schedule.between(pendulum.datetime(2024, 3, 13), pendulum.datetime(2024, 3, 13))] == [26]
@@ -35,3 +35,24 @@ def test_symbol():
         Token.from_type(type=TokenType.EOF,        lexeme='',    literal=None, pos='0:4'),
     ]
     assert scanner.errors == []
+
+
+def test_multiline_positions():
+    scanner = Scanner(source='(defun f (x)\n  (print "a\nb" x))\n')
+    scanner.scan_tokens()
+    assert scanner.tokens == [
+        Token.from_type(type=TokenType.LEFT_PAREN,  lexeme='(',                        pos='0:0'),
+        Token.from_type(type=TokenType.DEFUN,       lexeme='defun',                    pos='0:1,0:5'),
+        Token.from_type(type=TokenType.FALSE,       lexeme='f',                        pos='0:7'),
+        Token.from_type(type=TokenType.LEFT_PAREN,  lexeme='(',                        pos='0:9'),
+        Token.from_type(type=TokenType.IDENTIFIER,  lexeme='x',                        pos='0:10'),
+        Token.from_type(type=TokenType.RIGHT_PAREN, lexeme=')',                        pos='0:11'),
+        Token.from_type(type=TokenType.LEFT_PAREN,  lexeme='(',                        pos='1:3'),
+        Token.from_type(type=TokenType.IDENTIFIER,  lexeme='print',                    pos='1:4,1:8'),
+        Token.from_type(type=TokenType.STRING,      lexeme='"a\nb"', literal='a\nb',   pos='1:10,2:2'),
+        Token.from_type(type=TokenType.IDENTIFIER,  lexeme='x',                        pos='2:4'),
+        Token.from_type(type=TokenType.RIGHT_PAREN, lexeme=')',                        pos='2:5'),
+        Token.from_type(type=TokenType.RIGHT_PAREN, lexeme=')',                        pos='2:6'),
+        Token.from_type(type=TokenType.EOF,                                            pos='1:31'),
+    ]
+    assert scanner.errors == []
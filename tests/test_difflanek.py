@@ -0,0 +1,63 @@
+import pytest
+
+from difflanek import difflanek
+from wordmatrix import WordMatrix
+
+
+@pytest.fixture
+def matrix():
+    yield WordMatrix(['kot', 'koty', 'kto', 'płot', 'żaba', 'okno', 'oko', 'Kraków', 'kotek', 'łoś', 'pies'])
+
+
+@pytest.mark.parametrize(
+    ('words', 'is_polish_word', 'expected'),
+    [
+        (['[k)'], False, ['kot', 'kto', 'koty']),
+        (['(o]'], False, ['kto']),
+        (['[ko)', '(t]'], False, ['kot']),
+        (['O'], False, ['kot', 'kto', 'oko', 'koty', 'okno', 'kotek']),
+        (['okO'], False, []),
+        (['(o)'], True, ['łoś', 'płot']),
+        (['Kot'], False, []),
+        (['(o)T'], False, ['kto']),
+        # regex syntax in a green chunk, checked with the regex
+        (['(k.)'], False, ['okno']),
+    ],
+)
+def test_find_solution(matrix, words, is_polish_word, expected):
+    assert difflanek.find_solution(words, is_polish_word, matrix) == expected
+
+
+def test_compile_guesses():
+    constraints = difflanek.compile_guesses(['[k)tO', '(o]'], False)
+    assert constraints.min_length == 2
+    assert constraints.letter_counts == (difflanek.LetterCount('o', 1, False),)
+    first, second = constraints.templates
+    assert first.elements == (difflanek.Literal('k'), difflanek.Gap('o', 0, None))
+    assert second.elements == (difflanek.Gap('o', 1, 1), difflanek.Gap('', 0, None), difflanek.Literal('o'))
+    assert difflanek.compile_guesses(['(k.)'], False).templates[0].elements is None
+
+
+def test_dictionary(tmp_path, monkeypatch):
+    path = tmp_path / 'pl_PL.dic'
+    path.write_text('3\nkot/a\nkto\noko/xyz\n', encoding='iso-8859-2')
+    monkeypatch.setattr(difflanek, '_dictionary', None)
+    monkeypatch.setattr(difflanek, 'DICT_PATH', str(path))
+
+    dictionary = difflanek.get_dictionary()
+    assert difflanek.get_dictionary() is dictionary
+    # the trailing empty lines the loader reads past the word count
+    assert difflanek.get_total_count() == 12
+    assert dictionary.matrix.take(dictionary.bucket(3)) == ['kot', 'kto', 'oko']
+    assert dictionary.bucket(4).tolist() == []
+    assert difflanek.find_solution(['(o]'], False) == ['kto']
+
+    assert difflanek.find_solution(['(o]', '(o]'], False) == ['kto']
+    assert difflanek.result_stats()[:3] == (1, 1, 1)
+
+    path.write_text('1\nkoty\n', encoding='iso-8859-2')
+    reloaded = difflanek.reload_dictionary()
+    assert difflanek.get_dictionary() is reloaded
+    assert reloaded.matrix.take(reloaded.bucket(4)) == ['koty']
+    assert len(dictionary.results) == 0
+    assert difflanek.find_solution(['(o]'], False) == []
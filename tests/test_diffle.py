@@ -38,3 +38,177 @@ def test_yellow(one_word_dict, guess):
     solver.guess(guess)
     matches = solver.get_matches(polish=False)
     assert matches == ['niedowierzanie']
+
+
+def test_compiled_dict(tmp_path):
+    source = tmp_path / 'pl.dic'
+    source.write_text('Żółw\nkot\nkot\nab\nx\nniedowierzanie\nżaba\n')
+    target = tmp_path / 'pl.dic.bin'
+    diffle.compile_dict(str(source), str(target))
+    assert sorted(path.name for path in tmp_path.iterdir()) == ['pl.dic', 'pl.dic.bin']
+
+    packed = diffle.PackedDictionary(str(target))
+    assert list(packed) == diffle.get_dict(str(source)) == ['ab', 'kot', 'żaba', 'żółw', 'niedowierzanie']
+    assert len(packed) == 5
+    assert packed[2] == 'żaba'
+    assert packed[-1] == 'niedowierzanie'
+    assert packed.words_of_length(4) == ['żaba', 'żółw']
+    assert packed.words_of_length(5) == []
+    assert packed.bucket(3) == range(1, 2)
+
+
+@pytest.fixture
+def small_dict():
+    yield ['ab', 'kot', 'kto', 'koty', 'płot', 'żaba', 'żółw', 'ziemniak', 'niedowierzanie']
+
+
+@Parametrization.autodetect_parameters()
+@Parametrization.case(name='green', guesses=['(ot)'], expected=['kot', 'koty', 'płot'])
+@Parametrization.case(name='left_anchor', guesses=['[k)'], expected=['kot', 'kto', 'koty'])
+@Parametrization.case(name='right_anchor', guesses=['(a]'], expected=['żaba'])
+@Parametrization.case(name='narrowing', guesses=['(k)', '(o)(y]'], expected=['koty'])
+@Parametrization.case(name='letter_missing_from_dict', guesses=['(q)'], expected=[])
+@Parametrization.case(name='regex_syntax', guesses=['(k.t)'], expected=['kot', 'koty'])
+@Parametrization.case(
+    name='no_greens',
+    guesses=['xyz'],
+    expected=['ab', 'kot', 'kto', 'koty', 'płot', 'żaba', 'żółw', 'ziemniak', 'niedowierzanie'],
+)
+def test_indexed_matches(small_dict, guesses, expected):
+    solver = diffle.Solver(small_dict)
+    for guess in guesses:
+        solver.guess(guess)
+    assert solver.get_matches() == expected
+
+
+def test_incremental_guesses(small_dict):
+    solver = diffle.Solver(small_dict)
+    solver.guess('(k)')
+    assert solver.get_matches() == ['kot', 'kto', 'koty', 'ziemniak']
+    solver.guess('(o)(y]')
+    assert solver.get_matches() == ['koty']
+    assert solver.guesses == ['(k)', '(o)(y]']
+
+
+def test_invalid_guess_is_dropped(small_dict):
+    solver = diffle.Solver(small_dict)
+    solver.guess('(k)')
+    solver.guess('(o')
+    with pytest.raises(diffle.InvalidSyntaxException):
+        solver.get_matches()
+    assert solver.guesses == ['(k)']
+    assert solver.get_matches() == ['kot', 'kto', 'koty', 'ziemniak']
+
+
+@Parametrization.autodetect_parameters()
+@Parametrization.case(name='uppercase_in_green', guess='a(B)')
+@Parametrization.case(name='nested_parens', guess='((k))')
+@Parametrization.case(name='bad_regex', guess='(k)(*)')
+def test_malformed_guess_is_dropped(small_dict, guess):
+    solver = diffle.Solver(small_dict)
+    solver.guess(guess)
+    with pytest.raises(diffle.InvalidSyntaxException):
+        solver.get_matches()
+    assert solver.guesses == []
+    solver.guess('(k)')
+    assert solver.get_matches() == ['kot', 'kto', 'koty', 'ziemniak']
+
+
+def test_sessions(small_dict, monkeypatch):
+    now = 1000.0
+    monkeypatch.setattr(diffle.time, 'monotonic', lambda: now)
+    sessions = diffle.SolverSessions(lambda: small_dict, ttl=60)
+
+    solver = sessions.get(('user', 'channel'))
+    assert sessions.get(('user', 'channel')) is solver
+    assert sessions.get(('other', 'channel')) is not solver
+    assert len(sessions) == 2
+
+    now += 30
+    sessions.get(('user', 'channel'))
+    now += 45
+    assert len(sessions) == 1
+    assert sessions.get(('user', 'channel')) is solver
+
+    assert sessions.reset(('user', 'channel'))
+    assert not sessions.reset(('user', 'channel'))
+    assert sessions.get(('user', 'channel')) is not solver
+
+
+def test_feedback_keys(small_dict):
+    answers, lengths = diffle.encode_words(small_dict)
+    keys = dict(zip(small_dict, diffle.feedback_keys('kot', answers, lengths)))
+    # [kot] and [kot)y differ only by the right anchor, (k)(t) for kto
+    assert keys['kot'] != keys['koty']
+    assert keys['kot'] - keys['koty'] == 1
+    assert len({keys['kot'], keys['koty'], keys['kto'], keys['płot']}) == 4
+    # nothing green
+    assert keys['ab'] == keys['żaba'] == keys['żółw'] == 0
+
+
+def test_best_guesses(small_dict):
+    ranked, complete = diffle.best_guesses(small_dict, top=3)
+    assert complete
+    assert len(ranked) == 3
+    assert ranked == sorted(ranked, key=lambda guess: -guess.entropy)
+    answers, lengths = diffle.encode_words(small_dict)
+    assert ranked[0].entropy == max(diffle.guess_entropy(word, answers, lengths) for word in small_dict)
+    assert all(guess.possible_answer for guess in ranked)
+
+
+def test_best_guesses_out_of_time(small_dict):
+    ranked, complete = diffle.best_guesses(small_dict, budget=0)
+    assert not complete
+    assert ranked == []
+
+
+def test_best_guesses_executor(small_dict):
+    from concurrent.futures import ThreadPoolExecutor
+
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        ranked, complete = diffle.best_guesses(small_dict, guesses=['kot', 'qqq'], executor=executor)
+    assert complete
+    assert [guess.word for guess in ranked] == ['kot', 'qqq']
+    assert not ranked[1].possible_answer
+    assert ranked[1].entropy == 0
+
+
+def test_best_guesses_out_of_time_in_executor(small_dict, monkeypatch):
+    from concurrent.futures import ThreadPoolExecutor
+
+    monkeypatch.setattr(diffle, 'SCORING_BATCH_SIZE', 1)
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        submit = executor.submit
+        submitted = []
+
+        def _submit(*args):
+            submitted.append(args)
+            return submit(*args)
+
+        monkeypatch.setattr(executor, 'submit', _submit)
+        ranked, complete = diffle.best_guesses(small_dict, budget=0, executor=executor, workers=2)
+    assert not complete
+    # no batches queued up behind the deadline
+    assert len(submitted) == 2
+
+
+def test_cached_results(tmp_path, small_dict):
+    source = tmp_path / 'pl.dic'
+    source.write_text('\n'.join(small_dict))
+    diffle.compile_dict(str(source), str(tmp_path / 'pl.dic.bin'))
+    packed = diffle.PackedDictionary(str(tmp_path / 'pl.dic.bin'))
+
+    solver = diffle.Solver(packed)
+    solver.guess('(k)')
+    solver.guess('(o)(y]')
+    assert solver.get_matches() == ['koty']
+    assert packed.results.stats().misses == 1
+
+    # same guesses in another order
+    other = diffle.Solver(packed)
+    other.guess('(o)(y]')
+    other.guess('(k)')
+    assert other.get_matches() == ['koty']
+    assert packed.results.stats().hits == 1
+    other.guess('[k)')
+    assert other.get_matches() == ['koty']
@@ -0,0 +1,69 @@
+import cv2
+import numpy as np
+import pytest
+
+from difflanek import glyphs
+from difflanek import opencv
+
+
+def render(text, scale=2.0):
+    mask = np.zeros((int(40 * scale), int(40 * scale) * len(text)), dtype=np.uint8)
+    cv2.putText(mask, text, (int(8 * scale), int(30 * scale)), cv2.FONT_HERSHEY_SIMPLEX, scale, 255, int(2 * scale))
+    return mask
+
+
+@pytest.fixture
+def classifier():
+    classifier = glyphs.GlyphClassifier()
+    assert classifier.learn(render('KOT'), 'KOT')
+    yield classifier
+
+
+def test_split_glyphs():
+    mask = render('KOT')
+    mask[0, 0] = 255
+    assert len(glyphs.split_glyphs(mask)) == 3
+    assert glyphs.split_glyphs(np.zeros((10, 10), dtype=np.uint8)) == []
+
+
+def test_classify(classifier):
+    assert len(classifier) == 3
+    assert classifier.classify(render('TOK')) == 'TOK'
+    assert classifier.classify(render('TOK', scale=2.5)) is None
+    assert classifier.classify(render('W')) is None
+    assert glyphs.GlyphClassifier().classify(render('K')) is None
+
+
+def test_learn_rejects_wrong_labels(classifier):
+    assert not classifier.learn(render('KOT'), 'KO')
+    assert classifier.learn(render('KOT'), 'KOT')
+    assert len(classifier) == 3
+
+
+def test_match_is_cached(classifier):
+    glyph = glyphs.split_glyphs(render('O'))[0]
+    assert classifier.match(glyph) is classifier.match(glyph)
+
+
+def test_save_and_load(classifier, tmp_path):
+    path = str(tmp_path / 'glyphs.npz')
+    classifier.save(path)
+    loaded = glyphs.GlyphClassifier.load(path)
+    assert loaded.letters == classifier.letters
+    assert (loaded.templates == classifier.templates).all()
+    assert len(glyphs.GlyphClassifier.load(str(tmp_path / 'missing.npz'))) == 0
+
+
+def test_recognise_falls_back_to_tesseract(classifier, monkeypatch):
+    calls = []
+
+    def detect_texts(images, restrict_characters):
+        calls.append(len(images))
+        return ['?'] * len(images)
+
+    monkeypatch.setattr(opencv, 'detect_texts', detect_texts)
+    masks = [opencv.Img(image=render(text)) for text in ('KOT', 'W', 'TO')]
+    assert opencv.recognise(masks, classifier) == ['KOT', '?', 'TO']
+    assert calls == [1]
+    assert opencv.recognise(masks[:1], classifier) == ['KOT']
+    assert calls == [1]
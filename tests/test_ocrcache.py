@@ -0,0 +1,72 @@
+import contextlib
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import ocrcache
+from database import Base
+from models import OcrAttachmentModel
+from models import OcrResultModel
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    factory = sessionmaker(bind=engine)
+
+    @contextlib.contextmanager
+    def _session():
+        db = factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    yield _session
+
+
+def test_memory_and_database(session):
+    cache = ocrcache.OcrCache(session=session)
+    image_digest = ocrcache.digest(b'screenshot')
+    assert cache.by_digest(image_digest) is None
+    cache.put(image_digest, ['[kot)', 'Ala'], attachment_id=1)
+    assert cache.by_attachment(1) == ['[kot)', 'Ala']
+    assert cache.by_digest(image_digest) == ['[kot)', 'Ala']
+    assert cache.stats().hits == 2
+
+    restarted = ocrcache.OcrCache(session=session)
+    assert restarted.by_attachment(1) == ['[kot)', 'Ala']
+    assert restarted.by_attachment(2) is None
+    restarted.put(ocrcache.digest(b'empty board'), [], attachment_id=2)
+    assert ocrcache.OcrCache(session=session).by_attachment(2) == []
+
+
+def test_other_version_is_ignored(session):
+    ocrcache.OcrCache(session=session, version=1).put('abc', ['kot'], attachment_id=1)
+    cache = ocrcache.OcrCache(session=session, version=2)
+    assert cache.by_attachment(1) is None
+    assert cache.by_digest('abc') is None
+
+
+def test_reuploads_are_stored_once(session):
+    cache = ocrcache.OcrCache(session=session)
+    cache.put('abc', ['kot'], attachment_id=1)
+    cache.link('abc', ['kot'], attachment_id=2)
+    # another shard read the same image meanwhile
+    ocrcache.OcrCache(session=session).put('abc', ['kot'], attachment_id=3)
+    with session() as db:
+        assert db.query(OcrResultModel).count() == 1
+        assert db.query(OcrAttachmentModel).count() == 3
+    assert ocrcache.OcrCache(session=session).by_attachment(2) == ['kot']
+
+
+def test_old_rows_are_deleted(session):
+    cache = ocrcache.OcrCache(session=session, max_stored=2)
+    for i in range(4):
+        cache.put(str(i), [str(i)], attachment_id=i)
+    with session() as db:
+        assert [row.digest for row in db.query(OcrResultModel)] == ['2', '3']
+        assert [row.attachment_id for row in db.query(OcrAttachmentModel)] == [2, 3]
+    assert ocrcache.OcrCache(session=session).by_digest('0') is None
@@ -0,0 +1,45 @@
+import asyncio
+import operator
+import time
+
+import pytest
+
+import ocrpool
+
+
+def test_run():
+    pool = ocrpool.OcrPool(processes=1, max_queued=0, timeout=60)
+
+    async def _inner():
+        assert await pool.run(operator.add, 2, 3) == 5
+        with pytest.raises(ZeroDivisionError):
+            await pool.run(operator.truediv, 1, 0)
+
+    try:
+        asyncio.run(_inner())
+    finally:
+        pool.close()
+    stats = pool.stats()
+    assert (stats.in_flight, stats.completed, stats.failed) == (0, 1, 1)
+
+
+def test_saturated_and_timed_out():
+    pool = ocrpool.OcrPool(processes=1, max_queued=1, timeout=60)
+
+    async def _inner():
+        # start the worker first, so that the timeout is not spent on spawning it
+        await pool.run(operator.add, 0, 0)
+        pool.timeout = 0.5
+        jobs = [asyncio.ensure_future(pool.run(time.sleep, 2)) for _ in range(2)]
+        await asyncio.sleep(0)
+        with pytest.raises(ocrpool.PoolSaturated):
+            await pool.run(time.sleep, 0)
+        return await asyncio.gather(*jobs, return_exceptions=True)
+
+    try:
+        results = asyncio.run(_inner())
+    finally:
+        pool.close()
+    assert all(isinstance(result, asyncio.TimeoutError) for result in results)
+    stats = pool.stats()
+    assert (stats.completed, stats.timed_out, stats.rejected) == (1, 2, 1)
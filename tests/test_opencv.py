@@ -0,0 +1,136 @@
+import random
+
+import cv2
+import numpy as np
+import pytest
+
+from difflanek import opencv
+
+
+@pytest.fixture
+def image():
+    bgr = np.zeros((20, 30, 3), dtype=np.uint8)
+    bgr[:] = (0x22, 0x22, 0x22)
+    # a green tile with a white letter-ish blob
+    bgr[5:15, 5:25] = (0x61, 0xB0, 0x4F)
+    bgr[8:12, 12:16] = (0xFF, 0xFF, 0xFF)
+    yield opencv.Img(image=bgr)
+
+
+def test_conversions_are_cached(image):
+    assert image.rgb is image.rgb
+    assert image.hsv is image.hsv
+    assert image.grayscale is image.grayscale
+
+
+def test_subimage_shares_conversions(image):
+    rgb = image.rgb
+    contour = np.array([[[5, 5]], [[24, 5]], [[24, 14]], [[5, 14]]])
+    tile = image.get_subimage(contour)
+    assert np.shares_memory(tile.image, image.image)
+    assert np.shares_memory(tile.rgb, rgb)
+    assert (tile.rgb == cv2.cvtColor(tile.image, cv2.COLOR_BGR2RGB)).all()
+    assert 'hsv' not in tile.__dict__
+    assert (tile.hsv == cv2.cvtColor(tile.image, cv2.COLOR_BGR2HSV)).all()
+
+
+def test_get_mask(image):
+    mask = image.get_mask([opencv.GREEN, (opencv.Colour('#F0F0F0'), opencv.Colour('#FFFFFF'))])
+    assert mask.image.dtype == np.uint8
+    assert (mask.image[5:15, 5:25] == 255).all()
+    assert mask.image.sum() == 255 * 10 * 20
+    assert (image.get_mask(opencv.GREEN, negate=True).image[8:12, 12:16] == 255).all()
+
+
+def test_most_common_colour(image):
+    assert image.most_common_colour() == opencv.BACKGROUND
+
+
+def test_most_common_colour_tie_goes_to_first_pixel():
+    bgr = np.zeros((2, 2, 3), dtype=np.uint8)
+    bgr[0, 0] = bgr[1, 1] = (0x46, 0x94, 0xB2)
+    bgr[0, 1] = bgr[1, 0] = (0x61, 0xB0, 0x4F)
+    assert opencv.Img(image=bgr).most_common_colour() == opencv.YELLOW
+    assert opencv.Img(image=bgr[:, ::-1]).most_common_colour() == opencv.GREEN
+
+
+def test_detect_texts_single_tesseract_run(monkeypatch):
+    calls = []
+
+    def image_to_data(strip, config, lang, output_type):
+        # every image is filled with its letter, report it as a word where it was stitched
+        calls.append(config)
+        data = {'text': [''], 'left': [0], 'top': [0], 'height': [strip.shape[0]]}
+        ys, xs = np.nonzero(strip)
+        for value in np.unique(strip[ys, xs]):
+            rows = np.flatnonzero((strip == value).any(axis=1))
+            data['text'].append(chr(value))
+            data['left'].append(int(np.flatnonzero((strip == value).any(axis=0))[0]))
+            data['top'].append(int(rows[0]))
+            data['height'].append(len(rows))
+        return data
+
+    monkeypatch.setattr(opencv.pytesseract, 'image_to_data', image_to_data)
+    images = [
+        opencv.Img(image=np.full((h, w), ord(letter), dtype=np.uint8))
+        for letter, h, w in (('K', 30, 40), ('O', 50, 20), ('T', 10, 60))
+    ]
+    assert opencv.detect_texts(images, restrict_characters='KOT') == ['K', 'O', 'T']
+    assert len(calls) == 1
+    assert 'tessedit_char_whitelist="KOT"' in calls[0]
+    assert opencv.detect_texts([]) == []
+
+
+@pytest.fixture
+def screenshot():
+    bgr = np.zeros((1600, 700, 3), dtype=np.uint8)
+    bgr[:] = (0x22, 0x22, 0x22)
+    for row, y in enumerate((300, 380)):
+        for x, colour in ((100, opencv.GREEN), (160, opencv.YELLOW), (220, opencv.GREY)):
+            bgr[y:y + 50, x:x + 50 + 10 * row] = colour.rgb[::-1]
+            bgr[y + 15:y + 35, x + 20:x + 25] = (0xFF, 0xFF, 0xFF)
+    # the success badge
+    bgr[500:560, 100:500] = opencv.GREEN.rgb[::-1]
+    yield bgr
+
+
+def test_locate_board(screenshot):
+    board = opencv.locate_board(opencv.Img(image=screenshot))
+    assert np.shares_memory(board.image, screenshot)
+    height, width = board.image.shape[:2]
+    # rounded to whole px of the scaled down copy
+    assert 0 <= height - (560 - 300 + 2 * opencv.BOARD_MARGIN) <= 2
+    assert 0 <= width - (500 - 100 + 2 * opencv.BOARD_MARGIN) <= 2
+
+    empty = opencv.Img(image=np.zeros((100, 100, 3), dtype=np.uint8))
+    assert opencv.locate_board(empty).image.shape == (100, 100, 3)
+
+
+def test_board_has_the_same_tiles(screenshot):
+    def summary(rows):
+        return [[(str(tile.colour), tile.mask.image.shape, int(tile.mask.image.sum())) for tile in row] for row in rows]
+
+    full = opencv.get_tiles(opencv.Img(image=screenshot))
+    assert [len(row) for row in full] == [3, 3, 1]
+    assert summary(opencv.get_tiles(opencv.locate_board(opencv.Img(image=screenshot)))) == summary(full)
+
+
+def test_decode(screenshot):
+    _, png = cv2.imencode('.png', screenshot)
+    assert (opencv.decode(png.tobytes()).image == screenshot).all()
+    with pytest.raises(opencv.UnreadableImage):
+        opencv.decode(b'not an image')
+
+
+def test_synthetic_boards():
+    from benchmarks import ocr
+
+    rng = random.Random(0)
+    font = ocr.load_font(None, 60)
+    words = ['kotek', 'płotek', 'żabka', 'okno', 'słońce', 'źdźbło', 'pies', 'łoś', 'grzyb', 'ćma']
+    words = [word for word in words if all(font.can_draw(letter.upper()) for letter in word)]
+    boards = [ocr.random_board(words, font, rng, guesses=3) for _ in range(3)]
+    # glyphs of the very same boards, so that tesseract is not needed
+    classifier = ocr.learn_glyphs(boards)
+    for board in boards:
+        assert ocr.read_board(board, classifier).rows == board.expected
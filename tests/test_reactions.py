@@ -0,0 +1,57 @@
+import asyncio
+from types import SimpleNamespace
+
+from reactions import ReactionCounter
+
+
+def make_message(id, reactions):
+    return SimpleNamespace(
+        id=id,
+        reactions=[SimpleNamespace(emoji=emoji, count=count, me=me) for emoji, count, me in reactions],
+    )
+
+
+def test_untracked_message():
+    counter = ReactionCounter(fetch=None)
+    assert counter.add(1, '👍') is None
+    assert counter.get(1, '👍') is None
+
+
+def test_seed_then_count_raw_events():
+    counter = ReactionCounter(fetch=None)
+    counter.seed(make_message(1, [('👍', 2, False)]))
+
+    assert counter.add(1, '👍').count == 3
+    assert counter.remove(1, '👍').count == 2
+    assert counter.add(1, '👎').count == 1
+
+
+def test_resolve_fetches_once_for_concurrent_reactions():
+    calls = []
+
+    async def fetch(channel_id, message_id):
+        calls.append((channel_id, message_id))
+        await asyncio.sleep(0)
+        return make_message(message_id, [('👍', 3, False)])
+
+    async def _inner():
+        counter = ReactionCounter(fetch=fetch)
+        states = await asyncio.gather(*[counter.resolve(10, 1, '👍') for _ in range(5)])
+        return counter, states
+
+    counter, states = asyncio.run(_inner())
+    assert calls == [(10, 1)]
+    assert counter.fetch_count == 1
+    assert all(state.count == 3 for state in states)
+
+
+def test_lru_eviction():
+    counter = ReactionCounter(fetch=None, max_messages=2)
+    counter.seed(make_message(1, []))
+    counter.seed(make_message(2, []))
+    counter.get(1, '👍')
+    counter.seed(make_message(3, []))
+
+    assert 1 in counter
+    assert 2 not in counter
+    assert 3 in counter
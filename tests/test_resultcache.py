@@ -0,0 +1,35 @@
+import numpy as np
+
+from resultcache import ResultCache
+from resultcache import size_of
+
+
+def test_lru_entries():
+    cache = ResultCache(max_entries=2)
+    cache.put('a', ['kot'])
+    cache.put('b', ['pies'])
+    assert cache.get('a') == ['kot']
+    cache.put('c', ['żaba'])
+    assert cache.get('b') is None
+    assert cache.get('a') == ['kot']
+    assert cache.get('c') == ['żaba']
+    assert cache.stats()[:3] == (3, 1, 2)
+
+
+def test_lru_bytes():
+    rows = np.arange(100)
+    cache = ResultCache(max_bytes=2 * size_of(rows))
+    cache.put('a', rows)
+    cache.put('b', rows)
+    assert len(cache) == 2
+    cache.put('c', rows)
+    assert len(cache) == 2
+    assert cache.get('a') is None
+    assert cache.stats().bytes == 2 * size_of(rows)
+
+    cache.put('big', np.arange(1000))
+    assert cache.get('big') is None
+
+    cache.clear()
+    assert len(cache) == 0
+    assert cache.stats().bytes == 0
@@ -0,0 +1,44 @@
+import pendulum
+
+from decorators import daily
+from decorators import run_every
+from scheduler import Scheduler
+
+
+@daily(at='8:00')
+def morning():
+    pass
+
+
+@run_every(hours=1, at='0:30')
+def hourly():
+    pass
+
+
+def test_next_fire_times():
+    now = pendulum.datetime(2024, 1, 5, 7, 0, tz=pendulum.UTC)
+    scheduler = Scheduler([morning, hourly], now=now)
+    assert scheduler.next_fire_times() == [
+        ('hourly', pendulum.datetime(2024, 1, 5, 7, 30, tz=pendulum.UTC)),
+        ('morning', pendulum.datetime(2024, 1, 5, 8, 0, tz=pendulum.UTC)),
+    ]
+
+
+def test_pop_due_reschedules():
+    now = pendulum.datetime(2024, 1, 5, 7, 0, tz=pendulum.UTC)
+    scheduler = Scheduler([morning, hourly], now=now)
+
+    assert scheduler.pop_due(now) == []
+    assert scheduler.pop_due(pendulum.datetime(2024, 1, 5, 8, 0, tz=pendulum.UTC)) == [hourly, morning]
+    assert scheduler.next_fire_times() == [
+        ('hourly', pendulum.datetime(2024, 1, 5, 8, 30, tz=pendulum.UTC)),
+        ('morning', pendulum.datetime(2024, 1, 6, 8, 0, tz=pendulum.UTC)),
+    ]
+
+
+def test_pop_due_skips_missed_occurrences():
+    now = pendulum.datetime(2024, 1, 5, 7, 0, tz=pendulum.UTC)
+    scheduler = Scheduler([hourly], now=now)
+
+    assert scheduler.pop_due(pendulum.datetime(2024, 1, 5, 12, 0, tz=pendulum.UTC)) == [hourly]
+    assert scheduler.next_deadline() == pendulum.datetime(2024, 1, 5, 12, 30, tz=pendulum.UTC)
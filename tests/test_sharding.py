@@ -0,0 +1,18 @@
+import pytest
+
+from sharding import shard_groups
+
+
+@pytest.mark.parametrize(
+    'shard_ids,processes,expected',
+    [
+        ([0, 1, 2, 3], 1, [[0, 1, 2, 3]]),
+        ([0, 1, 2, 3], 2, [[0, 1], [2, 3]]),
+        ([0, 1, 2, 3, 4], 2, [[0, 1], [2, 3, 4]]),
+        ([4, 5, 6], 3, [[4], [5], [6]]),
+        ([0, 1], 8, [[0], [1]]),
+        ([0, 1], 0, [[0, 1]]),
+    ],
+)
+def test_shard_groups(shard_ids, processes, expected):
+    assert shard_groups(shard_ids, processes) == expected
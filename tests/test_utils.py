@@ -1,9 +1,11 @@
+import random
 from datetime import time
 
 import pendulum
 import pytest
 
 from utils import next_call_timestamp
+from utils import rolls_until_triggered
 
 
 @pytest.mark.parametrize(
@@ -20,3 +22,24 @@ from utils import next_call_timestamp
 def test_next_call_timestamp(now, scheduled_at, scheduled_every, expected):
     result = next_call_timestamp(now, scheduled_at, scheduled_every)
     assert result == expected
+
+
+@pytest.mark.parametrize(
+    'chance,expected',
+    [
+        (0, None),
+        (-1, None),
+        (1, 1),
+    ],
+)
+def test_rolls_until_triggered_edge_cases(chance, expected):
+    assert rolls_until_triggered(chance) == expected
+
+
+def test_rolls_until_triggered_is_geometric():
+    random.seed(2137)
+    chance = 0.01
+    samples = [rolls_until_triggered(chance) for _ in range(20_000)]
+    assert min(samples) >= 1
+    assert abs(sum(samples) / len(samples) - 1 / chance) < 3
+    assert abs(sum(s == 1 for s in samples) / len(samples) - chance) < 0.005
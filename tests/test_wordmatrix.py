@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+from wordmatrix import WordMatrix
+
+
+@pytest.fixture
+def matrix():
+    yield WordMatrix(['kot', 'koty', 'oko', 'żółw', ''])
+
+
+def test_shape(matrix):
+    assert matrix.codepoints.shape == (5, 4)
+    assert matrix.lengths.tolist() == [3, 4, 3, 4, 0]
+    assert matrix.alphabet == ''.join(sorted('kotywżół'))
+    assert matrix.take(np.array([3, 0])) == ['żółw', 'kot']
+
+
+def test_count(matrix):
+    rows = matrix.all_rows()
+    assert matrix.count('o', rows).tolist() == [1, 1, 2, 0, 0]
+    assert matrix.count('ko', rows).tolist() == [2, 2, 3, 0, 0]
+    assert matrix.count('żq', rows).tolist() == [0, 0, 0, 1, 0]
+    assert matrix.letter_counts.sum(axis=1).tolist() == [3, 4, 3, 4, 0]
+
+
+def test_find(matrix):
+    rows = matrix.all_rows()
+    assert matrix.find('ko', rows).tolist() == [0, 0, 1, -1, -1]
+    assert matrix.find('o', rows, start=np.array([0, 2, 1, 0, 0])).tolist() == [1, -1, 2, -1, -1]
+    assert matrix.find('kotyx', rows).tolist() == [-1] * 5
+
+
+def test_at(matrix):
+    rows = np.array([0, 1, 2])
+    assert matrix.at('ko', rows, 0).tolist() == [True, True, False]
+    assert matrix.at('ty', rows, matrix.lengths[rows] - 2).tolist() == [False, True, False]
+    assert matrix.at('kotek', rows, 0).tolist() == [False, False, False]
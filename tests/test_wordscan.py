@@ -0,0 +1,43 @@
+import functools
+import gc
+
+import numpy as np
+
+import diffle
+import wordscan
+from difflanek import difflanek
+from wordmatrix import WordMatrix
+
+
+WORDS = ['kot', 'koty', 'kto', 'płot', 'żaba', 'okno', 'oko', 'kotek', 'łoś', 'pies']
+
+
+def test_single_process():
+    assert wordscan.get_scan(WordMatrix(WORDS), processes=1) is None
+
+
+def test_parallel_scan():
+    matrix = WordMatrix(WORDS)
+    scan = wordscan.ParallelScan(matrix, processes=2, chunk_size=3, min_rows=0)
+    try:
+        constraints = difflanek.compile_guesses(['(o)'], False)
+        expected = constraints.filter(matrix, matrix.all_rows())
+        assert scan.filter(constraints.filter, matrix.all_rows()).tolist() == expected.tolist()
+
+        parser = diffle.Solver([])
+        chunks = parser._parse_guessed_word('(k.)')
+        regex = ''.join(chunk.to_regex() for chunk in chunks)
+        rows = scan.filter(functools.partial(diffle.filter_rows, chunks, regex), np.array([0, 1, 2, 7]))
+        assert matrix.take(rows) == ['kot', 'koty', 'kto', 'kotek']
+    finally:
+        scan.close()
+
+
+def test_scan_closed_with_matrix():
+    matrix = WordMatrix(WORDS)
+    scan = wordscan.get_scan(matrix, processes=2)
+    assert wordscan.get_scan(matrix, processes=2) is scan
+    del matrix
+    gc.collect()
+    assert len(wordscan._scans) == 0
+    assert scan._blocks == []
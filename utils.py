@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 import itertools
+import math
 import random
 from datetime import datetime
 from datetime import time
@@ -80,6 +81,18 @@ def triggered_chance(percentage_chance: float) -> bool:
     return random.random() < percentage_chance
 
 
+def rolls_until_triggered(percentage_chance: float) -> int | None:
+    """
+    How many `triggered_chance` rolls it takes until the first one succeeds,
+    sampled in one go from the geometric distribution. None means never.
+    """
+    if percentage_chance <= 0:
+        return None
+    if percentage_chance >= 1:
+        return 1
+    return math.floor(math.log(1.0 - random.random()) / math.log(1.0 - percentage_chance)) + 1
+
+
 def next_call_timestamp(
     now: pendulum.DateTime,
     scheduled_at: time,
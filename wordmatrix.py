@@ -0,0 +1,165 @@
+from __future__ import annotations
+
+import functools
+from typing import Callable
+from typing import NamedTuple
+from typing import Sequence
+
+import numpy as np
+
+
+class FlatWords(NamedTuple):
+    # utf-32 codepoints of all words, each followed by a newline
+    codepoints: np.ndarray
+    is_separator: np.ndarray
+    # where every word starts and its newline is
+    starts: np.ndarray
+    ends: np.ndarray
+    # word of every codepoint, newlines included
+    word_ids: np.ndarray
+
+
+def flatten_words(words: np.ndarray | Sequence[str]) -> FlatWords:
+    text = ''.join(word + '\n' for word in words)
+    codepoints = np.frombuffer(text.encode('utf-32-le'), dtype=np.uint32)
+    is_separator = codepoints == ord('\n')
+    ends = np.flatnonzero(is_separator)
+    starts = np.r_[0, ends[:-1] + 1].astype(np.int64)
+    word_ids = np.cumsum(is_separator) - is_separator
+    return FlatWords(codepoints, is_separator, starts, ends, word_ids)
+
+
+class WordMatrix:
+    """
+    Words as a zero padded (words, longest word) matrix of codepoints, with their
+    lengths and per-letter counts, so that a constraint is checked for all words at once.
+
+    Checks take `rows`, ids of the words to look at, and return one value per row.
+    """
+
+    def __init__(self, words: np.ndarray | Sequence[str]) -> None:
+        self.words: np.ndarray | Sequence[str] | None = words
+        flat, is_separator, starts, ends, word_ids = flatten_words(words)
+        word_ids = word_ids[~is_separator]
+
+        self.lengths = ends - starts
+        self.width = int(self.lengths.max(initial=0))
+        self.codepoints = np.zeros((len(self.lengths), self.width), dtype=np.uint32)
+        self.codepoints[word_ids, np.flatnonzero(~is_separator) - starts[word_ids]] = flat[~is_separator]
+        self.alphabet = ''.join(chr(codepoint) for codepoint in np.unique(flat[~is_separator]))
+        self._letter_ids = {letter: i for i, letter in enumerate(self.alphabet)}
+
+    @classmethod
+    def from_arrays(
+        cls,
+        codepoints: np.ndarray,
+        lengths: np.ndarray,
+        alphabet: str,
+        letter_counts: np.ndarray | None = None,
+    ) -> WordMatrix:
+        """
+        A matrix over existing arrays (e.g. in shared memory), words are decoded from the codepoints.
+        """
+        matrix = cls.__new__(cls)
+        matrix.words = None
+        matrix.codepoints = codepoints
+        matrix.lengths = lengths
+        matrix.width = codepoints.shape[1]
+        matrix.alphabet = alphabet
+        matrix._letter_ids = {letter: i for i, letter in enumerate(alphabet)}
+        if letter_counts is not None:
+            matrix.__dict__['letter_counts'] = letter_counts
+        return matrix
+
+    def __len__(self) -> int:
+        return len(self.lengths)
+
+    @functools.cached_property
+    def letter_counts(self) -> np.ndarray:
+        """
+        (words, alphabet) matrix, how many times each letter of `alphabet` occurs in each word.
+        """
+        counts = np.zeros((len(self), len(self.alphabet) + 1), dtype=np.uint8)
+        rows = self.all_rows()
+        # one column at a time, so every row is incremented at most once per step
+        for column in self.letter_index.T:
+            counts[rows, column] += 1
+        return counts[:, 1:]
+
+    @functools.cached_property
+    def letter_index(self) -> np.ndarray:
+        """
+        `codepoints` as positions in `alphabet` + 1, 0 past the end of a word.
+        """
+        alphabet = np.array([ord(letter) for letter in self.alphabet], dtype=np.uint32)
+        index = np.searchsorted(alphabet, self.codepoints).astype(np.uint16) + 1
+        index[self.codepoints == 0] = 0
+        return index
+
+    def all_rows(self) -> np.ndarray:
+        return np.arange(len(self))
+
+    def take(self, rows: np.ndarray) -> list[str]:
+        if self.words is None:
+            return [''.join(map(chr, self.codepoints[i, :self.lengths[i]])) for i in rows]
+        if hasattr(self.words, 'take'):
+            # numpy arrays and packed dictionaries look up many words at once faster
+            return list(self.words.take(rows))
+        return [self.words[i] for i in rows]
+
+    def letters_where(self, predicate: Callable[[str], bool]) -> str:
+        return ''.join(letter for letter in self.alphabet if predicate(letter))
+
+    def count(self, letters: str, rows: np.ndarray) -> np.ndarray:
+        """
+        Occurrences of any of `letters`, letters which no word contains count as 0.
+        """
+        columns = sorted({self._letter_ids[letter] for letter in letters if letter in self._letter_ids})
+        if not columns:
+            return np.zeros(len(rows), dtype=np.int64)
+        return self.letter_counts[rows][:, columns].sum(axis=1, dtype=np.int64)
+
+    def find(self, sequence: str, rows: np.ndarray, start: np.ndarray | int = 0) -> np.ndarray:
+        """
+        Position of the first occurrence of `sequence` at or after `start`, -1 if there is none.
+        """
+        if not sequence:
+            return np.zeros(len(rows), dtype=np.int64)
+        hits = self.occurrences(sequence, rows)
+        if hits.shape[1] == 0:
+            return np.full(len(rows), -1, dtype=np.int64)
+        hits &= np.arange(hits.shape[1]) >= np.reshape(start, (-1, 1))
+        return np.where(hits.any(axis=1), hits.argmax(axis=1), -1)
+
+    def occurrences(self, sequence: str, rows: np.ndarray) -> np.ndarray:
+        """
+        (rows, possible offsets) matrix, whether `sequence` starts at the offset.
+        """
+        windows = max(self.width - len(sequence) + 1, 0)
+        codepoints = self.codepoints[rows]
+        hits = np.ones((len(rows), windows), dtype=bool)
+        for i, letter in enumerate(sequence):
+            hits &= codepoints[:, i:i + windows] == ord(letter)
+        return hits
+
+    def holds(self, letters: str, rows: np.ndarray) -> np.ndarray:
+        """
+        (rows, width) matrix, whether the letter at the position is one of `letters`.
+        """
+        lookup = np.zeros(len(self.alphabet) + 1, dtype=bool)
+        lookup[[self._letter_ids[letter] + 1 for letter in letters if letter in self._letter_ids]] = True
+        return lookup[self.letter_index[rows]]
+
+    def at(self, sequence: str, rows: np.ndarray, offsets: np.ndarray | int) -> np.ndarray:
+        """
+        Whether `sequence` occurs at `offsets`, e.g. 0 for a prefix or `lengths - len(sequence)` for a suffix.
+        """
+        offsets = np.broadcast_to(offsets, (len(rows),))
+        fits = (offsets >= 0) & (offsets + len(sequence) <= self.lengths[rows])
+        if not fits.any():
+            return fits
+        result = fits.copy()
+        for i, letter in enumerate(sequence):
+            columns = np.where(fits, offsets + i, 0)
+            result &= self.codepoints[rows, columns] == ord(letter)
+        return result
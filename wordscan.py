@@ -0,0 +1,162 @@
+"""
+`WordMatrix` checks split into chunks of rows and run in worker processes,
+which map the matrix from shared memory instead of getting a copy per task.
+"""
+from __future__ import annotations
+
+import atexit
+import multiprocessing
+import weakref
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing.shared_memory import SharedMemory
+from typing import Callable
+from typing import NamedTuple
+
+import numpy as np
+
+from logger import get_logger
+from wordmatrix import WordMatrix
+
+
+logger = get_logger(__name__)
+
+RowFilter = Callable[[WordMatrix, np.ndarray], np.ndarray]
+
+# see `python -m benchmarks.wordscan`
+CHUNK_SIZE = 50_000
+MIN_PARALLEL_ROWS = 100_000
+
+
+class SharedArray(NamedTuple):
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+
+class SharedMatrixSpec(NamedTuple):
+    codepoints: SharedArray
+    lengths: SharedArray
+    letter_counts: SharedArray
+    alphabet: str
+
+
+def _share(array: np.ndarray, blocks: list[SharedMemory]) -> SharedArray:
+    block = SharedMemory(create=True, size=max(array.nbytes, 1))
+    np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+    blocks.append(block)
+    return SharedArray(block.name, array.shape, array.dtype.str)
+
+
+def _attach(shared: SharedArray, blocks: list[SharedMemory]) -> np.ndarray:
+    block = SharedMemory(name=shared.name)
+    blocks.append(block)
+    return np.ndarray(shared.shape, dtype=np.dtype(shared.dtype), buffer=block.buf)
+
+
+# worker process state, set up by `_init_worker`
+_worker_blocks: list[SharedMemory] = []
+_worker_matrix: WordMatrix | None = None
+
+
+def _init_worker(spec: SharedMatrixSpec) -> None:
+    global _worker_matrix
+    _worker_matrix = WordMatrix.from_arrays(
+        codepoints=_attach(spec.codepoints, _worker_blocks),
+        lengths=_attach(spec.lengths, _worker_blocks),
+        alphabet=spec.alphabet,
+        letter_counts=_attach(spec.letter_counts, _worker_blocks),
+    )
+
+
+def _run(check: RowFilter, rows: np.ndarray) -> np.ndarray:
+    assert _worker_matrix is not None
+    return check(_worker_matrix, rows)
+
+
+class ParallelScan:
+    """
+    Runs `check(matrix, rows) -> matching rows` over chunks of `chunk_size` rows in
+    `processes` workers. Fewer than `min_rows` rows are checked in this process.
+    `check` has to be picklable, e.g. a module level function or a `functools.partial` of one.
+
+    Only a weak reference to `matrix` is kept, so that `get_scan` can close the scan
+    once the matrix is collected.
+    """
+
+    def __init__(
+        self,
+        matrix: WordMatrix,
+        processes: int,
+        *,
+        chunk_size: int = CHUNK_SIZE,
+        min_rows: int = MIN_PARALLEL_ROWS,
+    ) -> None:
+        self._matrix = weakref.ref(matrix)
+        self.chunk_size = chunk_size
+        self.min_rows = min_rows
+        self._blocks: list[SharedMemory] = []
+        spec = SharedMatrixSpec(
+            codepoints=_share(matrix.codepoints, self._blocks),
+            lengths=_share(matrix.lengths, self._blocks),
+            letter_counts=_share(matrix.letter_counts, self._blocks),
+            alphabet=matrix.alphabet,
+        )
+        self._executor = ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context('spawn'),
+            initializer=_init_worker,
+            initargs=(spec,),
+        )
+        logger.info('parallel scan of %s words in %s processes', len(matrix), processes)
+
+    @property
+    def matrix(self) -> WordMatrix:
+        matrix = self._matrix()
+        assert matrix is not None
+        return matrix
+
+    def filter(self, check: RowFilter, rows: np.ndarray) -> np.ndarray:
+        """
+        Matching rows in the order of `rows`.
+        """
+        if len(rows) < self.min_rows:
+            return check(self.matrix, rows)
+        chunks = [rows[i:i + self.chunk_size] for i in range(0, len(rows), self.chunk_size)]
+        futures = [self._executor.submit(_run, check, chunk) for chunk in chunks]
+        return np.concatenate([future.result() for future in futures])
+
+    def close(self) -> None:
+        self._executor.shutdown(cancel_futures=True)
+        for block in self._blocks:
+            block.close()
+            block.unlink()
+        self._blocks.clear()
+
+
+_scans: weakref.WeakKeyDictionary[WordMatrix, ParallelScan] = weakref.WeakKeyDictionary()
+
+
+def get_scan(matrix: WordMatrix, processes: int) -> ParallelScan | None:
+    """
+    The scan shared by everything filtering `matrix`, None when there is a single process.
+    It is closed by `release` or once `matrix` is collected.
+    """
+    if processes <= 1:
+        return None
+    scan = _scans.get(matrix)
+    if scan is None:
+        scan = _scans[matrix] = ParallelScan(matrix, processes)
+        weakref.finalize(matrix, scan.close)
+    return scan
+
+
+def release(matrix: WordMatrix) -> None:
+    scan = _scans.pop(matrix, None)
+    if scan is not None:
+        scan.close()
+
+
+@atexit.register
+def _close_all() -> None:
+    for matrix in list(_scans):
+        release(matrix)